@@ -0,0 +1,120 @@
+import asyncio
+import inspect
+import time
+
+import aiohttp
+
+import brightdata
+import html_cache
+import metrics
+import rate_control
+import streaming
+from log_setup import get_logger
+
+log = get_logger("fetch")
+
+# 동시 요청 수 상한 (요청 하나당 스레드가 아닌 코루틴 하나, 실제 값은 AIMD로 조정)
+DEFAULT_CONCURRENCY = rate_control.MAX_CONCURRENCY
+
+
+async def fetch_html_async(session, target_url, retries=3, backoff=5, timeout=60):
+    """
+    fetch_html_via_brightdata의 asyncio 버전 (대기 중에도 스레드를 점유하지 않음)
+    """
+    # 디스크 캐시 우선 (COUPANG_CACHE_MODE=only이면 네트워크를 쓰지 않음)
+    cache = html_cache.get_cache()
+    if cache is not None:
+        html = await cache.get_async(target_url)
+        if html is not None:
+            return html
+        if cache.mode == "only":
+            raise html_cache.CacheMiss(f"캐시에 없음: {target_url}")
+
+    # 헤더/payload 템플릿은 공용 전송 계층(brightdata)에서 미리 직렬화된 것을 사용
+    data = brightdata.encode_payload(target_url)
+
+    # 동시 요청 수(AIMD)와 초당 요청 수(토큰 버킷)는 프로세스 전체에서 공유
+    limiter = rate_control.get_limiter()
+    bucket = rate_control.get_bucket()
+
+    for attempt in range(1, retries + 1):
+        wait = backoff * attempt
+        await limiter.acquire_async()
+        try:
+            await bucket.acquire_async()
+            started = time.monotonic()
+            start = time.perf_counter()
+            async with session.post(
+                brightdata.BRD_API_URL,
+                headers=brightdata.HEADERS,
+                data=data,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as response:
+                response.raise_for_status()
+                body = await response.read()
+                html = body.decode(response.get_encoding(), errors="replace")
+            elapsed = time.perf_counter() - start
+            limiter.on_success(elapsed, started)
+            metrics.observe("fetch", elapsed)
+            metrics.incr("bytes_received", len(body))
+            if cache is not None:
+                await cache.put_async(target_url, html)
+            return html
+        except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+            error = e
+        except aiohttp.ClientResponseError as e:
+            if e.status not in rate_control.RETRYABLE_STATUS:
+                metrics.incr("fetch_errors")
+                metrics.incr("fetch_failures")
+                raise
+            # 429/5xx: 속도 제한 또는 일시적 과부하 - 재시도하고 동시 요청 수도 줄임
+            error = e
+            wait = rate_control.retry_after(e.headers, wait)
+        finally:
+            limiter.release()
+
+        limiter.on_congestion(started, type(error).__name__)
+        metrics.incr("fetch_errors")
+        # repr은 요청 헤더(인증 토큰)까지 포함하므로 예외 이름과 메시지만 기록
+        log.warning("Bright Data 지연 (시도 %s/%s) - %s: %s", attempt, retries, type(error).__name__, error)
+        if attempt < retries:
+            metrics.incr("fetch_retries")
+            await asyncio.sleep(wait)
+        else:
+            metrics.incr("fetch_failures")
+            raise error
+
+
+async def fetch_all_async(urls, on_result, concurrency=DEFAULT_CONCURRENCY, **fetch_kwargs):
+    """
+    urls를 가져오고, 완료되는 순서대로 on_result(index, url, html, error)를 호출 (index는 1부터 시작, 코루틴을 돌려주면 await)
+    실제 동시 요청 수는 rate_control의 AIMD 제한기가 조정 (concurrency는 커넥션 수 상한)
+    urls는 이터레이터여도 됨 - 진행 중인 URL은 streaming.STREAM_WINDOW개까지만 꺼냄
+    """
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+
+        async def _worker(item):
+            index, url = item
+            try:
+                html = await fetch_html_async(session, url, **fetch_kwargs)
+                error = None
+            except Exception as e:
+                html, error = None, e
+            # 결과 처리(파싱/CSV 기록)는 요청 슬롯 반납 후 수행하여 다음 요청이 바로 시작되도록 함
+            try:
+                result = on_result(index, url, html, error)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                log.error("작업 실행 중 예외 발생: %s", e)
+
+        await streaming.run_bounded_async(enumerate(urls, 1), _worker)
+
+
+def fetch_all(urls, on_result, concurrency=DEFAULT_CONCURRENCY, **fetch_kwargs):
+    """
+    동기 코드에서 호출하는 진입점: 이벤트 루프를 만들어 fetch_all_async 실행
+    """
+    asyncio.run(fetch_all_async(urls, on_result, concurrency, **fetch_kwargs))
@@ -0,0 +1,100 @@
+"""
+파서 백엔드 동등성 확인 (네트워크 없음)
+
+bench/fixtures/ 의 검색/상세페이지 HTML(또는 인자로 준 HTML 파일)을 기준 백엔드(bs4)와
+후보 백엔드(selectolax)로 각각 추출해 행 단위로 비교 - 하나라도 다르면 종료 코드 1
+
+    python bench/backend_parity.py                         # 픽스처 전체
+    python bench/backend_parity.py page1.html page2.html   # 저장된 HTML (파일 이름에 search_/pdp_ 접두어로 종류 구분)
+"""
+import argparse
+import contextlib
+import gzip
+import io
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import search_parser  # noqa: E402
+from parser_bench import FIXTURES_DIR, load_fixtures  # noqa: E402
+from pdp_parser import extract_pdp_row  # noqa: E402
+
+# 종류별 (이름, 추출 함수) - 추출 함수는 (html, 백엔드) → 행 목록
+EXTRACTORS = {
+    "search": [
+        ("search", search_parser.parse_search_results),
+        ("listing", search_parser.parse_listing),
+    ],
+    "pdp": [
+        ("pdp", lambda html, be: [extract_pdp_row(html, backend=be)]),
+    ],
+}
+
+
+def compare_backends(extract, html, reference="bs4", candidate="selectolax"):
+    """
+    두 백엔드의 추출 결과를 비교해 다른 행 목록 반환 [(행 번호, 기준 행, 후보 행)]
+    """
+    expected = extract(html, search_parser.get_backend(reference))
+    actual = extract(html, search_parser.get_backend(candidate))
+    diffs = []
+    for i in range(max(len(expected), len(actual))):
+        exp_row = expected[i] if i < len(expected) else None
+        act_row = actual[i] if i < len(actual) else None
+        if exp_row != act_row:
+            diffs.append((i + 1, exp_row, act_row))
+    return diffs
+
+
+def _read_pages(paths):
+    pages = {"search": [], "pdp": []}
+    for path in paths:
+        name = os.path.basename(path)
+        kind = "pdp" if name.startswith("pdp_") else "search"
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            pages[kind].append((name, f.read()))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="파서 백엔드 동등성 확인")
+    parser.add_argument("paths", nargs="*", help="비교할 HTML 파일 (기본: 픽스처 전체)")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="픽스처 디렉터리")
+    parser.add_argument("--reference", default="bs4", choices=list(search_parser.BACKENDS))
+    parser.add_argument("--candidate", default="selectolax", choices=list(search_parser.BACKENDS))
+    args = parser.parse_args()
+
+    try:
+        search_parser.get_backend(args.candidate)
+    except ImportError:
+        print(f"{args.candidate} 백엔드가 설치되어 있지 않습니다")
+        return 2
+
+    if args.paths:
+        pages = _read_pages(args.paths)
+    else:
+        pages = {kind: load_fixtures(kind, args.fixtures) for kind in EXTRACTORS}
+
+    failed = 0
+    for kind, extractors in EXTRACTORS.items():
+        for name, html in pages[kind]:
+            for label, extract in extractors:
+                # 파서 디버그 출력은 비교 결과와 섞이지 않도록 숨김
+                with contextlib.redirect_stdout(io.StringIO()):
+                    diffs = compare_backends(extract, html, args.reference, args.candidate)
+                if not diffs:
+                    continue
+                failed += 1
+                print(f"[불일치] {label} {name}: {len(diffs)}개 행")
+                for row_no, exp_row, act_row in diffs[:5]:
+                    print(f"  {row_no}행\n    {args.reference:<10}: {exp_row}\n    {args.candidate:<10}: {act_row}")
+    total = sum(len(pages[kind]) * len(extractors) for kind, extractors in EXTRACTORS.items())
+    print(f"[{'실패' if failed else '일치'}] {total - failed}/{total}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
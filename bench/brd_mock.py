@@ -0,0 +1,237 @@
+"""
+Bright Data /request 대역 서버 (녹화/재생) - 실제 크레딧과 네트워크 없이 부하 테스트용
+
+재생 순서: 1) --cache 의 녹화 응답(html_cache 형식, canonical_url 기준)
+           2) --fixtures 의 픽스처 (페이지 종류별로 URL 해시로 하나 선택)
+           3) 없으면 404
+녹화: --record --upstream https://api.brightdata.com/request
+      실제 Bright Data로 전달하고 응답을 --cache 에 저장 (이후 그대로 재생 가능)
+
+지연/장애 주입:
+  --latency fixed:0.8 | uniform:0.3,2.0 | normal:1.0,0.3 | lognormal:1.2,0.5 (중앙값, sigma)
+  --error-rate 0.02     : 502 응답 비율
+  --timeout-rate 0.01   : --hang 초 동안 응답하지 않는 비율 (클라이언트 타임아웃 유도)
+  --rate-limit 20       : 초당 허용 요청 수, 초과 시 429 + Retry-After
+  --search-pages 3      : 검색 결과가 이 페이지까지만 있는 것처럼 이후 페이지는 빈 결과 페이지 응답
+
+    python bench/brd_mock.py --port 8765 --latency lognormal:1.2,0.5 --error-rate 0.02
+    BRD_API_URL=http://127.0.0.1:8765/request COUPANG_CACHE_MODE=off python coupang_rocket_search.py
+
+GET /stats 로 요청/재생/주입 통계 확인
+"""
+import argparse
+import asyncio
+import re
+import glob
+import gzip
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import time
+
+from aiohttp import ClientSession, ClientTimeout, web
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import html_cache  # noqa: E402
+
+DEFAULT_FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+
+# 마지막 페이지 이후 검색 결과 (항목 없음)
+EMPTY_SEARCH_PAGE = '<html><head><title>쿠팡 검색</title></head><body><ul id="product-list"></ul></body></html>'
+
+
+def parse_latency(spec):
+    """
+    지연 분포 문자열을 (초를 반환하는 함수)로 변환
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"알 수 없는 지연 분포: {spec} (fixed/uniform/normal/lognormal)")
+
+
+class TokenBucket:
+    """
+    초당 rate개, 최대 burst개까지 허용하는 토큰 버킷 (Bright Data 속도 제한 흉내)
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class FixtureSet:
+    """
+    녹화가 없는 URL에 돌려줄 픽스처 (같은 URL에는 항상 같은 픽스처)
+    """
+
+    def __init__(self, fixtures_dir):
+        self.pages = {"search": [], "pdp": []}
+        for kind in self.pages:
+            for path in sorted(glob.glob(os.path.join(fixtures_dir, f"{kind}_*.html*"))):
+                opener = gzip.open if path.endswith(".gz") else open
+                with opener(path, "rt", encoding="utf-8") as f:
+                    self.pages[kind].append(f.read())
+
+    def get(self, url, search_pages=0):
+        kind = html_cache.page_type(url)
+        if kind == "search" and search_pages:
+            m = re.search(r"[?&]page=(\d+)", url)
+            if m and int(m.group(1)) > search_pages:
+                return EMPTY_SEARCH_PAGE
+        pages = self.pages.get(kind)
+        if not pages:
+            return None
+        digest = hashlib.sha1(html_cache.canonical_url(url).encode("utf-8")).digest()
+        return pages[int.from_bytes(digest[:4], "big") % len(pages)]
+
+
+class MockBrightData:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.latency = parse_latency(args.latency)
+        self.bucket = TokenBucket(args.rate_limit, args.burst) if args.rate_limit else None
+        self.cache = None
+        if args.cache:
+            # 재생 시 TTL 무시(only), 녹화 시 put만 사용
+            self.cache = html_cache.HtmlCache(path=args.cache, mode="only")
+        self.fixtures = FixtureSet(args.fixtures) if args.fixtures else None
+        self.inflight = 0
+        self.stats = dict.fromkeys(
+            ["requests", "served", "replayed", "recorded", "fixture", "not_found",
+             "rate_limited", "errors_injected", "timeouts_injected", "max_inflight"],
+            0,
+        )
+        self.started = time.time()
+
+    async def handle_request(self, request):
+        self.stats["requests"] += 1
+        self.inflight += 1
+        self.stats["max_inflight"] = max(self.stats["max_inflight"], self.inflight)
+        try:
+            return await self._respond(request)
+        finally:
+            self.inflight -= 1
+
+    async def _respond(self, request):
+        body = await request.read()
+        try:
+            target_url = json.loads(body)["url"]
+        except (ValueError, KeyError):
+            return web.Response(status=400, text="invalid payload")
+
+        if self.bucket is not None and not self.bucket.take():
+            self.stats["rate_limited"] += 1
+            return web.Response(status=429, text="rate limited", headers={"Retry-After": "1"})
+
+        roll = self.rng.random()
+        if roll < self.args.timeout_rate:
+            self.stats["timeouts_injected"] += 1
+            await asyncio.sleep(self.args.hang)
+            return web.Response(status=504, text="gateway timeout")
+        if roll < self.args.timeout_rate + self.args.error_rate:
+            await asyncio.sleep(self.latency(self.rng))
+            self.stats["errors_injected"] += 1
+            return web.Response(status=502, text="injected error")
+
+        html = None
+        if self.cache is not None:
+            html = await self.cache.get_async(target_url)
+            if html is not None:
+                self.stats["replayed"] += 1
+        if html is None and self.args.record:
+            html = await self._record(target_url, body, request.headers.get("Authorization", ""))
+        if html is None and self.fixtures is not None:
+            html = self.fixtures.get(target_url, self.args.search_pages)
+            if html is not None:
+                self.stats["fixture"] += 1
+        if html is None:
+            self.stats["not_found"] += 1
+            return web.Response(status=404, text=f"no recording: {target_url}")
+
+        # 녹화 응답은 이미 실제 지연을 겪었으므로 재생/픽스처에만 지연 주입
+        await asyncio.sleep(self.latency(self.rng))
+        self.stats["served"] += 1
+        return web.Response(text=html, content_type="text/html", charset="utf-8")
+
+    async def _record(self, target_url, body, authorization):
+        async with ClientSession(timeout=ClientTimeout(total=120)) as session:
+            async with session.post(
+                self.args.upstream,
+                data=body,
+                headers={"Content-Type": "application/json", "Authorization": authorization},
+            ) as response:
+                if response.status != 200:
+                    return None
+                html = await response.text()
+        await self.cache.put_async(target_url, html)
+        self.stats["recorded"] += 1
+        return html
+
+    async def handle_stats(self, request):
+        return web.json_response({
+            **self.stats,
+            "inflight": self.inflight,
+            "uptime_seconds": round(time.time() - self.started, 3),
+        })
+
+    def make_app(self):
+        app = web.Application(client_max_size=4 * 1024 * 1024)
+        app.router.add_post("/request", self.handle_request)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+
+def add_mock_arguments(parser):
+    # 부하 테스트 하네스(load_test.py)도 같은 옵션을 그대로 전달
+    parser.add_argument("--latency", default="lognormal:1.0,0.5", help="지연 분포 (fixed/uniform/normal/lognormal)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="502 응답 비율")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="응답하지 않는 요청 비율")
+    parser.add_argument("--hang", type=float, default=120.0, help="타임아웃 주입 시 대기 시간(초)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="초당 허용 요청 수 (0이면 제한 없음)")
+    parser.add_argument("--burst", type=float, default=None, help="속도 제한 버스트 크기 (기본: rate-limit)")
+    parser.add_argument("--cache", help="녹화 응답 저장소 (html_cache sqlite 경로)")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR, help="녹화가 없을 때 쓸 픽스처 디렉터리 ('' 이면 사용 안 함)")
+    parser.add_argument("--search-pages", type=int, default=0, help="검색 결과 페이지 수 (이후 페이지는 빈 결과, 0이면 제한 없음)")
+    parser.add_argument("--seed", type=int, default=251031, help="지연/장애 주입 난수 시드")
+    return parser
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bright Data /request 녹화/재생 대역 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--record", action="store_true", help="녹화 없는 URL은 --upstream 으로 전달해 --cache 에 저장")
+    parser.add_argument("--upstream", default="https://api.brightdata.com/request", help="녹화 시 실제 Bright Data 주소")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    if args.record and not args.cache:
+        parser.error("--record 는 --cache 경로가 필요합니다")
+
+    mock = MockBrightData(args)
+    print(f"Bright Data 대역 서버: http://{args.host}:{args.port}/request (통계: /stats)", flush=True)
+    web.run_app(mock.make_app(), host=args.host, port=args.port, print=None)
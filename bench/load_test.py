@@ -0,0 +1,177 @@
+"""
+종단 간 부하 테스트: Bright Data 대역 서버(brd_mock.py)를 띄우고 실제 진입점을 그대로 실행
+
+- rocket : coupang_rocket_search.main() - 생성한 키워드 CSV로 키워드 N개 검색
+- main   : main.py - 키워드 하나 검색 후 상세페이지 수집 (표준입력으로 키워드 전달)
+
+동시 요청 수/엔진 조합마다 실행하고 각 실행의 리포트(metrics.py)에서 처리량과 fetch 지연을 모아 표로 출력
+
+    python bench/load_test.py --keywords 300 --concurrency 16,64,128 --latency lognormal:1.2,0.5
+    python bench/load_test.py --entry main --engine async,thread --error-rate 0.05 --rate-limit 30
+"""
+import argparse
+import csv
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from brd_mock import add_mock_arguments
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_mock(args, port):
+    cmd = [
+        sys.executable, os.path.join(BENCH_DIR, "brd_mock.py"), "--port", str(port),
+        "--latency", args.latency, "--error-rate", str(args.error_rate),
+        "--timeout-rate", str(args.timeout_rate), "--hang", str(args.hang),
+        "--rate-limit", str(args.rate_limit), "--fixtures", args.fixtures, "--seed", str(args.seed),
+        "--search-pages", str(args.search_pages),
+    ]
+    if args.burst:
+        cmd += ["--burst", str(args.burst)]
+    if args.cache:
+        cmd += ["--cache", args.cache]
+    proc = subprocess.Popen(cmd)
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("대역 서버가 시작되지 않았습니다")
+
+
+def mock_stats(port):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/stats") as resp:
+        return json.load(resp)
+
+
+def write_keywords_csv(path, count):
+    # load_keywords_from_csv 형식: '키워드' + '브랜드 키워드'(X인 행만 사용)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["키워드", "브랜드 키워드"])
+        for i in range(count):
+            writer.writerow([f"부하테스트{i:04d}", "X"])
+
+
+def run_entry(entry, workdir, env, keyword):
+    """
+    진입점을 하위 프로세스로 실행하고 (경과 시간, 리포트) 반환
+    """
+    if entry == "rocket":
+        cmd = [sys.executable, os.path.join(REPO_DIR, "coupang_rocket_search.py")]
+        stdin = None
+        report_path = os.path.join(workdir, "keywords_run_report.json")
+    else:
+        cmd = [sys.executable, os.path.join(REPO_DIR, "main.py")]
+        stdin = keyword + "\n"
+        report_path = os.path.join(workdir, f"coupang_run_report_{keyword}.json")
+
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=workdir, env=env, input=stdin, text=True, check=True,
+                   stdout=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    with open(report_path, encoding="utf-8") as f:
+        return elapsed, json.load(f)
+
+
+def summarize(entry, engine, concurrency, elapsed, report, stats_delta):
+    fetch = report["stages"].get("fetch", {})
+    counters = report["counters"]
+    pages = fetch.get("count", 0)
+    return {
+        "entry": entry,
+        "engine": engine,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "pages": pages,
+        "pages_per_sec": round(pages / elapsed, 2) if elapsed else 0.0,
+        "fetch_p50": fetch.get("p50", 0.0),
+        "fetch_p95": fetch.get("p95", 0.0),
+        "retries": counters.get("fetch_retries", 0),
+        "failures": counters.get("fetch_failures", 0),
+        "mock_requests": stats_delta.get("requests", 0),
+        "rate_limited": stats_delta.get("rate_limited", 0),
+        "search_pages": counters.get("search_pages", 0),
+        "pages_skipped": counters.get("pages_skipped", 0),
+        "first_pdp_row": report.get("marks", {}).get("first_pdp_row"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bright Data 대역 서버 기반 종단 간 부하 테스트")
+    parser.add_argument("--entry", default="rocket", help="실행할 진입점 (rocket, main; 쉼표로 여러 개)")
+    parser.add_argument("--engine", default="async", help="수집 엔진 (async, thread; 쉼표로 여러 개)")
+    parser.add_argument("--concurrency", default="64", help="async 엔진 동시 요청 수 목록 (쉼표 구분)")
+    parser.add_argument("--keywords", type=int, default=100, help="rocket 진입점에 넣을 키워드 수")
+    parser.add_argument("--keyword", default="부하테스트", help="main.py에 입력할 키워드")
+    parser.add_argument("--pages", type=int, default=1, help="키워드당 최대 검색 페이지 수 (COUPANG_SEARCH_PAGES)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    port = _free_port()
+    mock = start_mock(args, port)
+    rows = []
+    try:
+        for entry in args.entry.split(","):
+            for engine in args.engine.split(","):
+                # thread 엔진은 동시 요청 수 설정을 쓰지 않으므로 한 번만 실행
+                levels = args.concurrency.split(",") if engine == "async" else ["-"]
+                for concurrency in levels:
+                    with tempfile.TemporaryDirectory(prefix="coupang_load_") as workdir:
+                        write_keywords_csv(os.path.join(workdir, "keywords.csv"), args.keywords)
+                        env = dict(
+                            os.environ,
+                            BRD_API_URL=f"http://127.0.0.1:{port}/request",
+                            COUPANG_CACHE_MODE="off",
+                            COUPANG_FETCH_ENGINE=engine,
+                            COUPANG_BASE_DIR=workdir,
+                            COUPANG_INPUT_CSV="keywords.csv",
+                            COUPANG_SEARCH_PAGES=str(args.pages),
+                            COUPANG_LOG_LEVEL=os.getenv("COUPANG_LOG_LEVEL", "WARNING"),
+                        )
+                        if concurrency != "-":
+                            env["COUPANG_CONCURRENCY"] = concurrency
+                        before = mock_stats(port)
+                        elapsed, report = run_entry(entry, workdir, env, args.keyword)
+                        after = mock_stats(port)
+                        delta = {k: after[k] - before.get(k, 0) for k in after if isinstance(after[k], int)}
+                        row = summarize(entry, engine, concurrency, elapsed, report, delta)
+                        rows.append(row)
+                        print(
+                            f"{entry:<7}{engine:<7}c={concurrency:<5} {row['seconds']:>8}s "
+                            f"{row['pages']:>6} pages {row['pages_per_sec']:>8} p/s  "
+                            f"fetch p50 {row['fetch_p50']:.2f}s p95 {row['fetch_p95']:.2f}s  "
+                            f"retry {row['retries']} fail {row['failures']} 429 {row['rate_limited']}  "
+                            f"search {row['search_pages']} skip {row['pages_skipped']}"
+                            + (f"  first PDP {row['first_pdp_row']}s" if row["first_pdp_row"] is not None else ""),
+                            flush=True,
+                        )
+    finally:
+        mock.terminate()
+        mock.wait()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
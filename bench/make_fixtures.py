@@ -0,0 +1,244 @@
+"""
+벤치마크용 HTML 픽스처 생성
+
+1) 기본: crawling_test/의 과거 수집 결과(CSV)로 쿠팡 검색/상세페이지 구조를 재현한 HTML 생성 (항상 같은 결과)
+   python bench/make_fixtures.py
+2) 실제 페이지: HTML 캐시(.html_cache.sqlite3)에 저장된 응답을 그대로 내보내기
+   python bench/make_fixtures.py --from-cache .html_cache.sqlite3 --limit 50
+
+픽스처는 bench/fixtures/{search,pdp}_*.html.gz 로 저장 (gzip 압축, 벤치마크가 그대로 읽음)
+기본 생성에는 백엔드 간 차이가 났던 구조를 담은 상세페이지(PARITY_PDP_PAGES)도 포함
+"""
+import argparse
+import csv
+import glob
+import gzip
+import html
+import os
+import random
+import re
+import sqlite3
+import sys
+import zlib
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from html_cache import page_type  # noqa: E402
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+SOURCE_DIR = os.path.join(REPO_DIR, "crawling_test")
+
+PAGE_SIZE = 36
+SEED = 251031
+
+# rocket_badge.py의 시그니처별 이미지 (배지 없음 포함)
+BADGE_IMAGES = [
+    "https://image.coupangcdn.com/image/badges/falcon/v1/web/rocket_merchant@2x.png?logoRocketMerchant",
+    "https://image.coupangcdn.com/image/badges/falcon/v1/web/rocket-fresh@2x.png",
+    "https://image.coupangcdn.com/image/badges/falcon/v1/web/rocket_install@2x.png",
+    "https://image.coupangcdn.com/image/badges/falcon/v1/web/logo_jikgu@2x.png",
+    "https://image.coupangcdn.com/image/delivery_badge_ext/badge_1a2b3c.png",
+    "https://image.coupangcdn.com/image/cmg/icon/ios/logo_rocket_large@3x.png",
+    "",
+]
+ARRIVALS = ["내일(목) 도착 보장", "모레(금) 도착 예정", "11/14 도착 예정", "", "오늘(수) 도착 보장"]
+
+
+def _read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        return [row for row in reader if row]
+
+
+def _noise(rng, kb):
+    # 실제 페이지처럼 상품과 무관한 스크립트/내비게이션을 덧붙여 파싱 부담을 맞춤
+    parts = []
+    size = 0
+    while size < kb * 1024:
+        n = rng.randint(1, 10 ** 6)
+        block = (
+            f'<script>window.__track_{n}={{"id":{n},"ts":"2025-11-11T21:49:53","ab":["A","B"],'
+            f'"html":"<li class=\\"x\\">{n}</li>"}};</script>'
+            f'<div class="gnb-menu"><ul>' + "".join(
+                f'<li class="gnb-item"><a href="/np/categories/{n + i}">카테고리 {n + i}</a></li>' for i in range(8)
+            ) + "</ul></div>"
+        )
+        parts.append(block)
+        size += len(block)
+    return "".join(parts)
+
+
+def render_search_page(keyword, rows, rng):
+    items = []
+    for rank, (name, price, link, img) in enumerate(rows, 1):
+        href = link.replace("https://www.coupang.com", "")
+        img_src = img.replace("https:", "").replace("700x700ex", "230x230ex") if img else (
+            f"//thumbnail.coupangcdn.com/thumbnails/remote/230x230ex/image/retail/images/{rng.randint(1, 10 ** 9)}.jpg"
+        )
+        # 지연 로딩 이미지는 data-img-src에 실제 주소가 들어 있음
+        img_attr = "data-img-src" if rng.random() < 0.3 else "src"
+        thumb = f'<img class="search-product-wrap-img" {img_attr}="{html.escape(img_src)}" alt="">'
+        badge = rng.choice(BADGE_IMAGES)
+        badge_html = f'<div class="ImageBadge_default__JWaYp"><img src="{badge}" alt=""></div>' if badge else ""
+        arrival = rng.choice(ARRIVALS)
+        arrival_html = f'<div class="fw-leading-[15px]"><span>{arrival}</span></div>' if arrival else ""
+        del_html = ""
+        if rng.random() < 0.4:
+            del_html = f'<del class="PriceInfo_basePrice__8BQ32">{rng.randint(2, 90) * 1000:,}원</del> <span>{rng.randint(5, 60)}%</span>'
+        # 일부 항목은 가격이 없는 리퍼 상품으로 (추출 단계에서 건너뜀)
+        price_html = "" if rng.random() < 0.05 else (
+            f'<div class="PriceArea_priceArea__NntJz"><div>{del_html}</div>'
+            f'<strong class="Price_priceValue__A4KOr">{html.escape(price)}</strong></div>'
+        )
+        rank_html = f'<span class="RankMark_rank{rank}__Qx">{rank}</span>' if rank <= 10 else ""
+        extras = []
+        if rng.random() < 0.6:
+            extras.append('<span class="TextBadge_delivery__x">무료배송</span>')
+        if rng.random() < 0.7:
+            extras.append(
+                '<div class="ProductRating_productRating__jjf7W"><span class="ProductRating_ratingCount__R0Vhz">'
+                f"(<!-- -->{rng.randint(1, 40000)}<!-- -->)</span></div>"
+            )
+        if rng.random() < 0.3:
+            extras.append(
+                f'<div class="BenefitBadge_cash-benefit__SmkrN"><img src="cash.png"> 최대 {rng.randint(10, 3000):,}원 적립</div>'
+            )
+        if rng.random() < 0.08:
+            extras.append(f"<em>{rng.choice(['품절임박', '일시품절'])}</em>")
+        items.append(
+            f'<li class="ProductUnit_productUnit__Qd6sv AdMark_adMark__x" data-id="{rank}">'
+            f'<a href="{html.escape(href)}">'
+            f'<figure class="ProductUnit_productImage__Mqcg1">{thumb}</figure>{rank_html}'
+            f'<div class="ProductUnit_productNameV2__cV9cw">{html.escape(name)}</div>'
+            f"{price_html}{badge_html}{arrival_html}{''.join(extras)}"
+            "</a></li>"
+        )
+    return (
+        f"<!DOCTYPE html><html><head><title>쿠팡! {html.escape(keyword)}</title>{_noise(rng, 60)}</head>"
+        f'<body><div id="wrap"><ul id="product-list" class="ProductList_productList__x">{"".join(items)}</ul>'
+        f"{_noise(rng, 40)}</div></body></html>"
+    )
+
+
+def render_pdp_page(row, rng):
+    _, title, price, _, seller, _, _, description, _ = row
+    desc_items = "".join(f"<li>{html.escape(d)}</li>" for d in description.split(", ") if d)
+    description_html = f'<div class="product-description"><ul>{desc_items}</ul></div>' if desc_items else ""
+    option_html = ""
+    if rng.random() < 0.5:
+        option_html = (
+            '<div class="option-picker-container"><span>수량:</span>'
+            f"<span>{rng.randint(1, 5)}개</span><span>기타</span></div>"
+        )
+    other_sellers = f"<button>새 상품 ({rng.randint(1, 9)})</button>" if rng.random() < 0.3 else ""
+    layout = rng.random()
+    body = (
+        f'<h1 class="product-title"><span>{html.escape(title)}</span></h1>'
+        f'<div class="price-container"><span class="final-price-amount">{html.escape(price)}</span></div>'
+        f'<div class="seller-info"><a href="/vp/vendors/x">{html.escape(seller)}</a></div>'
+        f"{option_html}{other_sellers}"
+    )
+    if layout < 0.6:
+        # 상세정보가 .prod-atf-contents 밖에 있는 경우 (전체 soup 폴백 경로)
+        main = f'<div class="prod-atf-contents">{body}</div>{_noise(rng, 20)}{description_html}'
+    elif layout < 0.9:
+        main = f'<div class="prod-atf-contents">{body}{description_html}</div>'
+    else:
+        # .prod-atf-contents가 없는 구 구조
+        main = f"<div>{body}{description_html}</div>"
+    return (
+        f"<!DOCTYPE html><html><head><title>{html.escape(title)} - 쿠팡!</title>{_noise(rng, 50)}</head>"
+        f'<body><div id="contents">{main}</div>{_noise(rng, 30)}</body></html>'
+    )
+
+
+def _write(name, text):
+    path = os.path.join(FIXTURES_DIR, name + ".html.gz")
+    # mtime=0: 같은 입력이면 같은 파일 (git diff 최소화)
+    with open(path, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+        f.write(text.encode("utf-8"))
+    return path
+
+
+def generate_synthetic(max_search=6, max_pdp=24):
+    rng = random.Random(SEED)
+    written = []
+    for path in sorted(glob.glob(os.path.join(SOURCE_DIR, "coupang_discovery_*.csv"))):
+        keyword = os.path.basename(path)[len("coupang_discovery_"):-len(".csv")]
+        rows = _read_rows(path)
+        for page in range(0, len(rows), PAGE_SIZE):
+            if len(written) >= max_search:
+                break
+            chunk = rows[page:page + PAGE_SIZE]
+            written.append(_write(f"search_{keyword}_{page // PAGE_SIZE + 1}", render_search_page(keyword, chunk, rng)))
+
+    pdp_count = 0
+    for path in sorted(glob.glob(os.path.join(SOURCE_DIR, "coupang_pdp_*.csv"))):
+        for row in _read_rows(path):
+            if pdp_count >= max_pdp:
+                break
+            m = re.search(r"/vp/products/(\d+)", row[-1])
+            pdp_count += 1
+            written.append(_write(f"pdp_{pdp_count:03d}_{m.group(1) if m else 'x'}", render_pdp_page(row, rng)))
+    return written
+
+
+# 백엔드별 추출 결과가 달랐던 구조를 그대로 재현한 상세페이지 (backend_parity.py / parser_bench.py가 함께 읽음)
+# - split_seller: '새 상품'과 판매자 수가 서로 다른 요소에 있는 경우
+# - split_words: '새', '상품', 판매자 수가 모두 서로 다른 요소에 있는 경우
+PARITY_PDP_PAGES = {
+    "pdp_parity_split_seller": (
+        '<!DOCTYPE html><html><head><title>분리된 판매자 수 - 쿠팡!</title></head><body><div id="contents">'
+        '<div class="prod-atf-contents">'
+        '<h1 class="product-title"><span>분리된 판매자 수 상품</span></h1>'
+        '<div class="price-container"><span class="final-price-amount">12,900원</span></div>'
+        '<div class="seller-info"><a href="/vp/vendors/x">테스트 판매자</a></div>'
+        '<div class="other-seller"><span>새 상품</span> <span>(7)</span></div>'
+        "</div></div></body></html>"
+    ),
+    "pdp_parity_split_words": (
+        '<!DOCTYPE html><html><head><title>나뉜 문구 - 쿠팡!</title></head><body><div id="contents">'
+        '<div class="prod-atf-contents">'
+        '<h1 class="product-title"><span>나뉜 문구 상품</span></h1>'
+        '<div class="price-container"><span class="final-price-amount">8,900원</span></div>'
+        '<div class="seller-info"><a href="/vp/vendors/x">테스트 판매자</a></div>'
+        '<div class="other-seller"><span>새</span><span>상품</span> <span>(7)</span></div>'
+        "</div></div></body></html>"
+    ),
+}
+
+
+def write_parity_pages():
+    return [_write(name, page) for name, page in PARITY_PDP_PAGES.items()]
+
+
+def export_from_cache(cache_path, limit):
+    # html_cache.HtmlCache 테이블에서 검색/상세페이지를 그대로 꺼냄
+    conn = sqlite3.connect(cache_path)
+    written = []
+    counts = {"search": 0, "pdp": 0}
+    for key, url, body in conn.execute("SELECT key, url, body FROM pages ORDER BY fetched_at"):
+        ptype = page_type(url)
+        if ptype not in counts or counts[ptype] >= limit:
+            continue
+        counts[ptype] += 1
+        written.append(_write(f"{ptype}_cached_{key[:12]}", zlib.decompress(body).decode("utf-8")))
+    conn.close()
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="벤치마크용 HTML 픽스처 생성")
+    parser.add_argument("--from-cache", help="HTML 캐시(sqlite) 경로 - 지정하면 저장된 실제 응답을 내보냄")
+    parser.add_argument("--limit", type=int, default=50, help="--from-cache 사용 시 종류별 최대 개수")
+    args = parser.parse_args()
+
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    if args.from_cache:
+        files = export_from_cache(args.from_cache, args.limit)
+    else:
+        files = generate_synthetic() + write_parity_pages()
+    print(f"{len(files)}개 픽스처 저장: {FIXTURES_DIR}")
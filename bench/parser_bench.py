@@ -0,0 +1,221 @@
+"""
+오프라인 파서 벤치마크 (네트워크 없음)
+
+bench/fixtures/ 의 저장된 검색/상세페이지 HTML로 아래 세 단계를 측정:
+- search  : search_parser.parse_search_results (coupang_rocket_search.py 경로)
+- listing : search_parser.parse_listing (main.find_list 추출 경로)
+- pdp     : pdp_parser.extract_pdp_row (main.pdp 추출 경로, 백엔드별)
+
+출력: pages/sec, items/sec, 최대 메모리(tracemalloc), 필드별 추출 개수, 결과 digest
+기준값(bench/baseline.json)과 비교해 추출 결과(digest)가 바뀌었거나 최대 메모리가 허용치 이상 늘면 종료 코드 1
+처리량(pages/sec)은 기준값을 기록한 머신에 따라 달라지므로 --check-throughput 을 준 경우에만 비교
+
+    python bench/parser_bench.py                     # 측정 + 기준값 비교 (추출 결과/메모리)
+    python bench/parser_bench.py --check-throughput  # 처리량 저하도 회귀로 판단 (기준값을 기록한 머신에서)
+    python bench/parser_bench.py --update-baseline   # 현재 결과를 기준값으로 저장
+"""
+import argparse
+import gc
+import glob
+import gzip
+import hashlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import search_parser  # noqa: E402
+from pdp_parser import PDP_HEADER, extract_pdp_row  # noqa: E402
+from records import canonical_product_url  # noqa: E402
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+SEARCH_FIELDS = [
+    "rank", "name", "original_price", "final_price", "rocket_badge", "arrival",
+    "free_shipping", "review_count", "points", "stock_status", "link", "img_url",
+]
+LISTING_FIELDS = ["name", "price", "link", "img_url"]
+
+# 허용 처리량 저하 비율 (기준 대비), 최대 메모리 증가 비율
+DEFAULT_TOLERANCE = 0.25
+# 빠른 스위트도 최소 이 시간(초)만큼 반복해 측정 잡음을 줄임
+MIN_MEASURE_SECONDS = 1.0
+
+
+def load_fixtures(kind, fixtures_dir=FIXTURES_DIR):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, f"{kind}_*.html*"))):
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+
+def fixture_url(name):
+    """
+    픽스처 파일 이름(pdp_001_8528523115.html.gz)의 상품 ID로 만든 상세페이지 URL (ID가 없으면 빈 문자열)
+    """
+    parts = name.split(".", 1)[0].split("_")
+    return canonical_product_url(f"/vp/products/{parts[-1]}") if parts[-1].isdigit() else ""
+
+
+def _suites(backends):
+    # (이름, 픽스처 종류, 필드 목록, 페이지 하나 처리 함수(html, url))
+    suites = []
+    for name in backends:
+        be = search_parser.get_backend(name)
+        suites.append((f"search[{name}]", "search", SEARCH_FIELDS,
+                       lambda html, url, be=be: search_parser.parse_search_results(html, be)))
+        suites.append((f"listing[{name}]", "listing", LISTING_FIELDS,
+                       lambda html, url, be=be: search_parser.parse_listing(html, be)))
+        suites.append((f"pdp[{name}]", "pdp", PDP_HEADER,
+                       lambda html, url, be=be: [extract_pdp_row(html, url, backend=be)]))
+    return suites
+
+
+def run_suite(func, pages, fields, repeat):
+    # 결과/필드 통계는 첫 실행에서, 시간은 repeat회 이상(최소 MIN_MEASURE_SECONDS) 반복 중 최솟값 사용
+    field_counts = dict.fromkeys(fields, 0)
+    digest = hashlib.sha1()
+    items = 0
+    pages = [(html, fixture_url(name)) for name, html in pages]
+    for html, url in pages:
+        rows = func(html, url)
+        items += len(rows)
+        for row in rows:
+            for field, value in zip(fields, row):
+                if value not in ("", None, "N"):
+                    field_counts[field] += 1
+            digest.update(json.dumps(list(row), ensure_ascii=False).encode("utf-8"))
+
+    best = None
+    runs = 0
+    measured = 0.0
+    while runs < repeat or measured < MIN_MEASURE_SECONDS:
+        gc.collect()
+        start = time.perf_counter()
+        for html, url in pages:
+            func(html, url)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        runs += 1
+        measured += elapsed
+
+    # 최대 메모리는 추적 오버헤드가 있어 시간 측정과 따로 한 번 실행
+    gc.collect()
+    tracemalloc.start()
+    for html, url in pages:
+        func(html, url)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "pages": len(pages),
+        "items": items,
+        "seconds": round(best, 6),
+        "pages_per_sec": round(len(pages) / best, 2) if best else 0.0,
+        "items_per_sec": round(items / best, 2) if best else 0.0,
+        "peak_mem_kb": round(peak / 1024, 1),
+        "field_counts": field_counts,
+        "digest": digest.hexdigest(),
+    }
+
+
+def compare(results, baseline, tolerance, check_throughput=False):
+    """
+    기준값과 비교해 문제 목록 반환 [(스위트, 내용)] - 추출 결과 변경은 항상, 메모리는 허용치 초과 시 보고
+    처리량은 check_throughput일 때만 비교 (다른 머신에서 기록한 기준값이면 의미 없음)
+    """
+    problems = []
+    for suite, cur in results.items():
+        base = baseline.get(suite)
+        if base is None:
+            continue
+        if cur["digest"] != base["digest"]:
+            changed = {
+                f: (base["field_counts"].get(f), n)
+                for f, n in cur["field_counts"].items()
+                if base["field_counts"].get(f) != n
+            }
+            problems.append((suite, f"추출 결과 변경 (items {base['items']} → {cur['items']}, 필드 {changed or '개수 동일, 값 변경'})"))
+        if check_throughput and cur["pages_per_sec"] < base["pages_per_sec"] * (1 - tolerance):
+            problems.append((suite, f"처리량 저하 {base['pages_per_sec']} → {cur['pages_per_sec']} pages/sec"))
+        if cur["peak_mem_kb"] > base["peak_mem_kb"] * (1 + tolerance):
+            problems.append((suite, f"최대 메모리 증가 {base['peak_mem_kb']} → {cur['peak_mem_kb']} KB"))
+    return problems
+
+
+def available_backends():
+    names = []
+    for name in search_parser.BACKENDS:
+        try:
+            search_parser.get_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def main():
+    available = available_backends()
+    parser = argparse.ArgumentParser(description="오프라인 파서 벤치마크")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="픽스처 디렉터리")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="기준값 JSON 경로")
+    parser.add_argument("--backend", action="append", choices=available, help="측정할 파서 백엔드 (기본: 설치된 전체)")
+    parser.add_argument("--repeat", type=int, default=3, help="시간 측정 반복 횟수 (최솟값 사용)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="허용 처리량 저하/메모리 증가 비율")
+    parser.add_argument("--check-throughput", action="store_true",
+                        help="처리량 저하도 회귀로 판단 (기준값과 같은 머신에서 실행할 때만)")
+    parser.add_argument("--update-baseline", action="store_true", help="현재 결과를 기준값으로 저장")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    pages = {kind: load_fixtures(kind, args.fixtures) for kind in ("search", "pdp")}
+    pages["listing"] = pages["search"]
+    if not pages["search"] and not pages["pdp"]:
+        print(f"픽스처가 없습니다: {args.fixtures} (python bench/make_fixtures.py 로 생성)")
+        return 2
+
+    results = {}
+    print(f"{'suite':<20}{'pages':>6}{'items':>7}{'pages/s':>10}{'items/s':>11}{'peak KB':>10}")
+    for suite, kind, fields, func in _suites(args.backend or available):
+        if not pages[kind]:
+            continue
+        res = run_suite(func, pages[kind], fields, args.repeat)
+        results[suite] = res
+        print(f"{suite:<20}{res['pages']:>6}{res['items']:>7}{res['pages_per_sec']:>10}{res['items_per_sec']:>11}{res['peak_mem_kb']:>10}")
+        print("    " + ", ".join(f"{f}={n}" for f, n in res["field_counts"].items()))
+
+    report = {"python": platform.python_version(), "machine": platform.machine(), "suites": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"기준값 저장: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"기준값 없음: {args.baseline} (--update-baseline 으로 생성)")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)["suites"]
+    problems = compare(results, baseline, args.tolerance, args.check_throughput)
+    for suite, message in problems:
+        print(f"[회귀] {suite}: {message}")
+    if not problems:
+        print("[통과] 기준값 대비 회귀 없음")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
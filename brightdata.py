@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import requote_uri
+
+import html_cache
+import metrics
+import rate_control
+from log_setup import get_logger
+
+log = get_logger("fetch")
+
+# Bright Data API 설정 (환경변수 우선, 없으면 기존 값 사용)
+BRD_API_URL = os.getenv("BRD_API_URL", "https://api.brightdata.com/request")
+BRD_API_TOKEN = os.getenv(
+    "BRD_API_TOKEN",
+    "05aef2b4090457d4596657a92e2cab7ce602375b4d5e90ea0cdf8b49781df158",
+)
+BRD_ZONE = os.getenv("BRD_ZONE", "web_unlocker_251031")
+
+# 커넥션 풀 기본 크기 (동시 요청 수 상한에 맞춤, get_transport(pool_size=...)로 재지정 가능)
+DEFAULT_POOL_SIZE = int(os.getenv("BRD_POOL_SIZE", str(rate_control.MAX_CONCURRENCY)))
+
+# 요청 헤더 (고정값이므로 한 번만 생성)
+HEADERS = {
+    "Content-Type": "application/json",
+    "Authorization": f"Bearer {BRD_API_TOKEN}",
+}
+
+_URL_PLACEHOLDER = "__TARGET_URL__"
+
+
+def _build_payload_template():
+    """
+    payload를 미리 JSON 직렬화해 두고 url 자리만 비워 둠 (요청마다 json.dumps 전체 호출 방지)
+    """
+    payload = {
+        "zone": BRD_ZONE,
+        "url": _URL_PLACEHOLDER,
+        "method": "GET",
+        "format": "raw",
+        "country": "kr",
+        "headers": {
+            "User-Agent": (
+                "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+                "AppleWebKit/537.36 (KHTML, like Gecko) "
+                "Chrome/128.0.0.0 Safari/537.36"
+            ),
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+            "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
+            "Referer": "https://www.coupang.com/",
+            "Upgrade-Insecure-Requests": "1",
+        },
+    }
+    prefix, suffix = json.dumps(payload).split(json.dumps(_URL_PLACEHOLDER))
+    return prefix, suffix
+
+
+_PAYLOAD_PREFIX, _PAYLOAD_SUFFIX = _build_payload_template()
+
+
+def encode_payload(target_url):
+    """
+    대상 URL만 끼워 넣어 요청 본문(JSON 문자열) 생성
+    """
+    return _PAYLOAD_PREFIX + json.dumps(requote_uri(target_url)) + _PAYLOAD_SUFFIX
+
+
+class BrightDataTransport:
+    """
+    keep-alive 커넥션 풀을 공유하는 Bright Data 전송 계층 (여러 스레드에서 동시에 사용 가능)
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE):
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        # pool_block=True: 풀이 가득 차면 새 커넥션을 만들지 않고 반납을 기다림 (TLS 핸드셰이크 재사용)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def fetch_html(self, target_url, retries=3, backoff=5, timeout=60):
+        data = encode_payload(target_url).encode("utf-8")
+        # 동시 요청 수(AIMD)와 초당 요청 수(토큰 버킷)는 프로세스 전체에서 공유
+        limiter = rate_control.get_limiter()
+        bucket = rate_control.get_bucket()
+
+        for attempt in range(1, retries + 1):
+            wait = backoff * attempt  # 지수적 대기
+            limiter.acquire()
+            try:
+                bucket.acquire()
+                started = time.monotonic()
+                start = time.perf_counter()
+                response = self.session.post(BRD_API_URL, data=data, timeout=timeout)
+                response.raise_for_status()
+                elapsed = time.perf_counter() - start
+                limiter.on_success(elapsed, started)
+                metrics.observe("fetch", elapsed)
+                metrics.incr("bytes_received", len(response.content))
+                return response.text
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                error = e
+            except requests.exceptions.HTTPError as e:
+                if e.response is None or e.response.status_code not in rate_control.RETRYABLE_STATUS:
+                    metrics.incr("fetch_errors")
+                    metrics.incr("fetch_failures")
+                    raise
+                # 429/5xx: 속도 제한 또는 일시적 과부하 - 재시도하고 동시 요청 수도 줄임
+                error = e
+                wait = rate_control.retry_after(e.response.headers, wait)
+            finally:
+                limiter.release()
+
+            limiter.on_congestion(started, type(error).__name__)
+            metrics.incr("fetch_errors")
+            log.warning("Bright Data 지연 (시도 %s/%s) - %s", attempt, retries, error)
+            if attempt < retries:
+                metrics.incr("fetch_retries")
+                time.sleep(wait)
+            else:
+                metrics.incr("fetch_failures")
+                raise error
+
+    def close(self):
+        self.session.close()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport(pool_size=None):
+    """
+    프로세스 전체에서 공유하는 전송 계층 반환 (최초 호출 시 pool_size로 생성)
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = BrightDataTransport(pool_size or DEFAULT_POOL_SIZE)
+        return _transport
+
+
+def fetch_html_via_brightdata(target_url, retries=3, backoff=5, timeout=60):
+    # 디스크 캐시 우선 (COUPANG_CACHE_MODE=only이면 네트워크를 쓰지 않음)
+    cache = html_cache.get_cache()
+    if cache is not None:
+        html = cache.get(target_url)
+        if html is not None:
+            return html
+        if cache.mode == "only":
+            raise html_cache.CacheMiss(f"캐시에 없음: {target_url}")
+
+    html = get_transport().fetch_html(target_url, retries=retries, backoff=backoff, timeout=timeout)
+    if cache is not None:
+        cache.put(target_url, html)
+    return html
@@ -0,0 +1,137 @@
+import csv
+import json
+import os
+import threading
+import time
+
+
+class Journal:
+    """
+    작업 단위(키워드, PDP URL 등) 완료 기록 - 한 줄에 JSON 하나씩 추가만 하는 파일
+    - 결과 CSV를 flush/fsync 한 뒤에 기록하므로 journal에 있는 항목은 CSV에도 반드시 있음 (row_writer.py)
+    - 중단(크래시, Ctrl-C) 후 --resume 으로 다시 실행하면 status가 "ok"인 항목은 건너뜀
+    - 마지막 줄이 기록 도중 끊긴 경우 그 줄만 무시
+    - keep_status=False면 이번 실행에서 기록한 항목은 파일에만 남기고 status에 쌓지 않음 (스트리밍 모드)
+    """
+
+    def __init__(self, path, resume=False, keep_status=True):
+        self.path = path
+        self.status = {}
+        self.keep_status = keep_status
+        if resume and os.path.exists(path):
+            self._load()
+        self._lock = threading.Lock()
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self.status[entry["key"]] = entry["status"]
+
+    def is_done(self, key):
+        return self.status.get(key) == "ok"
+
+    def done_keys(self):
+        return {key for key, status in self.status.items() if status == "ok"}
+
+    def mark(self, key, status="ok", **extra):
+        """
+        항목 완료 기록 (결과 CSV는 호출 전에 디스크에 반영되어 있어야 함 - row_writer.RowWriter가 처리)
+        """
+        self.mark_many([(key, status, extra)])
+
+    def mark_many(self, entries, sync=True):
+        """
+        여러 항목 [(key, status, extra), ...]을 한 번에 기록 (sync면 fsync 한 번)
+        """
+        now = round(time.time(), 3)
+        lines = "".join(
+            json.dumps({"key": key, "status": status, "ts": now, **extra}, ensure_ascii=False) + "\n"
+            for key, status, extra in entries
+        )
+        with self._lock:
+            self._file.write(lines)
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+            if self.keep_status:
+                for key, status, _ in entries:
+                    self.status[key] = status
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def journal_path(output_path):
+    return output_path + ".journal"
+
+
+def open_output_csv(path, header, resume=False):
+    """
+    결과 CSV 열기: resume이면 이어쓰기(비어 있을 때만 헤더 기록), 아니면 새로 작성
+    """
+    append = resume and os.path.exists(path) and os.path.getsize(path) > 0
+    f = open(path, "a" if append else "w", encoding="utf-8", newline="")
+    if not append:
+        csv.writer(f).writerow(header)
+        f.flush()
+    return f
+
+
+def drop_rows(path, drop):
+    """
+    기존 결과 CSV에서 drop(row)가 참인 행을 지우고 다시 씀 (헤더 유지, 지운 행 수 반환)
+    임시 파일에 쓴 뒤 교체하므로 도중에 중단되어도 원래 파일은 그대로
+    """
+    if not os.path.exists(path):
+        return 0
+    tmp_path = path + ".tmp"
+    dropped = 0
+    with open(path, encoding="utf-8", newline="") as src, open(tmp_path, "w", encoding="utf-8", newline="") as dst:
+        reader = csv.reader(src)
+        writer = csv.writer(dst)
+        header = next(reader, None)
+        if header is not None:
+            writer.writerow(header)
+        for row in reader:
+            if row and drop(row):
+                dropped += 1
+                continue
+            writer.writerow(row)
+        dst.flush()
+        os.fsync(dst.fileno())
+    if dropped:
+        os.replace(tmp_path, path)
+    else:
+        os.remove(tmp_path)
+    return dropped
+
+
+def iter_column(path, column, skip=None):
+    """
+    기존 결과 CSV에서 column 값을 파일 순서대로 한 줄씩 읽기 (빈 값, skip(row)가 참인 행 제외, 중복은 그대로)
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header or column not in header:
+            return
+        idx = header.index(column)
+        for row in reader:
+            if len(row) > idx and row[idx] and not (skip and skip(row)):
+                yield row[idx]
+
+
+def read_column(path, column, skip=None):
+    """
+    기존 결과 CSV에서 column 값을 파일 순서대로 읽기 (중복/빈 값, skip(row)가 참인 행 제외)
+    journal 기록 직전에 중단된 항목 보완, 이전 단계 결과 재사용에 사용
+    """
+    return list(dict.fromkeys(iter_column(path, column, skip)))
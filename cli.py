@@ -0,0 +1,86 @@
+"""
+쿠팡 수집 도구 통합 CLI
+
+    python cli.py search [키워드] [--resume] [--output-dir DIR]       검색 결과 + 상세페이지 (main.py)
+    python cli.py pdp LINKS_CSV [--column Link] [--keyword KW] ...    CSV의 링크들의 상세페이지만
+    python cli.py rocket [--input CSV] [--output-dir DIR] [--resume]  키워드별 로켓 검색 결과 (coupang_rocket_search.py)
+    python cli.py convert --input XLSX [--output CSV] [--sheet 0]     XLSX → CSV (excel_to_csv.py)
+
+수집 설정(동시 요청 수, 파서 백엔드, 캐시, 출력 형식 등)은 기존처럼 COUPANG_* 환경변수로 지정
+"""
+import argparse
+import os
+import sys
+
+
+# 하위 명령의 모듈(aiohttp/bs4/pandas 등)은 실행할 때만 import - 도움말과 인자 오류는 바로 출력
+
+
+def _search(args):
+    import main as crawler
+
+    keyword = args.keyword if args.keyword is not None else input("Enter product: ")
+    crawler.run(keyword, resume=args.resume, output_dir=args.output_dir)
+
+
+def _pdp(args):
+    import main as crawler
+
+    keyword = args.keyword or os.path.splitext(os.path.basename(args.links_csv))[0]
+    crawler.run(keyword, resume=args.resume, links_csv=args.links_csv, link_column=args.column,
+                output_dir=args.output_dir)
+
+
+def _rocket(args):
+    import coupang_rocket_search
+
+    coupang_rocket_search.main(resume=args.resume, input_csv=args.input, output_dir=args.output_dir)
+
+
+def _convert(args):
+    from excel_to_csv import default_output_path, excel_to_csv
+
+    # sheet이 숫자 문자열이면 인덱스, 아니면 시트 이름
+    sheet = int(args.sheet) if args.sheet.isdigit() else args.sheet
+    excel_to_csv(args.input, args.output or default_output_path(args.input), sheet)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="쿠팡 검색 결과/상세페이지 수집 도구")
+    commands = parser.add_subparsers(dest="command", metavar="command", required=True)
+
+    search = commands.add_parser("search", help="키워드 검색 결과 + 상세페이지 수집")
+    search.add_argument("keyword", nargs="?", help="검색 키워드 (없으면 입력받음)")
+    search.add_argument("--resume", action="store_true", help="중단된 실행 이어하기 (수집된 검색 결과 재사용, 완료된 PDP URL 건너뜀)")
+    search.add_argument("--output-dir", default=".", help="결과 CSV/리포트 저장 폴더 (기본: 현재 폴더)")
+    search.set_defaults(func=_search)
+
+    pdp = commands.add_parser("pdp", help="CSV에 있는 상품 링크들의 상세페이지만 수집")
+    pdp.add_argument("links_csv", help="상품 링크가 있는 CSV (예: search의 coupang_discovery_키워드.csv)")
+    pdp.add_argument("--column", default="Link", help="링크 컬럼 이름 (기본: Link)")
+    pdp.add_argument("--keyword", help="결과 파일 이름/결과 행의 키워드 (기본: CSV 파일 이름)")
+    pdp.add_argument("--resume", action="store_true", help="중단된 실행 이어하기 (완료된 PDP URL 건너뜀)")
+    pdp.add_argument("--output-dir", default=".", help="결과 CSV/리포트 저장 폴더 (기본: 현재 폴더)")
+    pdp.set_defaults(func=_pdp)
+
+    rocket = commands.add_parser("rocket", help="키워드 CSV의 키워드별 로켓 검색 결과 수집")
+    rocket.add_argument("--input", help="키워드 CSV ('브랜드', '키워드' 컬럼, 기본: $COUPANG_BASE_DIR/$COUPANG_INPUT_CSV)")
+    rocket.add_argument("--output-dir", help="결과/요약 CSV 저장 폴더 (기본: 입력 CSV와 같은 폴더)")
+    rocket.add_argument("--resume", action="store_true", help="중단된 실행 이어하기 (완료된 키워드 건너뜀, 결과 CSV에 이어쓰기)")
+    rocket.set_defaults(func=_rocket)
+
+    convert = commands.add_parser("convert", help="XLSX → CSV 변환 (셀 내부 개행 제거)")
+    convert.add_argument("--input", required=True, help="입력 XLSX 경로")
+    convert.add_argument("--output", help="출력 CSV 경로 (기본: 입력과 같은 이름의 .csv)")
+    convert.add_argument("--sheet", default="0", help="시트 이름 또는 인덱스 (기본: 0 = 첫 시트)")
+    convert.set_defaults(func=_convert)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(sys.argv[1:] if argv is None else argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import glob
+import os
+
+from log_setup import get_logger
+from records import parse_int, parse_won
+
+log = get_logger("writer")
+
+# Parquet(Arrow) 출력: "on"이면 결과 CSV와 함께 같은 이름의 .parquet 파일도 작성 (pyarrow 필요)
+# CSV는 이어하기(journal)의 기준이므로 항상 작성하고, Parquet은 분석용 추가 출력
+PARQUET = os.getenv("COUPANG_PARQUET", "off")
+# 행 그룹 크기 (이만큼 모이면 수집 도중에 행 그룹 하나를 기록), 압축 방식
+ROW_GROUP_SIZE = int(os.getenv("COUPANG_PARQUET_ROW_GROUP", "10000"))
+COMPRESSION = os.getenv("COUPANG_PARQUET_COMPRESSION", "zstd")
+
+
+def _schema(name):
+    """
+    결과 종류별 Arrow 스키마 (키워드/배지/판매자 등 반복되는 값은 dictionary 인코딩)
+    """
+    import pyarrow as pa
+
+    category = pa.dictionary(pa.int32(), pa.string())
+    if name == "results":
+        return pa.schema([
+            ("키워드", category),
+            ("순위", pa.int32()),
+            ("상품명", pa.string()),
+            ("원가", pa.int64()),
+            ("최종가격", pa.int64()),
+            ("로켓배지", category),
+            ("도착일", pa.string()),
+            ("도착예정일", pa.date32()),
+            ("무료배송", pa.bool_()),
+            ("리뷰수", pa.int32()),
+            ("포인트", pa.int64()),
+            ("재고현황", category),
+            ("링크", pa.string()),
+            ("이미지URL", pa.string()),
+        ])
+    if name == "pdp":
+        return pa.schema([
+            ("키워드", category),
+            ("브랜드", category),
+            ("제품명", pa.string()),
+            ("현재 판매가", pa.int64()),
+            ("회원 할인가", pa.int64()),
+            ("판매자", category),
+            ("다른 판매자", pa.int32()),
+            ("옵션", pa.string()),
+            ("상세정보", pa.string()),
+            ("URL", pa.string()),
+        ])
+    raise ValueError(f"알 수 없는 Parquet 스키마: {name}")
+
+
+def search_item_values(record):
+    """
+    (키워드, records.SearchItem) → results 스키마 순서의 값
+    """
+    kw, item = record
+    return (
+        kw, item.rank, item.name, item.original_price, item.final_price, item.badge.value,
+        item.arrival, item.arrival_date, item.free_shipping, item.review_count, item.points,
+        item.stock_status, item.link, item.img_url,
+    )
+
+
+def pdp_values(record):
+    """
+    (키워드, pdp_parser.extract_pdp_row의 9개 문자열 필드) → pdp 스키마 순서의 값
+    """
+    kw, row = record
+    brand, title, sale_price, coupon_price, seller, other_sellers, option, description, url = row
+    return (
+        kw, brand, title, parse_won(sale_price), parse_won(coupon_price), seller,
+        parse_int(other_sellers), option, description, url,
+    )
+
+
+def part_path(path, resume=False):
+    """
+    이어하기면 기존 Parquet 파일은 두고 다음 번호 파일 사용 (name.parquet → name.1.parquet ...)
+    Parquet은 닫을 때 footer를 쓰므로 기존 파일에 이어쓸 수 없음
+    새로 실행하면 CSV처럼 기존 파일을 덮어쓰고 이전 실행의 번호 파일은 삭제
+    """
+    base, ext = os.path.splitext(path)
+    parts = sorted(glob.glob(f"{glob.escape(base)}.[0-9]*{ext}"))
+    if not resume:
+        for old in parts:
+            os.remove(old)
+        return path
+    if not os.path.exists(path):
+        return path
+    n = 1
+    while os.path.exists(f"{base}.{n}{ext}"):
+        n += 1
+    return f"{base}.{n}{ext}"
+
+
+_CONVERTERS = {"results": search_item_values, "pdp": pdp_values}
+
+
+class ParquetSink:
+    """
+    RowWriter용 Parquet 출력 - 행을 열 단위로 모았다가 ROW_GROUP_SIZE마다 행 그룹으로 기록
+    write_rows에는 (키워드, SearchItem) 또는 (키워드, PDP 행)을 넘기고 스키마에 맞게 변환
+    (RowWriter의 쓰기 스레드에서만 호출되므로 잠금 없음)
+    """
+
+    def __init__(self, path, schema_name, resume=False, row_group_size=ROW_GROUP_SIZE, compression=COMPRESSION):
+        import pyarrow.parquet as pq
+
+        self.path = part_path(path, resume)
+        self.schema = _schema(schema_name)
+        self._values = _CONVERTERS[schema_name]
+        self.row_group_size = max(1, row_group_size)
+        self._columns = [[] for _ in self.schema]
+        self._rows = 0
+        dictionary_columns = [f.name for f in self.schema if str(f.type).startswith("dictionary")]
+        self._writer = pq.ParquetWriter(self.path, self.schema, compression=compression,
+                                        use_dictionary=dictionary_columns)
+
+    def write_rows(self, rows):
+        for record in rows:
+            for column, value in zip(self._columns, self._values(record)):
+                column.append(value)
+        self._rows += len(rows)
+        if self._rows >= self.row_group_size:
+            self._write_group()
+
+    def _write_group(self):
+        import pyarrow as pa
+
+        if not self._rows:
+            return
+        arrays = []
+        for field, values in zip(self.schema, self._columns):
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, type=field.type.value_type).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self._columns = [[] for _ in self.schema]
+        self._rows = 0
+
+    def close(self):
+        self._write_group()
+        self._writer.close()
+        log.info("Parquet 저장: %s", self.path)
+
+
+def open_sink(csv_path, schema_name, resume=False):
+    """
+    PARQUET이 "on"이면 CSV 경로 옆(.parquet)에 ParquetSink를 열어 반환, 아니면 None
+    """
+    if PARQUET != "on":
+        return None
+    return ParquetSink(os.path.splitext(csv_path)[0] + ".parquet", schema_name, resume)
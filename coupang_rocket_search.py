@@ -1,23 +1,33 @@
-from bs4 import BeautifulSoup
 import requests
 import csv
+import itertools
 import warnings
-import time
-import json
 from urllib.parse import quote
 from datetime import datetime
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
-
-# 경고 무시 (urllib3 InsecureRequestWarning 등)
-warnings.filterwarnings(
-    "ignore", category=requests.packages.urllib3.exceptions.InsecureRequestWarning
-)
-
-# 전역 설정
-BASE_DIR = "/Users/hakyeongkim/Desktop/Coupang_crawling"
-DEFAULT_INPUT_CSV_FILE = "Discovery_헤어액세서리_20251112214121.csv"
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import brightdata
+import checkpoint
+import columnar
+import metrics
+import paging
+import parse_pool
+import rate_control
+import result_store
+import streaming
+from row_writer import RowWriter
+from async_fetch import DEFAULT_CONCURRENCY
+# 검색 결과 파싱은 파서 백엔드 모듈(search_parser.py)에서 수행 (COUPANG_PARSER로 bs4/selectolax 선택)
+from search_parser import search_page_items
+from log_setup import get_logger, setup_logging
+
+log = get_logger("rocket")
+
+# 입력 CSV 기본값 (cli.py rocket --input을 주지 않았을 때 BASE_DIR/DEFAULT_INPUT_CSV_FILE, 환경변수로 재정의 가능)
+BASE_DIR = os.getenv("COUPANG_BASE_DIR", ".")
+DEFAULT_INPUT_CSV_FILE = os.getenv("COUPANG_INPUT_CSV", "Discovery_헤어액세서리_20251112214121.csv")
 
 # CSV 헤더 정의
 RESULTS_CSV_HEADER = [
@@ -30,355 +40,90 @@ SUMMARY_CSV_HEADER = [
     "키워드", "평균최종가격", "로켓배지개수", "평균리뷰수", "상품개수"
 ]
 
-# Bright Data API 설정 (main.py 스타일 재사용)
-BRD_API_URL = "https://api.brightdata.com/request"
-# 환경변수 우선, 없으면 기존 값 사용
-BRD_API_TOKEN = os.getenv(
-    "BRD_API_TOKEN",
-    "05aef2b4090457d4596657a92e2cab7ce602375b4d5e90ea0cdf8b49781df158",
-)
-BRD_ZONE = os.getenv("BRD_ZONE", "web_unlocker_251031")
+# 검색 실패 키워드의 결과 행에 들어가는 상품명 (이어하기 시 완료 키워드에서 제외)
+ERROR_ROW_NAME = "데이터를 못 받아 왔습니다"
+
+# Bright Data API 설정은 공용 전송 계층(brightdata.py)에서 관리 (환경변수 BRD_API_TOKEN, BRD_ZONE)
+
+# 수집 엔진: "async"(asyncio, 코루틴 기반) 또는 "thread"(기존 ThreadPoolExecutor)
+FETCH_ENGINE = os.getenv("COUPANG_FETCH_ENGINE", "async")
+# thread 엔진의 워커 수 = 동시 요청 수 상한 (실제 동시 요청 수와 초당 요청 수는 rate_control이 조정)
+MAX_WORKERS = rate_control.MAX_CONCURRENCY
 
 
 def fetch_html_via_brightdata(target_url, retries=3, backoff=5):
-    encoded_url = requests.utils.requote_uri(target_url)
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {BRD_API_TOKEN}",
-    }
-    payload = {
-        "zone": BRD_ZONE,
-        "url": encoded_url,
-        "method": "GET",
-        "format": "raw",
-        "country": "kr",
-        "headers": {
-            "User-Agent": (
-                "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/128.0.0.0 Safari/537.36"
-            ),
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-            "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
-            "Referer": "https://www.coupang.com/",
-            "Upgrade-Insecure-Requests": "1",
-        },
-    }
-
-    for attempt in range(1, retries + 1):
-        try:
-            response = requests.post(
-                BRD_API_URL, headers=headers, data=json.dumps(payload), timeout=30
-            )
-            response.raise_for_status()
-            return response.text
-        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
-            print(f"[경고] Bright Data 지연 (시도 {attempt}/{retries}) - {e}")
-            if attempt < retries:
-                time.sleep(backoff * attempt)
-            else:
-                raise
-
-
-def parse_search_results(html):
+    # 공용 전송 계층(keep-alive 커넥션 풀) 사용, 검색 페이지는 30초 타임아웃
+    return brightdata.fetch_html_via_brightdata(target_url, retries=retries, backoff=backoff, timeout=30)
+
+
+def build_search_url(keyword, page=1):
+    encoded_keyword = quote(keyword, safe="")
+    searchProductListSize = paging.PAGE_SIZE
+    return f"https://www.coupang.com/np/search?component=&q={encoded_keyword}&page={page}&listSize={searchProductListSize}"
+
+
+def parse_search_page(kw, page, html, error, pages, wait=True):
     """
-    Coupang 검색결과에서 최대 36개 항목을 확장 파싱
-    반환: [rank, name, original_price, final_price, rocket_badge, arrival, free_shipping, review_count, points, stock_status, link, img_url]
+    검색 페이지 하나를 파싱해 pages[page]에 저장하고 다음 페이지가 필요한지 반환
+    - 한 페이지 크기(36개)보다 적게 나오면 마지막 페이지
+    - 1페이지 실패는 예외, 이후 페이지 실패는 그 전 페이지까지의 결과만 사용
+    - 파싱 프로세스 풀(COUPANG_PARSE_POOL=on)이 있으면 워커 프로세스에서 파싱
+      wait=False면 결과 대신 코루틴을 반환 (asyncio 엔진: 파싱하는 동안 이벤트 루프는 다른 요청 처리)
     """
-    soup = BeautifulSoup(html, "html.parser")
+    if error is not None:
+        if page == 1:
+            raise error
+        log.warning("[키워드] %s - %s페이지 가져오기 실패, 이전 페이지까지만 사용: %s", kw, page, error)
+        return False
+    pool = parse_pool.get_pool()
+    if pool is None:
+        with metrics.timer("parse_search"):
+            parsed = search_page_items(html)
+        return store_search_page(page, parsed, pages)
+    if wait:
+        return store_search_page(page, pool.run("parse_search", search_page_items, html), pages)
+
+    async def _parse():
+        return store_search_page(page, await pool.run_async("parse_search", search_page_items, html), pages)
+
+    return _parse()
+
+
+def store_search_page(page, parsed, pages):
+    """
+    파싱 결과 (SearchItem 목록, 페이지 전체 항목 수)를 pages[page]에 저장하고 다음 페이지가 필요한지 반환
+    """
+    items, total = parsed
+    pages[page] = items
+    metrics.incr("search_pages")
+    return total >= paging.PAGE_SIZE
 
-    # 신 구조 우선
-    items = soup.select("#product-list .ProductUnit_productUnit__Qd6sv")
-    if not items:
-        # 폴백 선택자
-        items = soup.select("[class*=search-product], .baby-product, .search-product-wrap, li[class*=product]")
 
+def merge_pages(pages):
+    """
+    페이지별 결과를 페이지 순서대로 합침
+    """
     results = []
-    for idx, item in enumerate(items, start=1):
-        # 이름
-        name_node = item.select_one(".ProductUnit_productNameV2__cV9cw") or item.select_one(".name")
-
-        # 가격 영역
-        import re
-        price_container = item.select_one(".PriceArea_priceArea__NntJz")
-        original_price = ""
-        final_price = ""
-        if price_container:
-            # 원가 <del>
-            del_node = price_container.select_one("del")
-            if del_node:
-                m = re.search(r"([0-9][0-9,\.]+)\s*원?", del_node.get_text(" ", strip=True))
-                if m:
-                    original_price = m.group(1) + "원"
-            # 최종가: 컨테이너 전체 텍스트에서 금액 패턴들 추출 후 마지막 항목(보통 최종가)을 사용
-            all_txt = price_container.get_text(" ", strip=True)
-            amounts = re.findall(r"([0-9][0-9,\.]+)\s*원", all_txt)
-            if amounts:
-                final_price = amounts[-1] + "원"
-            # 구 구조 폴백
-            if not final_price:
-                price_node = price_container.select_one(".price-value")
-                if price_node:
-                    m = re.search(r"([0-9][0-9,\.]+)\s*원?", price_node.get_text(" ", strip=True))
-                    if m:
-                        final_price = m.group(1) + "원"
-        else:
-            # 구 구조 폴백
-            price_node = item.select_one(".price-value")
-            if price_node:
-                txt = price_node.get_text(" ", strip=True)
-                m = re.search(r"([0-9][0-9,\.]+)\s*원?", txt)
-                if m:
-                    final_price = m.group(1) + "원"
-        if not final_price and not original_price:
-            # 가격 전혀 없으면 스킵
-            continue
-
-        # 링크
-        a_tag = item.select_one("a")
-        href = a_tag.get("href") if a_tag else None
-        link = f"https://www.coupang.com{href}" if href and href.startswith("/") else (href or "")
-
-        # 썸네일
-        thumb = item.select_one(".search-product-wrap-img")
-        if thumb and thumb.get("data-img-src"):
-            img_url = f"https:{thumb.get('data-img-src')}"
-        elif thumb and thumb.get("src"):
-            img_url = f"https:{thumb.get('src')}"
-        else:
-            img_url = ""
-        img_url = img_url.replace("230x230ex", "700x700ex")
-
-        # 랭킹
-        rank = ""
-        rank_node = item.select_one("[class*=RankMark_rank]")
-        if rank_node:
-            r = re.search(r"\d+", rank_node.get_text(" ", strip=True))
-            if r:
-                rank = r.group(0)
-        if not rank:
-            # 링크의 rank 파라미터 폴백
-            if href:
-                r = re.search(r"[?&]rank=(\d+)", href)
-                if r:
-                    rank = r.group(1)
-
-        # 로켓 배지 감지 (기존 로직 + 새 로직 병행)
-        rocket_badge = ""
-        name_text = "" if not name_node else name_node.get_text(strip=True)
-        
-        # 모든 img 태그 수집
-        all_imgs = item.select("img")
-        debug_srcs = []
-        for img in all_imgs:
-            src_val = img.get("src") or img.get("data-src") or ""
-            if src_val:
-                debug_srcs.append(src_val)
-        
-        # ===== 기존 로직 (단순 img 태그 검색) =====
-        print(f"[DEBUG 배지] 기존 로직 시작 - 상품: {name_text[:30]}... (img 개수: {len(all_imgs)})")
-        for img in all_imgs:
-            src = (img.get("src") or "") + (img.get("data-src") or "")
-            if not src:
-                continue
-            # 기존 로직: 단순 키워드 매칭 (순서: 판매자로켓 > 로켓프레시 > 로켓설치 > 로켓직구 > 로켓배송)
-            if "logoRocketMerchant" in src or "badge_199559e56f7" in src:
-                rocket_badge = "판매자로켓"
-                print(f"[DEBUG 배지] 기존 로직 → 판매자로켓 감지 (src: {src[:100]})")
-                break  # 판매자로켓은 우선 처리
-            if "rocket-fresh" in src:
-                rocket_badge = "로켓프레시"
-                print(f"[DEBUG 배지] 기존 로직 → 로켓프레시 감지 (src: {src[:100]})")
-            if "rocket_install" in src:
-                rocket_badge = "로켓설치"
-                print(f"[DEBUG 배지] 기존 로직 → 로켓설치 감지 (src: {src[:100]})")
-            if "logo_jikgu" in src:
-                rocket_badge = "로켓직구"
-                print(f"[DEBUG 배지] 기존 로직 → 로켓직구 감지 (src: {src[:100]})")
-            # 로켓배송은 마지막에 체크 (다른 배지가 없을 때만, badge_199559e56f7 제외)
-            if not rocket_badge and ("logo_rocket" in src or ("delivery_badge_ext" in src and "badge_199559e56f7" not in src) or ("badge_" in src and "badge_199559e56f7" not in src)):
-                rocket_badge = "로켓배송"
-                print(f"[DEBUG 배지] 기존 로직 → 로켓배송 감지 (src: {src[:100]})")
-                break
-        
-        # ===== 새 로직 (ImageBadge 컨테이너 기반) =====
-        if not rocket_badge:
-            print(f"[DEBUG 배지] 새 로직 시작 - 상품: {name_text[:30]}...")
-            # 우선 ImageBadge 영역에서 찾기
-            badge_container = item.select_one(".ImageBadge_default__JWaYp")
-            if badge_container:
-                badge_img = badge_container.select_one("img")
-                if badge_img:
-                    src = (badge_img.get("src") or "") + (badge_img.get("data-src") or "")
-                    print(f"[DEBUG 배지] ImageBadge 발견 - 상품: {name_text[:30]}... src: {src[:100]}")
-                    # 순서: 판매자로켓 > 로켓프레시 > 로켓설치 > 로켓직구 > 로켓배송
-                    if "logoRocketMerchant" in src or "RocketMerchant" in src or "badge_199559e56f7" in src:
-                        rocket_badge = "판매자로켓"
-                        print(f"[DEBUG 배지] 새 로직 → 판매자로켓 감지")
-                    elif "rocket-fresh" in src or "rocket_fresh" in src:
-                        rocket_badge = "로켓프레시"
-                        print(f"[DEBUG 배지] 새 로직 → 로켓프레시 감지")
-                    elif "rocket_install" in src or "rocket-install" in src:
-                        rocket_badge = "로켓설치"
-                        print(f"[DEBUG 배지] 새 로직 → 로켓설치 감지")
-                    elif "logo_jikgu" in src or "jikgu" in src:
-                        rocket_badge = "로켓직구"
-                        print(f"[DEBUG 배지] 새 로직 → 로켓직구 감지")
-                    elif "logo_rocket" in src or "logo_rocket_large" in src or ("delivery_badge_ext" in src and "badge_199559e56f7" not in src) or ("badge_" in src and "badge_199559e56f7" not in src):
-                        rocket_badge = "로켓배송"
-                        print(f"[DEBUG 배지] 새 로직 → 로켓배송 감지")
-                    else:
-                        print(f"[DEBUG 배지] 새 로직 → 배지 타입 미확인 (src: {src[:100]})")
-            else:
-                print(f"[DEBUG 배지] ImageBadge 컨테이너 없음 - 상품: {name_text[:30]}...")
-            
-            # ImageBadge에서 못 찾으면 전체 img 태그에서 검색 (폴백)
-            if not rocket_badge:
-                print(f"[DEBUG 배지] 새 로직 폴백 검색 시작 - 상품: {name_text[:30]}... (img 개수: {len(all_imgs)})")
-                for img in all_imgs:
-                    src = (img.get("src") or "") + (img.get("data-src") or "")
-                    if not src:
-                        continue
-                    # 우선순위: 판매자로켓 > 로켓프레시 > 로켓설치 > 로켓직구 > 로켓배송
-                    if "logoRocketMerchant" in src or "RocketMerchant" in src or "badge_199559e56f7" in src:
-                        rocket_badge = "판매자로켓"
-                        print(f"[DEBUG 배지] 새 로직 폴백 → 판매자로켓 감지 (src: {src[:100]})")
-                        break  # 판매자로켓은 우선 처리
-                    elif ("rocket-fresh" in src or "rocket_fresh" in src) and not rocket_badge:
-                        rocket_badge = "로켓프레시"
-                        print(f"[DEBUG 배지] 새 로직 폴백 → 로켓프레시 감지 (src: {src[:100]})")
-                    elif ("rocket_install" in src or "rocket-install" in src) and not rocket_badge:
-                        rocket_badge = "로켓설치"
-                        print(f"[DEBUG 배지] 새 로직 폴백 → 로켓설치 감지 (src: {src[:100]})")
-                    elif ("logo_jikgu" in src or "jikgu" in src) and not rocket_badge:
-                        rocket_badge = "로켓직구"
-                        print(f"[DEBUG 배지] 새 로직 폴백 → 로켓직구 감지 (src: {src[:100]})")
-                    # 로켓배송은 마지막에 체크 (다른 배지가 없을 때만, badge_199559e56f7 제외)
-                    elif not rocket_badge and ("logo_rocket" in src or "logo_rocket_large" in src or ("delivery_badge_ext" in src and "badge_199559e56f7" not in src) or ("badge_" in src and "badge_199559e56f7" not in src)):
-                        rocket_badge = "로켓배송"
-                        print(f"[DEBUG 배지] 새 로직 폴백 → 로켓배송 감지 (src: {src[:100]})")
-                        break
-        
-        if not rocket_badge:
-            print(f"[DEBUG 배지] 배지 없음 - 상품: {name_text[:30]}... (전체 img src: {debug_srcs[:3]})")
-        else:
-            print(f"[DEBUG 배지] 최종 배지: {rocket_badge} - 상품: {name_text[:30]}...")
-
-        # 도착일/도착보장
-        arrival = ""
-        # .fw-leading-[15px] 클래스를 가진 요소에서 도착 정보 추출 (CSS 특수문자 포함 → regex 사용)
-        arrival_containers = item.find_all(
-            lambda tag: tag.has_attr("class")
-            and any(re.search(r"fw-leading-\[15px\]", cls) for cls in tag["class"])
-        )
-        for container in arrival_containers:
-            container_text = container.get_text(" ", strip=True)
-            # "도착 예정" 또는 "도착 보장"이 포함된 경우
-            if "도착 예정" in container_text or "도착 보장" in container_text:
-                arrival = container_text
-                break
-        
-        # 위 방법으로 못 찾으면 기존 방법 시도
-        if not arrival:
-            arrival_node = item.find(string=re.compile(r"(도착 예정|도착 보장)"))
-            if arrival_node:
-                # 부모 요소에서 전체 텍스트 추출 (날짜 포함)
-                parent = arrival_node.parent
-                if parent:
-                    arrival = parent.get_text(" ", strip=True)
-                else:
-                    arrival = arrival_node.strip()
-        
-        # 여전히 못 찾으면 전체 텍스트에서 패턴 검색
-        if not arrival:
-            txt = item.get_text(" ", strip=True)
-            # 다양한 패턴: "12/1 도착 예정", "모레(금) 도착 예정", "내일(목) 도착 보장" 등
-            m = re.search(r"([0-9]{1,2}/[0-9]{1,2}|모레\([^)]+\)|내일\([^)]+\)|[가-힣]+\([^)]+\))\s*도착\s*(예정|보장)", txt)
-            if m:
-                arrival = m.group(0)
-            else:
-                # 간단한 패턴
-                m = re.search(r"(도착\s*예정|도착\s*보장)", txt)
-                if m:
-                    arrival = m.group(0)
-
-        # 무료배송
-        free_shipping = "무료배송" if item.find(string=re.compile(r"무료배송")) else ""
-
-        # 리뷰수
-        review_count = ""
-        rc_node = item.select_one(".ProductRating_ratingCount__R0Vhz")
-        if rc_node:
-            # HTML 주석이 포함된 경우를 대비해 여러 방법 시도
-            # 방법 1: get_text()로 추출
-            rc_text = rc_node.get_text(" ", strip=True)
-            m = re.search(r"\((\d+)\)", rc_text)
-            if m:
-                review_count = m.group(1)
-            else:
-                # 방법 2: HTML 문자열에서 직접 추출 (주석 포함)
-                rc_html = str(rc_node)
-                m = re.search(r"\([^)]*?(\d+)[^)]*?\)", rc_html)
-                if m:
-                    review_count = m.group(1)
-                else:
-                    # 방법 3: 모든 숫자 찾기
-                    all_numbers = re.findall(r"\d+", rc_text)
-                    if all_numbers:
-                        review_count = all_numbers[0]
-
-        # 포인트 적립
-        points = ""
-        points_node = item.select_one(".BenefitBadge_cash-benefit__SmkrN")
-        if points_node:
-            pts_txt = points_node.get_text(" ", strip=True)
-            m = re.search(r"([0-9][0-9,\.]+)\s*원\s*적립", pts_txt)
-            if m:
-                points = m.group(1) + "원"
-            else:
-                points = pts_txt
-
-        # 재고/품절 현황
-        stock_status = ""
-        # 예: '품절임박', '일시품절', '일부 옵션 품절' 등 텍스트 탐색
-        status_text = item.get_text(" ", strip=True)
-        if "품절임박" in status_text:
-            stock_status = "품절임박"
-        elif "품절" in status_text:
-            stock_status = "품절"
-
-        name_text = "" if not name_node else name_node.get_text(strip=True)
-        results.append([
-            rank or "",
-            name_text,
-            original_price,
-            final_price,
-            rocket_badge,
-            arrival,
-            "Y" if free_shipping else "N",
-            review_count,
-            points,
-            stock_status,
-            link,
-            img_url,
-        ])
-
-        if len(results) >= 36:
-            break
-
+    for page in sorted(pages):
+        results += pages[page]
     return results
 
 
 def search_coupang_for_keyword(keyword):
-    encoded_keyword = quote(keyword, safe="")
-    searchProductListSize = 36
-    url = f"https://www.coupang.com/np/search?component=&q={encoded_keyword}&page=1&listSize={searchProductListSize}"
+    """
+    키워드의 검색 페이지 1..COUPANG_SEARCH_PAGES를 동시에 가져와 합친 결과 반환 (짧은/빈 페이지 이후는 요청하지 않음)
+    """
+    pages = {}
     try:
-        html = fetch_html_via_brightdata(url)
-        return parse_search_results(html)
+        paging.fetch_pages_threaded(
+            lambda page: build_search_url(keyword, page),
+            lambda page, url, html, error: parse_search_page(keyword, page, html, error, pages),
+            fetch_html_via_brightdata,
+        )
     except Exception as e:
         # Bright Data 실패 시 특별한 예외 발생
         raise Exception(f"Bright Data API 실패: {str(e)}")
+    return merge_pages(pages)
 
 
 def detect_columns(header_row):
@@ -402,13 +147,19 @@ def detect_columns(header_row):
 
 
 def load_keywords_from_csv(input_csv_path, limit=None):  # limit=5 주석처리
-    keywords = []
+    return list(itertools.islice(iter_keywords_from_csv(input_csv_path), limit))
+
+
+def iter_keywords_from_csv(input_csv_path):
+    """
+    입력 CSV에서 브랜드 값이 'X'인 행의 키워드를 파일 순서대로 한 줄씩 읽기 (스트리밍 모드는 목록으로 만들지 않음)
+    """
     with open(input_csv_path, "r", encoding="utf-8", newline="") as f:
         reader = csv.reader(f)
         try:
             header = next(reader)
         except StopIteration:
-            return []
+            return
 
         brand_idx, keyword_idx = detect_columns(header)
         if brand_idx is None or keyword_idx is None:
@@ -423,133 +174,215 @@ def load_keywords_from_csv(input_csv_path, limit=None):  # limit=5 주석처리
 
             # 브랜드 값이 'X'인 항목만
             if brand_val == "X" and keyword_val:
-                keywords.append(keyword_val)
-                # limit이 None이 아니고 지정된 개수에 도달하면 중단
-                if limit is not None and len(keywords) >= limit:
-                    break
-    return keywords
+                yield keyword_val
 
 
-def process_keyword(kw, writer, sum_writer, csvfile, sumfile, lock):
+def record_keyword_error(kw, writer):
+    """
+    검색 실패한 키워드의 에러 정보를 결과/요약 CSV 쓰기 대기열에 추가 (writer: RowWriter)
+    """
+    error_row = [
+        "",  # Rank
+        ERROR_ROW_NAME,  # Name
+        "",  # OriginalPrice
+        "",  # FinalPrice
+        "",  # RocketBadge
+        "",  # Arrival
+        "",  # FreeShipping
+        "",  # ReviewCount
+        "",  # Points
+        "",  # StockStatus
+        "",  # Link
+        ""   # ImgUrl
+    ]
+    metrics.incr("keywords_failed")
+    # 요약 CSV에도 에러 정보 기록, 실패 키워드는 이어하기 때 다시 시도 (journal status "error")
+    writer.submit([[kw] + error_row], [[kw, 0, 0, "0.00", 0]], key=kw, status="error")
+    log.info("[키워드] %s - 에러 정보 기록 요청", kw)
+
+
+def record_keyword_results(kw, items, writer):
     """
-    단일 키워드를 처리하고 CSV에 기록하는 함수 (스레드 안전)
+    키워드 검색 결과(SearchItem 목록)와 집계(요약)를 결과/요약 CSV 쓰기 대기열에 추가 (writer: RowWriter)
     """
-    print(f"\n[키워드] {kw} - 검색 시작")
-    # 요청 간 딜레이 1.5초
-    time.sleep(1.5)
+    # 집계: 평균 최종가, 로켓 배지 개수, 평균 리뷰수 (파싱 시 정규화된 숫자 사용, 값이 없으면 0)
+    num_items = len(items)
+    avg_final_price = int(sum(item.final_price or 0 for item in items) / num_items) if num_items else 0
+    rocket_badge_count = sum(1 for item in items if item.badge.is_rocket)
+    avg_review_count = float(sum(item.review_count or 0 for item in items) / num_items) if num_items else 0.0
+    
+    # 쓰기 스레드가 배치로 기록하고, 디스크에 반영한 뒤 journal에 완료 기록 (journal에 있으면 CSV에도 있음)
+    metrics.incr("keywords_ok")
+    metrics.incr("items_parsed", num_items)
+    writer.submit(
+        [[kw] + item.csv_row() for item in items],
+        [[kw, avg_final_price, rocket_badge_count, f"{avg_review_count:.2f}", num_items]],
+        # Parquet/SQLite 출력에는 정규화된 값 그대로 전달 (각 출력이 자기 형식으로 변환)
+        [(kw, item) for item in items],
+        key=kw, items=num_items,
+    )
+    
+    log.info("[키워드] %s - %s건 기록 요청", kw, num_items)
+
+
+def process_keyword(kw, writer):
+    """
+    단일 키워드를 처리하고 CSV 쓰기 대기열에 추가하는 함수 (스레드 안전)
+    """
+    # 요청 간격은 고정 딜레이 대신 rate_control의 토큰 버킷(COUPANG_RPS)이 조절
+    log.info("[키워드] %s - 검색 시작", kw)
     try:
         results = search_coupang_for_keyword(kw)
     except Exception as e:
-        print(f"[오류] 검색 실패: {kw} - {e}")
-        # 에러 정보를 CSV에 기록 (스레드 안전)
-        error_row = [
-            "",  # Rank
-            "데이터를 못 받아 왔습니다",  # Name
-            "",  # OriginalPrice
-            "",  # FinalPrice
-            "",  # RocketBadge
-            "",  # Arrival
-            "",  # FreeShipping
-            "",  # ReviewCount
-            "",  # Points
-            "",  # StockStatus
-            "",  # Link
-            ""   # ImgUrl
-        ]
-        lock.acquire()
-        try:
-            writer.writerow([kw] + error_row)
-            csvfile.flush()
-            # 요약 CSV에도 에러 정보 기록
-            sum_writer.writerow([kw, 0, 0, "0.00", 0])
-            sumfile.flush()
-        finally:
-            lock.release()
-        print(f"[키워드] {kw} - 에러 정보 기록 완료")
+        log.error("검색 실패: %s - %s", kw, e)
+        record_keyword_error(kw, writer)
         return
-    
-    # 집계: 평균 최종가, 로켓 배지 개수, 평균 리뷰수
-    def _to_int(num_str: str) -> int:
-        try:
-            import re as _re
-            digits = _re.sub(r"[^\d]", "", num_str or "")
-            return int(digits) if digits else 0
-        except Exception:
-            return 0
-    
-    num_items = len(results)
-    final_prices = [_to_int(r[3]) for r in results]  # row: [Rank, Name, OriginalPrice, FinalPrice, RocketBadge, ...]
-    avg_final_price = int(sum(final_prices) / num_items) if num_items else 0
-    rocket_badge_count = sum(1 for r in results if ("로켓" in (r[4] or "")))
-    review_counts = [_to_int(r[7]) for r in results]
-    avg_review_count = float(sum(review_counts) / num_items) if num_items else 0.0
-    
-    # CSV에 기록 (스레드 안전)
-    lock.acquire()
-    try:
-        for row in results:
-            writer.writerow([kw] + row)
-        csvfile.flush()
-        sum_writer.writerow([kw, avg_final_price, rocket_badge_count, f"{avg_review_count:.2f}", num_items])
-        sumfile.flush()
-    finally:
-        lock.release()
-    
-    print(f"[키워드] {kw} - {len(results)}건 기록 완료")
+
+    record_keyword_results(kw, results, writer)
 
 
-def get_file_paths(input_csv_file):
+def process_keywords_async(keywords, writer, concurrency=DEFAULT_CONCURRENCY):
+    """
+    asyncio 엔진으로 키워드들을 동시에 검색 (요청당 스레드 대신 코루틴 사용)
+    키워드마다 검색 페이지 1..COUPANG_SEARCH_PAGES를 동시에 가져오고 짧은/빈 페이지 이후는 요청하지 않음
+    keywords는 이터레이터여도 됨 - 동시에 진행하는 키워드는 streaming.STREAM_WINDOW개까지만 꺼냄
     """
-    입력 CSV 파일명으로부터 관련 파일 경로들을 반환
+    # 같은 키워드가 여러 번 있어도 따로 처리되도록 (순번, 키워드)를 키로 사용
+    keys = enumerate(keywords)
+    # 진행 중인 키워드의 페이지 결과만 보관 (키워드가 끝나면 기록 후 제거)
+    pages_by_key = {}
+
+    def _on_page(key, page, url, html, error):
+        return parse_search_page(key[1], page, html, error, pages_by_key.setdefault(key, {}), wait=False)
+
+    def _on_done(key, error):
+        kw = key[1]
+        pages = pages_by_key.pop(key, {})
+        if error is not None:
+            log.error("검색 실패: %s - Bright Data API 실패: %s", kw, error)
+            record_keyword_error(kw, writer)
+            return
+        record_keyword_results(kw, merge_pages(pages), writer)
+
+    log.info("[키워드] 검색 시작 (asyncio, 키워드당 최대 %s페이지, 동시 요청 상한 %s개, 동시 키워드 상한 %s개)",
+             paging.MAX_PAGES, concurrency, streaming.STREAM_WINDOW)
+    paging.fetch_pages_for_keys(keys, lambda key, page: build_search_url(key[1], page), _on_page, _on_done,
+                                concurrency=concurrency, timeout=30)
+
+
+def get_file_paths(input_csv=None, output_dir=None):
     """
-    input_csv = f'{BASE_DIR}/{input_csv_file}'
-    base_name = input_csv_file.split('.')[0]
-    output_csv = f"{BASE_DIR}/{base_name}_rocket_results.csv"
-    summary_csv = f"{BASE_DIR}/{base_name}_rocket_result_summary.csv"
-    return input_csv, output_csv, summary_csv
+    입력 CSV 경로로부터 관련 파일 경로들을 반환 (출력 파일은 output_dir, 없으면 입력 CSV와 같은 폴더)
+    """
+    input_csv = input_csv or os.path.join(BASE_DIR, DEFAULT_INPUT_CSV_FILE)
+    output_dir = output_dir or os.path.dirname(input_csv) or "."
+    base_name = os.path.basename(input_csv).split('.')[0]
+    output_csv = os.path.join(output_dir, f"{base_name}_rocket_results.csv")
+    summary_csv = os.path.join(output_dir, f"{base_name}_rocket_result_summary.csv")
+    report_json = os.path.join(output_dir, f"{base_name}_run_report.json")
+    return input_csv, output_csv, summary_csv, report_json
 
 
-def main():
-    input_csv_file = DEFAULT_INPUT_CSV_FILE
-    input_csv, output_csv, summary_csv = get_file_paths(input_csv_file)
+def main(resume=False, input_csv=None, output_dir=None):
+    """
+    키워드 CSV(input_csv, 기본 BASE_DIR/DEFAULT_INPUT_CSV_FILE)의 키워드별 검색 결과 수집 (cli.py rocket)
+    resume=True: 이전 실행의 결과 CSV에 이어쓰고, 이미 완료된 키워드(journal/결과 CSV 기준)는 건너뜀
+    """
+    # 경고 무시 (urllib3 InsecureRequestWarning 등)
+    warnings.filterwarnings(
+        "ignore", category=requests.packages.urllib3.exceptions.InsecureRequestWarning
+    )
+    setup_logging()
+    # 파싱 프로세스 풀(COUPANG_PARSE_POOL=on)의 워커를 수집 시작 전에 미리 띄움
+    parse_pool.get_pool()
+    input_csv, output_csv, summary_csv, report_json = get_file_paths(input_csv, output_dir)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
 
     start_time = datetime.now()
-    print(f"시작: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    log.info("시작: %s", start_time.strftime('%Y-%m-%d %H:%M:%S'))
 
     # 1) 키워드 로드 (브랜드 == 'X', 최대 5개)
-    keywords = load_keywords_from_csv(input_csv)  # limit=5 주석처리
-    print('keywords:', keywords)
-    print(f"키워드({len(keywords)}): {keywords}")
-
-    # 2) 각 키워드별 검색 36개 수집 후 CSV 저장
-    with open(output_csv, "w", encoding="utf-8", newline="") as csvfile, \
-         open(summary_csv, "w", encoding="utf-8", newline="") as sumfile:
-        writer = csv.writer(csvfile)
-        sum_writer = csv.writer(sumfile)
-        writer.writerow(RESULTS_CSV_HEADER)
-        sum_writer.writerow(SUMMARY_CSV_HEADER)
-
-        # 스레드 안전을 위한 Lock
-        lock = threading.Lock()
-        
-        # 4개의 워커 스레드로 병렬 처리
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            futures = []
-            for kw in keywords:
-                future = executor.submit(process_keyword, kw, writer, sum_writer, csvfile, sumfile, lock)
-                futures.append(future)
-            
-            # 완료된 작업 확인
-            for future in as_completed(futures):
-                try:
-                    future.result()
-                except Exception as e:
-                    print(f"[오류] 작업 실행 중 예외 발생: {e}")
+    if streaming.enabled():
+        # 스트리밍 모드: 키워드를 목록으로 만들지 않고 검색을 시작할 때 한 줄씩 읽음 (개수는 읽으면서 셈)
+        keywords = all_keywords = streaming.Counted(iter_keywords_from_csv(input_csv))
+        log.info("키워드: %s에서 한 줄씩 읽음 (스트리밍, 동시 키워드 상한 %s개)", input_csv, streaming.STREAM_WINDOW)
+    else:
+        keywords = all_keywords = load_keywords_from_csv(input_csv)  # limit=5 주석처리
+        log.info("키워드(%s): %s", len(keywords), keywords)
+
+    # 완료 기록: 키워드 단위 checkpoint journal (스트리밍 모드면 이번 실행의 완료 키워드는 파일에만 기록)
+    journal = checkpoint.Journal(checkpoint.journal_path(output_csv), resume=resume,
+                                 keep_status=not streaming.enabled())
+    if resume:
+        # journal 기록 직전에 중단된 경우를 위해 결과 CSV에 이미 있는 키워드도 완료로 간주 (실패 행 제외)
+        done = journal.done_keys() | set(checkpoint.read_column(
+            output_csv, RESULTS_CSV_HEADER[0], skip=lambda row: row[2] == ERROR_ROW_NAME
+        ))
+        # 실패했던 키워드는 다시 검색하므로 이전 실패 행을 결과/요약 CSV에서 지움 (다시 실패하면 새로 기록)
+        retry = set(checkpoint.iter_column(
+            output_csv, RESULTS_CSV_HEADER[0], skip=lambda row: row[2] != ERROR_ROW_NAME
+        )) - done
+        if retry:
+            dropped = checkpoint.drop_rows(output_csv, lambda row: row[0] in retry)
+            checkpoint.drop_rows(summary_csv, lambda row: row[0] in retry)
+            log.info("이어하기: 실패했던 키워드 %s개의 이전 실패 행 %s개 삭제", len(retry), dropped)
+        if streaming.enabled():
+            keywords = streaming.Counted(kw for kw in all_keywords if kw not in done)
+            log.info("이어하기: 완료된 키워드 %s개는 읽으면서 건너뜀", len(done))
+        else:
+            keywords = [kw for kw in all_keywords if kw not in done]
+            log.info("이어하기: 완료 %s개 건너뜀, 남은 키워드 %s개", len(all_keywords) - len(keywords), len(keywords))
+
+    # 2) 각 키워드별 검색 결과(페이지당 36개, 최대 COUPANG_SEARCH_PAGES페이지) 수집 후 CSV 저장
+    with checkpoint.open_output_csv(output_csv, RESULTS_CSV_HEADER, resume) as csvfile, \
+         checkpoint.open_output_csv(summary_csv, SUMMARY_CSV_HEADER, resume) as sumfile:
+        # 결과/요약 CSV(+ Parquet)는 전용 쓰기 스레드가 배치로 기록 (작업 스레드는 파일 I/O를 기다리지 않음)
+        results_parquet = columnar.open_sink(output_csv, "results", resume)
+        results_store = result_store.open_store("search", "rocket", start_time.timestamp())
+        writer = RowWriter(csvfile, sumfile, (results_parquet, results_store), journal=journal)
+
+        if FETCH_ENGINE == "async":
+            process_keywords_async(keywords, writer)
+        else:
+            # 워커 스레드로 병렬 처리 (워커 수만큼 keep-alive 커넥션 풀 준비)
+            brightdata.get_transport(pool_size=MAX_WORKERS)
+            # 끝나지 않은 키워드가 STREAM_WINDOW개면 하나가 끝난 뒤 다음 키워드 제출 (Future를 미리 다 만들지 않음)
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                streaming.submit_bounded(executor, process_keyword, ((kw, writer) for kw in keywords))
+
+        # 남은 배치 기록 후 쓰기 스레드 종료
+        writer.close()
+        for sink in (results_parquet, results_store):
+            if sink is not None:
+                sink.close()
+
+    journal.close()
+    parse_pool.shutdown()
+    # 스트리밍 모드는 읽은 줄 수로 집계
+    total_keywords = all_keywords.count if streaming.enabled() else len(all_keywords)
+    keyword_count = keywords.count if streaming.enabled() else len(keywords)
 
     end_time = datetime.now()
-    print(f"\n종료: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"총 소요: {end_time - start_time}")
+    log.info("종료: %s", end_time.strftime('%Y-%m-%d %H:%M:%S'))
+    log.info("총 소요: %s", end_time - start_time)
+
+    # 단계별 소요 시간(p50/p95/p99)과 재시도/실패/수신 바이트 카운터 리포트
+    report = metrics.METRICS.write_report(report_json, extra={
+        "entry": "coupang_rocket_search",
+        "input_csv": input_csv,
+        "keywords": keyword_count,
+        "keywords_skipped": total_keywords - keyword_count,
+        "max_search_pages": paging.MAX_PAGES,
+        "fetch_engine": FETCH_ENGINE,
+        "final_concurrency_limit": int(rate_control.get_limiter().limit),
+    })
+    log.info("실행 리포트: %s", report_json)
+    return report
 
 
 if __name__ == "__main__":
-    main()
+    # 인자 정의는 통합 CLI(cli.py)와 공유: python coupang_rocket_search.py [--resume] == python cli.py rocket ...
+    import cli
+
+    cli.main(["rocket"] + sys.argv[1:])
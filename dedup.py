@@ -0,0 +1,51 @@
+import threading
+
+import metrics
+from records import canonical_product_url, product_key
+
+
+class ProductDedup:
+    """
+    실행 중 상품 중복 제거 색인 (스레드/코루틴 공용)
+    - 같은 상품(productId, itemId, vendorItemId)은 처음 나온 한 번만 claim()이 표준 URL을 돌려주고
+      이후(다른 키워드/광고 슬롯/페이지에서 다시 나온 경우)는 None
+    - claim은 요청을 시작하기 전에 하므로 동시에 들어온 같은 상품도 요청/파싱은 한 번만 일어남 (single-flight)
+    - done에는 이전 실행에서 이미 완료한 URL (이어하기) - 이들도 None
+    """
+
+    def __init__(self, done=()):
+        self._lock = threading.Lock()
+        self._done = {product_key(url) for url in done}
+        self._claimed = set()
+        self.already_done = 0
+        self.deduped = 0
+
+    def claim(self, url):
+        key = product_key(url)
+        with self._lock:
+            if key in self._done:
+                self.already_done += 1
+                metrics.incr("pdp_already_done")
+                return None
+            if key in self._claimed:
+                self.deduped += 1
+                metrics.incr("pdp_deduped")
+                return None
+            self._claimed.add(key)
+        return canonical_product_url(url)
+
+    def claim_all(self, urls):
+        """
+        urls 중 처음 나온 상품만 표준 URL로 (순서 유지)
+        """
+        return list(self.iter_claims(urls))
+
+    def iter_claims(self, urls):
+        """
+        claim_all과 같지만 필요할 때 하나씩 claim (urls가 파일에서 한 줄씩 읽는 이터레이터일 때)
+        """
+        return (canonical for canonical in map(self.claim, urls) if canonical)
+
+    @property
+    def claimed(self):
+        return len(self._claimed)
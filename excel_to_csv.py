@@ -1,14 +1,18 @@
-import argparse
-import pandas as pd
 import csv
 import re
 import os
+import sys
+
+
+def default_output_path(input_path: str) -> str:
+	# 출력 경로를 주지 않으면 입력 XLSX와 같은 위치/이름의 .csv
+	return os.path.splitext(input_path)[0] + ".csv"
 
-original_file_name = "Discovery_헤어액세서리_20251112214121"
-input_file = f"/Users/hakyeongkim/Desktop/Coupang_crawling/{original_file_name}.xlsx"
-output_file = f"/Users/hakyeongkim/Desktop/Coupang_crawling/{original_file_name}.csv"
 
 def excel_to_csv(input_path: str, output_path: str, sheet_name=None) -> None:
+	# pandas는 변환할 때만 import (cli.py --help 등은 pandas 없이 바로 실행)
+	import pandas as pd
+
 	# openpyxl 엔진 명시 (설치 필요: pip install openpyxl)
 	# sheet_name이 None이면 pandas는 모든 시트를 dict로 반환하므로 첫 시트를 사용하도록 보정
 	actual_sheet = 0 if sheet_name is None else sheet_name
@@ -66,36 +70,10 @@ def excel_to_csv(input_path: str, output_path: str, sheet_name=None) -> None:
 		print(f"[DONE] CSV 생성: {output_path}")
 
 def main():
-	parser = argparse.ArgumentParser(description="XLSX → CSV 변환 (셀 내부 개행 제거)")
-	parser.add_argument(
-		"--input",
-		required=False,
-		default=input_file,
-		help="입력 XLSX 경로",
-	)
-	parser.add_argument(
-		"--output",
-		required=False,
-		default=output_file,
-		help="출력 CSV 경로",
-	)
-	parser.add_argument(
-		"--sheet",
-		required=False,
-		default="0",
-		help="시트 이름 또는 인덱스 (기본: 0 = 첫 시트)",
-	)
-	args = parser.parse_args()
-
-	# sheet이 숫자 문자열이면 int로 변환
-	sheet = args.sheet
-	try:
-		sheet = int(sheet)
-	except (TypeError, ValueError):
-		# 이름 문자열로 사용
-		pass
+	# 인자 정의는 통합 CLI(cli.py)와 공유: python excel_to_csv.py --input X.xlsx == python cli.py convert --input X.xlsx
+	import cli
 
-	excel_to_csv(args.input, args.output, sheet)
+	cli.main(["convert"] + sys.argv[1:])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,218 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import metrics
+from log_setup import get_logger
+
+log = get_logger("cache")
+
+# 캐시 설정 (환경변수로 조정)
+# COUPANG_CACHE_MODE: "on"(기본, 캐시 우선 후 네트워크), "off"(사용 안 함),
+#                     "only"(네트워크 없이 캐시만 사용 - 셀렉터 수정 후 오프라인 재파싱용, TTL 무시)
+CACHE_MODE = os.getenv("COUPANG_CACHE_MODE", "on")
+CACHE_PATH = os.getenv("COUPANG_CACHE_PATH", ".html_cache.sqlite3")
+CACHE_MAX_BYTES = int(os.getenv("COUPANG_CACHE_MAX_MB", "2048")) * 1024 * 1024
+
+# 페이지 종류별 유효 시간(초): 검색 결과는 자주 바뀌고 상세페이지는 상대적으로 안정적
+CACHE_TTL = {
+    "search": int(os.getenv("COUPANG_CACHE_TTL_SEARCH", str(6 * 3600))),
+    "pdp": int(os.getenv("COUPANG_CACHE_TTL_PDP", str(24 * 3600))),
+    "other": int(os.getenv("COUPANG_CACHE_TTL_OTHER", str(6 * 3600))),
+}
+
+# 같은 페이지인데 요청마다 달라지는 추적용 파라미터 (캐시 키에서 제외)
+VOLATILE_PARAMS = {
+    "clickEventId", "searchId", "korePlacement", "traceId", "traceid",
+    "sourceType", "isAddedCart", "wPcid", "wRef", "wTime", "redirect",
+}
+
+
+# 정상 페이지에만 있는 표식 (차단/캡차 페이지가 200으로 와도 캐시에 넣지 않도록 저장 전에 확인)
+# 검색 결과: 상품 목록, 상세페이지: 상품 정보 영역 또는 (구 구조) 상품 제목
+CONTENT_MARKERS = {
+    "search": ("product-list",),
+    "pdp": ("prod-atf-contents", "product-title"),
+}
+
+# last_access 갱신을 모아서 기록하는 개수 (캐시 적중마다 commit하지 않도록)
+TOUCH_BATCH = 100
+
+
+class CacheMiss(Exception):
+    """cache-only 모드에서 캐시에 없는 URL을 요청한 경우"""
+
+
+def canonical_url(url):
+    """
+    캐시 키용 정규화 URL: 호스트 소문자화, 추적 파라미터 제거, 쿼리 정렬, fragment 제거
+    """
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in VOLATILE_PARAMS
+    )
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ""))
+
+
+def page_type(url):
+    if "/np/search" in url:
+        return "search"
+    if "/vp/products/" in url:
+        return "pdp"
+    return "other"
+
+
+def is_cacheable(url, html):
+    """
+    저장해도 되는 응답인지 확인 - 페이지 종류별 표식이 하나도 없으면 차단/캡차/빈 페이지로 보고 False
+    """
+    markers = CONTENT_MARKERS.get(page_type(url))
+    return markers is None or any(marker in html for marker in markers)
+
+
+class HtmlCache:
+    """
+    압축(zlib)된 HTML 응답을 SQLite 파일 하나에 저장하는 영구 캐시
+    - 키: canonical_url의 sha1
+    - 만료: 페이지 종류별 TTL
+    - 축출: 전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 삭제 (LRU)
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES, ttl=None, mode=CACHE_MODE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = dict(CACHE_TTL if ttl is None else ttl)
+        self.mode = mode
+        self._lock = threading.Lock()
+        # 적중한 키의 마지막 사용 시각 - TOUCH_BATCH개마다 또는 put/close 때 한 번에 기록
+        self._touched = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                page_type TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL,
+                body BLOB NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_last_access ON pages(last_access)")
+        self._conn.commit()
+        self._total_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha1(canonical_url(url).encode("utf-8")).hexdigest()
+
+    def get(self, url):
+        """
+        캐시된 HTML 반환 (없거나 만료되었으면 None, cache-only 모드에서는 만료 무시)
+        """
+        key = self._key(url)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_type, fetched_at, body FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                metrics.incr("cache_misses")
+                return None
+            ptype, fetched_at, body = row
+            if self.mode != "only" and now - fetched_at > self.ttl.get(ptype, self.ttl["other"]):
+                metrics.incr("cache_expired")
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= TOUCH_BATCH:
+                self._flush_touched()
+                self._conn.commit()
+        metrics.incr("cache_hits")
+        return zlib.decompress(body).decode("utf-8")
+
+    def put(self, url, html):
+        if not html:
+            return
+        if not is_cacheable(url, html):
+            metrics.incr("cache_rejected")
+            log.debug("정상 페이지 표식 없음 - 캐시에 저장하지 않음: %s", url)
+            return
+        key = self._key(url)
+        body = zlib.compress(html.encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM pages WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (key, url, page_type, fetched_at, last_access, size, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, canonical_url(url), page_type(url), now, now, len(body), body),
+            )
+            self._total_size += len(body) - (old[0] if old else 0)
+            self._touched.pop(key, None)
+            self._flush_touched()
+            if self._total_size > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    async def get_async(self, url):
+        """
+        이벤트 루프용 get - SQLite 읽기/압축 해제를 스레드에서 실행해 다른 코루틴을 막지 않음
+        """
+        return await asyncio.to_thread(self.get, url)
+
+    async def put_async(self, url, html):
+        await asyncio.to_thread(self.put, url, html)
+
+    def _flush_touched(self):
+        # 모아 둔 last_access 갱신 기록 (호출자가 lock 보유, commit은 호출자가)
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE pages SET last_access = ? WHERE key = ?",
+                [(ts, key) for key, ts in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self):
+        # 최대 크기의 90%까지 LRU 순서로 삭제 (호출자가 lock 보유)
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM pages ORDER BY last_access").fetchall()
+        evicted = []
+        for key, size in rows:
+            if self._total_size <= target:
+                break
+            evicted.append((key,))
+            self._total_size -= size
+        self._conn.executemany("DELETE FROM pages WHERE key = ?", evicted)
+        log.info("%s개 항목 축출 (현재 %.1fMB)", len(evicted), self._total_size / 1024 / 1024)
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    프로세스 전체에서 공유하는 캐시 반환 (COUPANG_CACHE_MODE=off이면 None)
+    """
+    global _cache
+    if CACHE_MODE == "off":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HtmlCache()
+        return _cache
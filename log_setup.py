@@ -0,0 +1,38 @@
+import logging
+import os
+
+# 전체 로그 레벨 (DEBUG, INFO, WARNING, ERROR)
+LOG_LEVEL = os.getenv("COUPANG_LOG_LEVEL", "INFO")
+# 서브시스템별 레벨 재정의, 예: "pdp=DEBUG,fetch=WARNING"
+# 서브시스템: main, search, pdp, rocket, parser, fetch, cache
+LOG_LEVELS = os.getenv("COUPANG_LOG_LEVELS", "")
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s - %(message)s"
+
+
+def get_logger(subsystem):
+    """
+    서브시스템 로거 반환 (coupang.<subsystem>)
+    """
+    return logging.getLogger(f"coupang.{subsystem}")
+
+
+def setup_logging(level=None, levels=None):
+    """
+    coupang.* 로거에 핸들러와 레벨 설정 (진입점에서 한 번 호출)
+    레벨이 꺼진 로그는 메시지 포맷팅/노드 직렬화가 일어나지 않도록 logger.debug("%s", node) 형태로 사용
+    """
+    root = logging.getLogger("coupang")
+    root.setLevel((level or LOG_LEVEL).upper())
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(handler)
+        root.propagate = False
+
+    for spec in (LOG_LEVELS if levels is None else levels).split(","):
+        if "=" not in spec:
+            continue
+        name, lvl = spec.split("=", 1)
+        get_logger(name.strip()).setLevel(lvl.strip().upper())
+    return root
@@ -1,369 +1,498 @@
-from bs4 import BeautifulSoup
+import asyncio
 import requests
-import csv
 import warnings
-import time
-import json
 from urllib.parse import quote
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import threading
+import os
+import sys
+import logging
+
+import brightdata
+import checkpoint
+import columnar
+import metrics
+import paging
+import parse_pool
+import pipeline
+import rate_control
+import result_store
+import streaming
+from row_writer import RowWriter
+from async_fetch import fetch_all, DEFAULT_CONCURRENCY
+from search_parser import get_backend, parse_listing_entries
+from pdp_parser import PDP_HEADER, extract_pdp_row
+from dedup import ProductDedup
+from records import format_won, listing_item, search_item_from_row
+from log_setup import get_logger, setup_logging
+
+# 서브시스템별 로거 (검색 목록 / 상세페이지 / 전체 진행)
+log = get_logger("main")
+search_log = get_logger("search")
+pdp_log = get_logger("pdp")
+
+# Bright Data API 설정은 공용 전송 계층(brightdata.py)에서 관리
+
+# 수집 엔진: "async"(asyncio, 코루틴 기반) 또는 "thread"(기존 ThreadPoolExecutor)
+FETCH_ENGINE = os.getenv("COUPANG_FETCH_ENGINE", "async")
+# 검색→PDP 파이프라인: "on"(기본, 검색 결과에서 나온 링크를 바로 PDP 수집으로 넘김) 또는 "off"(검색 완료 후 PDP 일괄 수집)
+PIPELINE = os.getenv("COUPANG_PIPELINE", "on")
+# thread 엔진의 워커 수 = 동시 요청 수 상한 (실제 동시 요청 수와 초당 요청 수는 rate_control이 조정)
+MAX_WORKERS = rate_control.MAX_CONCURRENCY
 
-# 경고를 무시
-warnings.filterwarnings(
-    "ignore", category=requests.packages.urllib3.exceptions.InsecureRequestWarning
-)
-
-# Bright Data API 설정 (Proxies 대체)
-BRD_API_URL = "https://api.brightdata.com/request"
-BRD_API_TOKEN = "05aef2b4090457d4596657a92e2cab7ce602375b4d5e90ea0cdf8b49781df158"
-BRD_ZONE = "web_unlocker_251031"
 
 def fetch_html_via_brightdata(target_url, retries=3, backoff=5):
-    encoded_url = requests.utils.requote_uri(target_url)
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {BRD_API_TOKEN}",
-    }
-    payload = {
-        "zone": BRD_ZONE,
-        "url": encoded_url,
-        "method": "GET",
-        "format": "raw",
-        "country": "kr",
-        "headers": {
-            "User-Agent": (
-                "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/128.0.0.0 Safari/537.36"
-            ),
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-            "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
-            "Referer": "https://www.coupang.com/",
-            "Upgrade-Insecure-Requests": "1",
-        },
-    }
-
-    for attempt in range(1, retries + 1):
-        try:
-            response = requests.post(
-                BRD_API_URL, headers=headers, data=json.dumps(payload), timeout=60
-            )
-            response.raise_for_status()
-            return response.text
-        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
-            print(f"[경고] Bright Data 응답 지연 (시도 {attempt}/{retries}) - {e}")
-            if attempt < retries:
-                time.sleep(backoff * attempt)  # 지수적 대기
-            else:
-                raise
-
-
-def find_list(page_num, url, writer, csvfile=None):
-    print(f"\n[DEBUG] 페이지 {page_num} 시작 - URL: {url}")
+    # 공용 전송 계층(keep-alive 커넥션 풀) 사용
+    return brightdata.fetch_html_via_brightdata(target_url, retries=retries, backoff=backoff, timeout=60)
+
+
+def build_search_url(keyword, page_num):
+    encoded_keyword = quote(keyword, safe="")
+    searchProductListSize = paging.PAGE_SIZE
+    return f"https://www.coupang.com/np/search?component=&q={encoded_keyword}&page={page_num}&listSize={searchProductListSize}"
+
+
+async def parse_listing_async(html, full=False):
+    """
+    asyncio 엔진용: 파싱 프로세스 풀이 있으면 이벤트 루프를 막지 않고 parse_listing_entries 결과를 기다림
+    풀이 없으면 None (find_list가 그 자리에서 파싱)
+    """
+    pool = parse_pool.get_pool()
+    if pool is None:
+        return None
+    return await pool.run_async("parse_search", parse_listing_entries, html, full)
+
+
+def find_list(page_num, url, writer, html=None, stats=None, keyword="", full=False, parsed=None):
+    """
+    검색 페이지 하나를 파싱해 CSV 쓰기 대기열(writer: RowWriter)에 넣고 항목(records.SearchItem) 목록 반환
+    링크가 있으면 기록 후 journal에 페이지 URL 완료 기록
+    stats(dict)가 주어지면 stats["items"]에 페이지의 전체 항목 수 기록 (마지막 페이지 판단용)
+    full이면 같은 순회 결과로 배지/리뷰수/재고까지 추출 (SQLite 저장, 증분 수집 비교용)
+    parsed: 이미 파싱한 parse_listing_entries 결과 (asyncio 엔진은 parse_listing_async로 미리 기다림)
+    """
+    search_log.debug("페이지 %s 시작 - URL: %s", page_num, url)
     
-    try:
-        html = fetch_html_via_brightdata(url)
-        print(f"[DEBUG] HTML 응답 길이: {len(html)} bytes")
-    except Exception as e:
-        print(f"[오류] 페이지 {page_num} HTML 가져오기 실패: {e}")
-        return []
+    # html이 주어지면(asyncio 엔진에서 미리 가져온 경우) 다시 요청하지 않음
+    if html is None:
+        try:
+            html = fetch_html_via_brightdata(url)
+        except Exception as e:
+            search_log.error("페이지 %s HTML 가져오기 실패: %s", page_num, e)
+            return []
+    search_log.debug("HTML 응답 길이: %s bytes", len(html))
     
-    soup = BeautifulSoup(html, "html.parser")
-    # 신 구조: <ul id="product-list"> 내의 li.ProductUnit_productUnit__Qd6sv
-    items = soup.select("#product-list .ProductUnit_productUnit__Qd6sv")
+    # 파서 백엔드(search_parser.py, COUPANG_PARSER로 bs4/selectolax 선택)로 파싱
+    # 파싱 프로세스 풀(COUPANG_PARSE_POOL=on)이 있으면 워커 프로세스에서 파싱하고 결과만 받음
+    pool = parse_pool.get_pool()
+    if parsed is not None:
+        total, entries = parsed
+    elif pool is not None:
+        total, entries = pool.run("parse_search", parse_listing_entries, html, full)
+    else:
+        with metrics.timer("parse_search"):
+            total, entries = parse_listing_entries(html, full)
+    if stats is not None:
+        stats["items"] = total
     
-    print(f"[DEBUG] '.search-product' 셀렉터로 찾은 항목 수: {len(items)}")
+    search_log.debug("'.search-product' 셀렉터로 찾은 항목 수: %s", total)
     
-    # 다른 셀렉터들도 시도해봅니다
-    alternative_selectors = [
-        "[class*=search-product]",
-        ".baby-product",
-        ".search-product-wrap",
-        "li[class*=product]",
-    ]
-    for selector in alternative_selectors:
-        alt_items = soup.select(selector)
-        if alt_items:
-            print(f"[DEBUG] 대체 셀렉터 '{selector}': {len(alt_items)}개 발견")
-
-    link_list = []
-
-    rank = 1
-    for idx, item in enumerate(items):
-        print(f"[DEBUG] 항목 {idx + 1}/{len(items)} 처리 중...")
-        
-        # 이름: 신 구조 클래스 우선, 없으면 구 구조 폴백
-        name = item.select_one(".ProductUnit_productNameV2__cV9cw") or item.select_one(".name")
-        # 가격: 신 구조 영역 내 텍스트에서 가격 추출, 없으면 구 구조 폴백
-        price_container = item.select_one(".PriceArea_priceArea__NntJz")
-        price = None
-        if price_container:
-            price_text = price_container.get_text(" ", strip=True)
-            # 금액 패턴 추출 (숫자와 , 포함, '원' 포함 가능)
-            import re
-            m = re.search(r"([0-9][0-9,\.]+)\s*원?", price_text)
-            if m:
-                price = m.group(1) + "원"
-        if not price:
-            price_node = item.select_one(".price-value")
-            price = None if not price_node else price_node.text
-        
-        if not price:
-            print(f"[DEBUG] 항목 {idx + 1}: 가격 정보 없음 (리퍼 제품일 수 있음) - 건너뜀")
-            continue
-
-        try:
-            a_tag = item.select_one("a")
-            href = a_tag.get("href") if a_tag else None
-            link = f"https://www.coupang.com{href}" if href and href.startswith("/") else (href or "")
-            thumb = item.select_one(".search-product-wrap-img")
-
-            name_text = "" if not name else name.text
-            final_price = price if isinstance(price, str) else ("" if not price else price.text)
-            
-            if thumb and thumb.get("data-img-src"):
-                img_url = f"https:{thumb.get('data-img-src')}"
-            elif thumb and thumb.get("src"):
-                img_url = f"https:{thumb.get('src')}"
-            else:
-                img_url = ""
-                print(f"[DEBUG] 항목 {idx + 1}: 이미지 URL 없음")
+    # 다른 셀렉터들도 시도해봅니다 (진단용이므로 DEBUG일 때만 실행)
+    if search_log.isEnabledFor(logging.DEBUG):
+        be = get_backend()
+        soup = be.parse(html)
+        alternative_selectors = [
+            "[class*=search-product]",
+            ".baby-product",
+            ".search-product-wrap",
+            "li[class*=product]",
+        ]
+        for selector in alternative_selectors:
+            alt_items = be.select(soup, selector)
+            if alt_items:
+                search_log.debug("대체 셀렉터 '%s': %s개 발견", selector, len(alt_items))
+
+    found = []
+    rows = []
+    records = []
+
+    for rank, (extracted, full_row) in enumerate(entries, 1):
+        # 파싱 시점에 정규화 (가격은 원 단위 int, records.SearchItem)
+        listing = listing_item(*extracted)
+        if not listing.img_url:
+            search_log.debug("항목 %s: 이미지 URL 없음", rank)
+
+        # CSV에 기록될 데이터 출력 (가격은 페이지 표시 문구 그대로)
+        csv_data = [listing.name, listing.final_price_text, listing.link, listing.img_url]
+        search_log.debug("Name: %s, Price: %s, Link: %s, Img_url: %s", *csv_data)
+
+        rows.append(csv_data)
+        # SQLite 출력용: 순위는 페이지를 이어서 매김 (full이면 rocket 결과와 같은 필드/가격 기준)
+        record = search_item_from_row(full_row) if full_row is not None else listing
+        record = record._replace(rank=(page_num - 1) * paging.PAGE_SIZE + rank)
+        records.append((keyword, record))
+
+        search_log.info("%s페이지: %s위 %s %s, %s", page_num, rank, listing.name, format_won(listing.final_price), listing.link)
+
+        found.append(record)
+
+    metrics.incr("items_parsed", len(found))
+    # 페이지 단위로 한 번에 쓰기 스레드에 넘김 (항목마다 flush하지 않음)
+    writer.submit(rows, records, key=url if found else None, links=len(found))
+
+    if not found:
+        # 2페이지 이후의 빈 페이지는 검색 결과의 끝일 수 있으므로 INFO로 기록
+        level = logging.WARNING if page_num == 1 else logging.INFO
+        search_log.log(level, "페이지 %s: 검색 결과를 찾지 못했습니다. (HTML %s bytes)", page_num, len(html))
+        # 원인 분석용 덤프는 DEBUG가 켜져 있을 때만 계산
+        if search_log.isEnabledFor(logging.DEBUG):
+            search_log.debug("응답 시작 부분 (처음 1000자):\n%s\n%s\n%s", "=" * 80, html[:1000], "=" * 80)
             
-            img_url = img_url.replace("230x230ex", "700x700ex")
-
-            # CSV에 기록될 데이터 출력
-            csv_data = [name_text, final_price, link, img_url]
-            print(f"[CSV 데이터] Name: {name_text}, Price: {final_price}, Link: {link}, Img_url: {img_url}")
-            
-            writer.writerow(csv_data)
-            # CSV 파일에 즉시 기록되도록 flush
-            if csvfile:
-                csvfile.flush()
-                print(f"[DEBUG] CSV 기록 완료: {name_text[:30]}...")
-
-            print(f"{page_num}페이지: {rank}위 {name_text} {final_price}, {link}")
-
-            link_list.append(link)
-            rank += 1
+            # HTML에 특정 키워드가 있는지 확인
+            keywords = ["상품", "product", "검색", "결과", "쿠팡", "coupang"]
+            found_keywords = [kw for kw in keywords if kw in html]
+            search_log.debug("HTML에 포함된 키워드: %s", found_keywords)
             
-        except Exception as e:
-            print(f"[DEBUG] 항목 {idx + 1} 처리 중 오류: {e}")
-            continue
-
-    if not link_list:
-        print("\n[DEBUG] 검색 결과를 찾지 못했습니다.")
-        print(f"[DEBUG] HTML 응답 길이: {len(html)} bytes")
-        print(f"[DEBUG] 응답 시작 부분 (처음 1000자):")
-        print("=" * 80)
-        print(html[:1000])
-        print("=" * 80)
-        
-        # HTML에 특정 키워드가 있는지 확인
-        keywords = ["상품", "product", "검색", "결과", "쿠팡", "coupang"]
-        found_keywords = [kw for kw in keywords if kw in html]
-        print(f"[DEBUG] HTML에 포함된 키워드: {found_keywords}")
-        
-        # title 태그 확인
-        title_tag = soup.find("title")
-        if title_tag:
-            print(f"[DEBUG] 페이지 제목: {title_tag.text}")
+            # title 태그 확인
+            title_tag = be.select_one(soup, "title")
+            if title_tag:
+                search_log.debug("페이지 제목: %s", be.text(title_tag))
         
     else:
-        print(f"[DEBUG] 페이지 {page_num}에서 {len(link_list)}개 링크 수집 완료")
-    
-    return link_list
+        search_log.debug("페이지 %s에서 %s개 링크 수집 완료", page_num, len(found))
 
+    if search_log.isEnabledFor(logging.DEBUG):
+        be.release(soup)
+    return found
 
-def pdp(url, csv_writer, lock, csvfile=None, index=None, total=None):
+
+def pdp(url, writer, index=None, total=None, html=None, keyword=""):
+    """
+    상세페이지 하나를 파싱해 CSV 쓰기 대기열(writer: RowWriter)에 넣음 (기록 후 journal에 URL 완료 기록)
+    """
     if index and total:
-        print(f"\n[PDP DEBUG] ({index}/{total}) 시작 - URL: {url}")
+        pdp_log.debug("(%s/%s) 시작 - URL: %s", index, total, url)
     else:
-        print(f"\n[PDP DEBUG] 시작 - URL: {url}")
+        pdp_log.debug("시작 - URL: %s", url)
     
-    try:
-        html = fetch_html_via_brightdata(url)
-        print(f"[PDP DEBUG] 전체 HTML 응답 길이: {len(html)} bytes")
-    except Exception as e:
-        print(f"[오류] PDP 페이지 HTML 가져오기 실패: {e}")
-        return
-    
-    # 전체 HTML을 파싱 후 필요한 부분만 추출 (최적화)
-    full_soup = BeautifulSoup(html, "html.parser")
-    prod_atf_content = full_soup.select_one(".prod-atf-contents")
+    # html이 주어지면(asyncio 엔진에서 미리 가져온 경우) 다시 요청하지 않음
+    if html is None:
+        try:
+            html = fetch_html_via_brightdata(url)
+        except Exception as e:
+            pdp_log.error("PDP 페이지 HTML 가져오기 실패: %s", e)
+            return
+    pdp_log.debug("전체 HTML 응답 길이: %s bytes", len(html))
     
-    if prod_atf_content:
-        # 필요한 부분만 사용하여 새로운 soup 생성
-        optimized_html = str(prod_atf_content)
-        print(f"[PDP DEBUG] 최적화된 HTML 길이: {len(optimized_html)} bytes (원본의 {len(optimized_html)/len(html)*100:.1f}%)")
-        soup = BeautifulSoup(optimized_html, "html.parser")
-        # 전체 soup도 유지하여 필요한 경우 폴백으로 사용
-        soup._full_soup = full_soup  # 폴백용 전체 soup 저장
+    # 필드 추출은 pdp_parser.py (저장된 HTML로 오프라인 벤치마크 가능)
+    # 파싱 프로세스 풀이 있으면 워커에 넘기고 바로 반환 (행 기록은 파싱이 끝난 뒤 풀의 결과 처리 스레드에서)
+    pool = parse_pool.get_pool()
+    if pool is not None:
+        future = pool.submit("parse_pdp", extract_pdp_row, html, url)
+        future.add_done_callback(lambda f: _record_pdp(f, url, writer, index, total, keyword))
+        return
+    with metrics.timer("parse_pdp"):
+        row_data = extract_pdp_row(html, url)
+    record_pdp_row(row_data, url, writer, index, total, keyword)
+
+
+async def pdp_async(url, writer, index=None, total=None, html=None, keyword=""):
+    """
+    asyncio 엔진용 pdp: 파싱 프로세스 풀의 자리를 이벤트 루프를 막지 않고 기다린 뒤 제출
+    풀이 없으면(또는 HTML을 아직 안 가져왔으면) pdp를 스레드에서 실행 - 파싱/요청이 이벤트 루프를 막지 않도록
+    """
+    pool = parse_pool.get_pool()
+    if pool is None or html is None:
+        await asyncio.to_thread(pdp, url, writer, index, total, html=html, keyword=keyword)
+        return
+    if index and total:
+        pdp_log.debug("(%s/%s) 시작 - URL: %s", index, total, url)
     else:
-        # .prod-atf-contents가 없으면 전체 soup 사용
-        print("[PDP DEBUG] .prod-atf-contents를 찾지 못했습니다. 전체 HTML 사용")
-        soup = full_soup
-    
-    print("[PDP DEBUG] BeautifulSoup 파싱 완료")
-
-    # 제목: h1.product-title span 기준
-    title_node = soup.select_one("h1.product-title span") or soup.select_one(".product-title, h1")
-    title = "" if not title_node else title_node.get_text(strip=True)
-    print(f"[PDP DEBUG] 제목 노드: {title_node}")
-    print(f"[PDP DEBUG] 제목: {title}")
-
-    # 가격: 최종 가격 .final-price-amount
-    sale_node = soup.select_one(".final-price-amount")
-    sale_price_text = "" if not sale_node else sale_node.get_text(strip=True)
-    print(f"[PDP DEBUG] 가격 노드: {sale_node}")
-    print(f"[PDP DEBUG] 가격: {sale_price_text}")
-
-    # 회원 할인가(없을 수 있음) -> 빈 문자열 유지
-    coupon_price_text = ""
-    print(f"[PDP DEBUG] 회원 할인가: {coupon_price_text}")
-
-    # 판매자: .seller-info a 텍스트
-    seller_node = soup.select_one(".seller-info a")
-    seller = "" if not seller_node else seller_node.get_text(strip=True)
-    print(f"[PDP DEBUG] 판매자 노드: {seller_node}")
-    print(f"[PDP DEBUG] 판매자: {seller}")
-
-    # 다른 판매자 수: 페이지 텍스트에서 '새 상품 (N)' 패턴 추출
-    prod_other_seller_count = ""
+        pdp_log.debug("시작 - URL: %s", url)
+    future = await pool.submit_async("parse_pdp", extract_pdp_row, html, url)
+    future.add_done_callback(lambda f: _record_pdp(f, url, writer, index, total, keyword))
+
+
+def _record_pdp(future, url, writer, index, total, keyword):
     try:
-        import re
-        page_text = soup.get_text(" ", strip=True)
-        m = re.search(r"새\s*상품\s*\((\d+)\)", page_text)
-        if m:
-            prod_other_seller_count = m.group(1)
-        print(f"[PDP DEBUG] 다른 판매자 수: {prod_other_seller_count}")
+        row_data = future.result()
     except Exception as e:
-        print(f"[PDP DEBUG] 다른 판매자 수 추출 실패: {e}")
-        prod_other_seller_count = ""
-
-    # 옵션: .option-picker-container 내부 첫 두 span (이름:값)
-    prod_option_item = ""
-    option_container = soup.select_one(".option-picker-container")
-    print(f"[PDP DEBUG] 옵션 컨테이너: {option_container}")
-    if option_container:
-        spans = option_container.select("span")
-        print(f"[PDP DEBUG] 옵션 스팬 개수: {len(spans)}")
-        if len(spans) >= 2:
-            key = spans[0].get_text(strip=True).rstrip(":")
-            val = spans[1].get_text(strip=True)
-            print(f"[PDP DEBUG] 옵션 키: '{key}', 값: '{val}'")
-            if key and val:
-                prod_option_item = f"{key}: {val}"
-    print(f"[PDP DEBUG] 최종 옵션: {prod_option_item}")
-
-    # 상세정보: .product-description li 리스트 합치기
-    # .prod-atf-contents 밖에 있을 수 있으므로 전체 soup에서도 검색
-    prod_description = ""
-    li_nodes = soup.select(".product-description li")
-    if not li_nodes and hasattr(soup, '_full_soup'):
-        # 최적화된 soup에서 찾지 못했으면 전체 soup에서 검색
-        li_nodes = soup._full_soup.select(".product-description li")
-        print(f"[PDP DEBUG] 상세정보 (전체 soup에서 검색): li 개수: {len(li_nodes)}")
-    else:
-        print(f"[PDP DEBUG] 상세정보 li 개수: {len(li_nodes)}")
-    if li_nodes:
-        prod_description = ", ".join([li.get_text(strip=True) for li in li_nodes])
-        print(f"[PDP DEBUG] 상세정보: {prod_description[:100]}..." if len(prod_description) > 100 else f"[PDP DEBUG] 상세정보: {prod_description}")
-    
-    print(f"[PDP DEBUG] 최종 데이터: title={title}, price={sale_price_text}, seller={seller}, options={prod_option_item}, description_len={len(prod_description)}")
-
-    # CSV 기록 (브랜드는 빈 문자열 유지) - 스레드 안전하게
-    row_data = [
-        "",
-        title or "",
-        sale_price_text or "",
-        coupon_price_text or "",
-        seller or "",
-        prod_other_seller_count or "",
-        prod_option_item or "",
-        prod_description or "",
-        url,
-    ]
-    print(f"[PDP DEBUG] CSV 쓰기: {len(row_data)}개 필드")
+        pdp_log.error("PDP 파싱 실패: %s - %s", url, e)
+        return
+    record_pdp_row(row_data, url, writer, index, total, keyword)
+
+
+def record_pdp_row(row_data, url, writer, index=None, total=None, keyword=""):
+    """
+    추출한 상세페이지 행을 CSV 쓰기 대기열에 넣음 (기록 후 journal에 URL 완료 기록)
+    """
+    _, title, sale_price_text, coupon_price_text, seller, prod_other_seller_count, prod_option_item, prod_description, _ = row_data
+    pdp_log.debug("CSV 쓰기: %s개 필드", len(row_data))
     
     # CSV에 기록될 데이터 출력
-    print(f"[CSV 데이터] 브랜드: '', 제품명: {title or ''}, 현재 판매가: {sale_price_text or ''}, "
-          f"회원 할인가: {coupon_price_text or ''}, 판매자: {seller or ''}, "
-          f"다른 판매자: {prod_other_seller_count or ''}, 옵션: {prod_option_item or ''}, "
-          f"상세정보: {prod_description[:50] if prod_description else ''}..., URL: {url}")
+    pdp_log.debug("CSV 데이터 - 브랜드: '', 제품명: %s, 현재 판매가: %s, 회원 할인가: %s, 판매자: %s, "
+                  "다른 판매자: %s, 옵션: %s, 상세정보: %.50s..., URL: %s",
+                  title, sale_price_text, coupon_price_text, seller,
+                  prod_other_seller_count, prod_option_item, prod_description, url)
     
-    lock.acquire()
-    try:
-        csv_writer.writerow(row_data)
-        # CSV 파일에 즉시 기록되도록 flush
-        if csvfile:
-            csvfile.flush()
-    finally:
-        lock.release()
+    # 쓰기 스레드가 배치로 기록하고, 디스크에 반영한 뒤 완료 기록 (이어하기 시 이 URL은 건너뜀)
+    writer.submit(
+        [row_data],
+        # Parquet/SQLite 출력에는 키워드와 함께 전달 (가격/판매자 수는 각 출력이 숫자로 변환)
+        [(keyword, row_data)],
+        key=url,
+    )
+    metrics.incr("pdp_ok")
+    # 첫 PDP 행까지 걸린 시간 (파이프라인 효과 확인용)
+    metrics.mark_first("first_pdp_row")
     if index and total:
-        print(f"[PDP DEBUG] ({index}/{total}) CSV 기록 완료")
+        pdp_log.debug("(%s/%s) CSV 기록 요청", index, total)
     else:
-        print("[PDP DEBUG] CSV 기록 완료")
-
-
-# 프로그램 시작 시간 기록
-start_time = datetime.now()
-print(f"프로그램 시작: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
-
-keyword = input("Enter product: ")
-page_num = 1
-
-link_list = []
-
-with open(
-    f"coupang_discovery_{keyword}.csv", "w", newline="", encoding="utf-8"
-) as csvfile:
-    writer = csv.writer(csvfile)
-    writer.writerow(["Name", "Price", "Link", "Img_url"])
-    csvfile.flush()  # 헤더도 즉시 기록
-    # 1 페이지만 스크랩
-    for page_num in range(1, 2):
-        encoded_keyword = quote(keyword, safe="")
-        searchProductListSize = 36
-        url = f"https://www.coupang.com/np/search?component=&q={encoded_keyword}&page={page_num}&listSize={searchProductListSize}"
-        if not page_num:
-            break
-        print("page_num:", page_num)
-        link_list += find_list(page_num, url, writer, csvfile)
-
-print("link_list:", link_list)
-
-print(f"{len(link_list)}개 {keyword} 상제페이지 스크랩 시작")
-print()
-
-# 멀티스레드로 PDP 스크랩
-with open(f"coupang_pdp_{keyword}.csv", "w", newline="", encoding="utf-8") as csvfile:
-    writer = csv.writer(csvfile)
-    writer.writerow(
-        ["브랜드", "제품명", "현재 판매가", "회원 할인가", "판매자", "다른 판매자", "옵션", "상세정보", "URL"]
+        pdp_log.debug("CSV 기록 요청")
+
+
+def run(keyword, resume=False, links_csv=None, link_column="Link", output_dir="."):
+    """
+    키워드 하나의 검색 결과 + 상세페이지 수집 (cli.py search), 실행 리포트(dict) 반환
+    links_csv가 주어지면 검색 없이 그 CSV의 link_column 링크들의 상세페이지만 수집 (cli.py pdp)
+    resume: 중단된 실행 이어하기 (수집된 검색 결과 재사용, 완료된 PDP URL 건너뜀)
+    """
+    # 경고를 무시
+    warnings.filterwarnings(
+        "ignore", category=requests.packages.urllib3.exceptions.InsecureRequestWarning
     )
-    csvfile.flush()  # 헤더도 즉시 기록
-    
-    # 스레드 안전을 위한 Lock
-    lock = threading.Lock()
-    
-    # 4개의 워커 스레드로 병렬 처리
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        futures = []
-        for e, url in enumerate(link_list, 1):
-            print(f"작업 큐에 추가: {e}/{len(link_list)} - {url}")
-            future = executor.submit(pdp, url, writer, lock, csvfile, e, len(link_list))
-            futures.append(future)
-        
-        # 완료된 작업 확인
-        for future in as_completed(futures):
-            try:
-                future.result()
-            except Exception as e:
-                print(f"[오류] 작업 실행 중 예외 발생: {e}")
-
-# 프로그램 종료 시간 및 소요 시간 계산
-end_time = datetime.now()
-elapsed_time = end_time - start_time
-print(f"\n프로그램 종료: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
-print(f"총 소요 시간: {elapsed_time}")
\ No newline at end of file
+
+    # 로그 설정 (COUPANG_LOG_LEVEL, COUPANG_LOG_LEVELS)
+    setup_logging()
+    # 파싱 프로세스 풀(COUPANG_PARSE_POOL=on)의 워커를 수집 시작 전에 미리 띄움
+    parse_pool.get_pool()
+
+    # 프로그램 시작 시간 기록
+    start_time = datetime.now()
+    log.info("프로그램 시작: %s", start_time.strftime('%Y-%m-%d %H:%M:%S'))
+
+    page_num = 1
+
+    link_list = []
+
+    # 검색 페이지 1..COUPANG_SEARCH_PAGES (기본 1페이지), 짧은/빈 페이지가 나오면 그 뒤 페이지는 요청하지 않음
+    def search_page_url(page_num):
+        return build_search_url(keyword, page_num)
+
+    os.makedirs(output_dir, exist_ok=True)
+    discovery_csv = os.path.join(output_dir, f"coupang_discovery_{keyword}.csv")
+    pdp_csv = os.path.join(output_dir, f"coupang_pdp_{keyword}.csv")
+
+    if links_csv is not None:
+        # 검색 없이 주어진 CSV의 링크만 수집 (검색 단계가 끝난 이어하기와 같은 경로)
+        search_journal = None
+        search_done = True
+    else:
+        search_journal = checkpoint.Journal(checkpoint.journal_path(discovery_csv), resume=resume)
+        # 이어하기: 검색 단계 전체가 완료 기록되어 있으면 다시 검색하지 않고 저장된 링크 사용
+        # (몇 페이지까지 있는지는 검색해 봐야 알 수 있으므로 페이지별이 아닌 단계 완료 기록으로 판단)
+        search_done = resume and search_journal.is_done("search")
+        links_csv, link_column = discovery_csv, "Link"
+    if search_done and streaming.enabled():
+        # 스트리밍 모드: 링크 CSV를 목록으로 읽지 않고 PDP 요청 직전에 한 줄씩 읽음 (중복은 pdp_dedup이 제거)
+        link_list = streaming.Counted(checkpoint.iter_column(links_csv, link_column))
+        log.info("검색 결과 링크를 한 줄씩 읽어 사용 (%s)", links_csv)
+    elif search_done:
+        link_list = checkpoint.read_column(links_csv, link_column)
+        log.info("검색 결과 %s개 링크 사용 (%s)", len(link_list), links_csv)
+    else:
+        # 새로 검색: 검색 결과 CSV와 journal을 새로 작성
+        search_journal.close()
+        search_journal = checkpoint.Journal(checkpoint.journal_path(discovery_csv))
+
+    # 스트리밍 모드면 이번 실행의 완료 URL은 journal 파일에만 기록 (메모리에 쌓지 않음)
+    pdp_journal = checkpoint.Journal(checkpoint.journal_path(pdp_csv), resume=resume,
+                                     keep_status=not streaming.enabled())
+    pdp_done = set()
+    if resume:
+        # journal 또는 PDP CSV에 이미 있는 URL은 건너뜀
+        pdp_done = pdp_journal.done_keys() | set(checkpoint.read_column(pdp_csv, "URL"))
+    # 같은 상품(광고/일반 슬롯, 여러 페이지에 중복 노출)은 표준 URL로 한 번만 요청 (이어하기 완료분도 제외)
+    pdp_dedup = ProductDedup(pdp_done)
+    # 증분 수집(COUPANG_INCREMENTAL=on): 이전 실행 스냅샷과 같고 PDP가 오래되지 않은 상품은 요청하지 않음
+    snapshots = result_store.open_snapshots(start_time.timestamp())
+    search_items = []
+
+    def select_pdp_links(items):
+        """
+        이번 실행에서 PDP를 요청할 표준 URL 목록 (중복 제거 후, 증분 수집이면 새 상품/바뀐 상품/오래된 PDP만)
+        """
+        selected = []
+        for item in items:
+            canonical = pdp_dedup.claim(item.link)
+            if canonical and (snapshots is None or snapshots.needs_pdp(item)):
+                selected.append(canonical)
+        return selected
+
+    pdp_links = []
+    pdp_total = None
+
+    # PDP 결과 CSV (이어하기면 기존 CSV에 이어쓰기) - 파이프라인 모드에서는 검색과 동시에 기록
+    with checkpoint.open_output_csv(pdp_csv, PDP_HEADER, resume) as pdp_file:
+        # 전용 쓰기 스레드가 배치로 기록 (작업 스레드/이벤트 루프는 파일 I/O를 기다리지 않음)
+        pdp_parquet = columnar.open_sink(pdp_csv, "pdp", resume)
+        pdp_store = result_store.open_store("pdp", "main", start_time.timestamp())
+        pdp_writer = RowWriter(pdp_file, (pdp_parquet, pdp_store), journal=pdp_journal)
+
+        def _on_pdp_page(index, url, html, error):
+            if error is not None:
+                log.error("PDP 페이지 HTML 가져오기 실패: %s", error)
+                return None
+            if FETCH_ENGINE == "async":
+                # 이벤트 루프에서 호출됨 - 코루틴을 돌려주면 fetch_all/파이프라인이 await
+                return pdp_async(url, pdp_writer, index, pdp_total, html=html, keyword=keyword)
+            pdp(url, pdp_writer, index, pdp_total, html=html, keyword=keyword)
+            return None
+
+        if FETCH_ENGINE != "async":
+            # 워커 스레드 수만큼 keep-alive 커넥션 풀 준비
+            brightdata.get_transport(pool_size=MAX_WORKERS)
+
+        if not search_done:
+            with checkpoint.open_output_csv(discovery_csv, ["Name", "Price", "Link", "Img_url"]) as csvfile:
+                search_store = result_store.open_store("search", "main", start_time.timestamp())
+                writer = RowWriter(csvfile, search_store, journal=search_journal)
+
+                search_failed = []
+
+                def _search_page(page_num, url, html, error, parsed=None):
+                    """
+                    검색 페이지 하나 처리: (링크 목록, 다음 페이지 필요 여부)
+                    """
+                    if error is not None:
+                        log.error("페이지 %s HTML 가져오기 실패: %s", page_num, error)
+                        search_failed.append(page_num)
+                        return [], False
+                    search_log.debug("page_num: %s", page_num)
+                    stats = {}
+                    page_items = find_list(page_num, url, writer, html=html, stats=stats, keyword=keyword,
+                                           full=search_store is not None, parsed=parsed)
+                    search_items.extend(page_items)
+                    link_list.extend(item.link for item in page_items)
+                    # 한 페이지 크기보다 적게 나오면 마지막 페이지
+                    more = stats.get("items", 0) >= paging.PAGE_SIZE
+                    if not more and page_num < paging.MAX_PAGES:
+                        search_log.info("페이지 %s: 항목 %s개 - 마지막 페이지로 보고 이후 페이지 요청 중단",
+                                        page_num, stats.get("items", 0))
+                    return page_items, more
+
+                async def _search_page_async(page_num, url, html, error):
+                    # asyncio 엔진: 파싱 프로세스 풀의 결과를 이벤트 루프를 막지 않고 기다린 뒤 처리
+                    parsed = None if error is not None else await parse_listing_async(html, search_store is not None)
+                    return _search_page(page_num, url, html, error, parsed)
+
+                if PIPELINE == "on":
+                    # 검색 페이지에서 링크가 나오는 즉시 PDP 대기열로 전달 (대기열이 차면 검색 단계가 기다림)
+                    def _queue_links(page_items, more):
+                        new_links = select_pdp_links(page_items)
+                        pdp_links.extend(new_links)
+                        return new_links, more
+
+                    def _on_search_page(page_num, url, html, error):
+                        return _queue_links(*_search_page(page_num, url, html, error))
+
+                    async def _on_search_page_async(page_num, url, html, error):
+                        return _queue_links(*await _search_page_async(page_num, url, html, error))
+
+                    log.info("검색→PDP 파이프라인 시작: 검색 최대 %s페이지 (동시 요청 상한 %s개)", paging.MAX_PAGES, DEFAULT_CONCURRENCY)
+                    pipeline.run_pipeline(search_page_url,
+                                          _on_search_page_async if FETCH_ENGINE == "async" else _on_search_page,
+                                          _on_pdp_page, engine=FETCH_ENGINE,
+                                          fetch=fetch_html_via_brightdata, workers=MAX_WORKERS)
+                else:
+                    # 페이지들을 window개씩 동시에 가져오되, 링크는 페이지 순서대로 합침
+                    async def _more_async(*page):
+                        return (await _search_page_async(*page))[1]
+
+                    paging.fetch_pages(search_page_url,
+                                       _more_async if FETCH_ENGINE == "async" else lambda *page: _search_page(*page)[1],
+                                       engine=FETCH_ENGINE, fetch=fetch_html_via_brightdata)
+                if not search_failed:
+                    # 모든 페이지 행이 기록된 뒤 검색 단계 완료 기록 (쓰기 대기열은 순서대로 처리)
+                    writer.submit(key="search", links=len(link_list))
+                writer.close()
+                if search_store is not None:
+                    search_store.close()
+        if search_journal is not None:
+            search_journal.close()
+
+        log.debug("link_list: %s", link_list)
+
+        if search_done or PIPELINE != "on":
+            # 검색 완료 후 PDP 일괄 수집
+            # 이어하기로 검색을 건너뛴 경우 목록 값(스냅샷 비교 대상)이 없으므로 중복 제거만
+            if search_done and streaming.enabled():
+                # 스트리밍 모드: 요청할 때마다 한 줄씩 읽고 claim (전체 개수는 미리 알 수 없음)
+                pdp_links = streaming.Counted(pdp_dedup.iter_claims(link_list))
+                log.info("%s 상세페이지 스크랩 시작 (스트리밍, 동시 제출 상한 %s개)", keyword, streaming.STREAM_WINDOW)
+            else:
+                pdp_links = pdp_dedup.claim_all(link_list) if search_done else select_pdp_links(search_items)
+                pdp_total = len(pdp_links)
+                log.info("%s개 %s 상제페이지 스크랩 시작", len(pdp_links), keyword)
+
+            if FETCH_ENGINE == "async":
+                # asyncio 엔진: 요청당 스레드 대신 코루틴, 동시 요청 수는 rate_control이 조정
+                if pdp_total is not None:
+                    log.info("PDP %s개 동시 수집 시작 (동시 요청 상한 %s개)", pdp_total, DEFAULT_CONCURRENCY)
+                fetch_all(pdp_links, _on_pdp_page)
+            else:
+                # 워커 스레드로 병렬 처리 (끝나지 않은 작업이 STREAM_WINDOW개면 하나가 끝난 뒤 다음 URL 제출)
+                with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                    streaming.submit_bounded(executor, pdp, (
+                        (url, pdp_writer, e, pdp_total, None, keyword) for e, url in enumerate(pdp_links, 1)
+                    ))
+
+        # 진행 중인 파싱 결과까지 대기열에 넣은 뒤, 남은 배치 기록 후 쓰기 스레드 종료
+        parse_pool.wait()
+        pdp_writer.close()
+        for sink in (pdp_parquet, pdp_store):
+            if sink is not None:
+                sink.close()
+
+    if resume:
+        log.info("이어하기: PDP 완료 %s개 건너뜀", pdp_dedup.already_done)
+    if snapshots is not None:
+        log.info("증분 수집: 새 상품 %(new)s개, 변경 %(changed)s개, PDP 갱신 %(stale)s개 요청 / 변경 없음 %(unchanged)s개 건너뜀",
+                 snapshots.counts)
+        snapshots.close()
+    pdp_journal.close()
+    parse_pool.shutdown()
+
+    # 프로그램 종료 시간 및 소요 시간 계산
+    end_time = datetime.now()
+    elapsed_time = end_time - start_time
+    log.info("프로그램 종료: %s", end_time.strftime('%Y-%m-%d %H:%M:%S'))
+    log.info("총 소요 시간: %s", elapsed_time)
+
+    # 스트리밍 모드의 이어하기는 목록 대신 읽은 줄 수로 집계
+    link_count = link_list.count if isinstance(link_list, streaming.Counted) else len(link_list)
+    pdp_count = pdp_links.count if isinstance(pdp_links, streaming.Counted) else len(pdp_links)
+
+    # 단계별 소요 시간(p50/p95/p99)과 재시도/실패/수신 바이트 카운터 리포트
+    report_json = os.path.join(output_dir, f"coupang_run_report_{keyword}.json")
+    report = metrics.METRICS.write_report(report_json, extra={
+        "entry": "main",
+        "keyword": keyword,
+        "links": link_count,
+        "pdp_unique": pdp_dedup.claimed,
+        "pdp_deduped": pdp_dedup.deduped,
+        "pdp_skipped": link_count - pdp_count,
+        "incremental": snapshots.counts if snapshots is not None else None,
+        "pipeline": PIPELINE == "on" and not search_done,
+        "fetch_engine": FETCH_ENGINE,
+        "final_concurrency_limit": int(rate_control.get_limiter().limit),
+    })
+    log.info("실행 리포트: %s", report_json)
+    return report
+
+
+if __name__ == "__main__":
+    # 인자 정의는 통합 CLI(cli.py)와 공유: python main.py [키워드] [--resume] == python cli.py search ...
+    import cli
+
+    cli.main(["search"] + sys.argv[1:])
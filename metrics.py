@@ -0,0 +1,185 @@
+import json
+import math
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# 실행 종료 시 Prometheus 텍스트 포맷 파일도 남기려면 경로 지정 (node_exporter textfile collector 등)
+PROMETHEUS_FILE = os.getenv("COUPANG_PROMETHEUS_FILE", "")
+
+QUANTILES = (0.5, 0.95, 0.99)
+# 단계별로 보관할 소요 시간 표본 수 상한 (넘으면 reservoir sampling - count/sum/max는 전체 기준 그대로)
+# 요청이 수십만 건이어도 메모리가 늘지 않도록, 0이면 전부 보관
+MAX_SAMPLES = int(os.getenv("COUPANG_METRICS_MAX_SAMPLES", "100000"))
+
+
+def _percentile(sorted_samples, q):
+    # nearest-rank 방식
+    if not sorted_samples:
+        return 0.0
+    idx = max(0, math.ceil(q * len(sorted_samples)) - 1)
+    return sorted_samples[idx]
+
+
+def _summarize(samples, totals):
+    summary = {}
+    for name, values in samples.items():
+        count, total, largest = totals[name]
+        stats = {
+            "count": count,
+            "sum": round(total, 6),
+            "mean": round(total / count, 6) if count else 0.0,
+            "max": round(largest, 6) if count else 0.0,
+        }
+        for q in QUANTILES:
+            stats[f"p{int(q * 100)}"] = round(_percentile(values, q), 6)
+        summary[name] = stats
+    return summary
+
+
+class Metrics:
+    """
+    단계별 소요 시간(히스토그램), 시간이 아닌 관측값, 카운터를 모으는 스레드 안전 수집기
+    - 단계(초): fetch, parse_search, parse_pdp, csv_write, rate_wait 등 - observe/timer
+    - 관측값(단위 없음): queue_depth, write_batch_items 등 - observe_value (소요 시간 통계와 섞지 않음)
+    - 카운터: fetch_retries, fetch_failures, bytes_received, cache_hits 등
+    """
+
+    def __init__(self, max_samples=MAX_SAMPLES):
+        self._lock = threading.Lock()
+        self.max_samples = max_samples
+        self._samples = {}
+        # 단계별 [count, sum, max] (표본을 덜어내도 전체 기준으로 유지)
+        self._totals = {}
+        # observe_value로 받은 시간이 아닌 관측값 (구조는 단계와 같음)
+        self._value_samples = {}
+        self._value_totals = {}
+        self._random = random.Random(0)
+        self._counters = {}
+        self._marks = {}
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+
+    def _record(self, all_samples, all_totals, name, value):
+        with self._lock:
+            totals = all_totals.get(name)
+            if totals is None:
+                totals = all_totals[name] = [0, 0.0, value]
+                all_samples[name] = []
+            totals[0] += 1
+            totals[1] += value
+            if value > totals[2]:
+                totals[2] = value
+            samples = all_samples[name]
+            if not self.max_samples or len(samples) < self.max_samples:
+                samples.append(value)
+            else:
+                # reservoir sampling: 지금까지의 관측값 중 균등하게 max_samples개 유지
+                idx = self._random.randrange(totals[0])
+                if idx < self.max_samples:
+                    samples[idx] = value
+
+    def observe(self, stage, seconds):
+        self._record(self._samples, self._totals, stage, seconds)
+
+    def observe_value(self, name, value):
+        """
+        소요 시간이 아닌 관측값 기록 (대기열 길이, 배치 크기 등) - 리포트의 values, Prometheus에서는 coupang_<name>
+        """
+        self._record(self._value_samples, self._value_totals, name, value)
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def mark_first(self, name):
+        """
+        name 사건이 처음 일어난 시점(시작 후 경과 초) 기록 - 예: 첫 PDP 행 기록까지 걸린 시간
+        """
+        if name in self._marks:
+            return
+        with self._lock:
+            self._marks.setdefault(name, round(time.perf_counter() - self._started, 3))
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def snapshot(self):
+        """
+        현재까지의 통계 (단계별/관측값별 count/sum/mean/max/p50/p95/p99, 카운터)
+        """
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self._samples.items()}
+            totals = {stage: tuple(values) for stage, values in self._totals.items()}
+            value_samples = {name: sorted(values) for name, values in self._value_samples.items()}
+            value_totals = {name: tuple(values) for name, values in self._value_totals.items()}
+            counters = dict(self._counters)
+            marks = dict(self._marks)
+        return {
+            "stages": _summarize(samples, totals),
+            "values": _summarize(value_samples, value_totals),
+            "counters": counters,
+            "marks": marks,
+        }
+
+    def write_report(self, path, extra=None, prometheus_path=None):
+        """
+        JSON 실행 리포트 기록 (prometheus_path 또는 COUPANG_PROMETHEUS_FILE이 있으면 텍스트 포맷도 기록)
+        """
+        snap = self.snapshot()
+        finished_at = time.time()
+        report = {
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            "finished_at": datetime.fromtimestamp(finished_at).isoformat(timespec="seconds"),
+            "elapsed_seconds": round(finished_at - self.started_at, 3),
+            **(extra or {}),
+            **snap,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        prometheus_path = prometheus_path or PROMETHEUS_FILE
+        if prometheus_path:
+            with open(prometheus_path, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus(snap))
+        return report
+
+    def to_prometheus(self, snap=None):
+        snap = snap or self.snapshot()
+        lines = [
+            "# HELP coupang_stage_seconds Per-stage latency of the crawler.",
+            "# TYPE coupang_stage_seconds summary",
+        ]
+        for stage, stats in sorted(snap["stages"].items()):
+            for q in QUANTILES:
+                lines.append(f'coupang_stage_seconds{{stage="{stage}",quantile="{q}"}} {stats[f"p{int(q * 100)}"]}')
+            lines.append(f'coupang_stage_seconds_sum{{stage="{stage}"}} {stats["sum"]}')
+            lines.append(f'coupang_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        for name, stats in sorted(snap["values"].items()):
+            lines.append(f"# TYPE coupang_{name} summary")
+            for q in QUANTILES:
+                lines.append(f'coupang_{name}{{quantile="{q}"}} {stats[f"p{int(q * 100)}"]}')
+            lines.append(f"coupang_{name}_sum {stats['sum']}")
+            lines.append(f"coupang_{name}_count {stats['count']}")
+        for name, value in sorted(snap["counters"].items()):
+            lines.append(f"# TYPE coupang_{name}_total counter")
+            lines.append(f"coupang_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+
+# 프로세스 전체에서 공유하는 수집기
+METRICS = Metrics()
+observe = METRICS.observe
+observe_value = METRICS.observe_value
+incr = METRICS.incr
+mark_first = METRICS.mark_first
+timer = METRICS.timer
+
@@ -0,0 +1,185 @@
+import asyncio
+import inspect
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import aiohttp
+
+import metrics
+import rate_control
+import streaming
+from async_fetch import fetch_html_async
+from log_setup import get_logger
+
+log = get_logger("search")
+
+# 검색 결과 한 페이지 크기 (listSize) - 이보다 적게 나오면 마지막 페이지
+PAGE_SIZE = 36
+# 키워드당 최대 검색 페이지 수 (기본 1 = 기존과 동일하게 1페이지만)
+MAX_PAGES = int(os.getenv("COUPANG_SEARCH_PAGES", "1"))
+# 한 키워드에서 동시에 요청할 페이지 수 (끝 페이지를 지나 낭비되는 요청은 최대 이 값 - 1)
+PAGE_WINDOW = int(os.getenv("COUPANG_PAGE_WINDOW", "3"))
+
+
+async def fetch_pages_async(session, page_url, on_page, max_pages=MAX_PAGES, window=PAGE_WINDOW, **fetch_kwargs):
+    """
+    page_url(page)로 1..max_pages 페이지를 최대 window개씩 동시에 가져오고
+    on_page(page, url, html, error)를 페이지 순서대로 호출 (코루틴이면 await)
+    on_page가 거짓을 돌려주면(짧은/빈 페이지, 오류) 그 뒤 페이지는 요청하지 않고 진행 중인 요청도 취소
+    반환: on_page에 전달한 페이지 수
+    """
+    last = max_pages
+    next_page = 1
+    next_deliver = 1
+    pending = {}
+    ready = {}
+    try:
+        while next_deliver <= last:
+            while next_page <= last and len(pending) < window:
+                url = page_url(next_page)
+                task = asyncio.ensure_future(fetch_html_async(session, url, **fetch_kwargs))
+                pending[task] = (next_page, url)
+                next_page += 1
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                page, url = pending.pop(task)
+                error = task.exception()
+                ready[page] = (url, None if error else task.result(), error)
+
+            # 순서대로 전달해야 "짧은 페이지 이후는 버림"과 순위 순서가 보장됨
+            while next_deliver in ready and next_deliver <= last:
+                url, html, error = ready.pop(next_deliver)
+                more = on_page(next_deliver, url, html, error)
+                if inspect.isawaitable(more):
+                    more = await more
+                if not more:
+                    last = next_deliver
+                next_deliver += 1
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            metrics.incr("pages_cancelled", len(pending))
+    metrics.incr("pages_skipped", max(0, max_pages - last))
+    return last
+
+
+def _fetch_pages_inline(page_url, on_page, fetch, max_pages):
+    # 한 번에 한 페이지씩이면 스레드 없이 호출한 스레드에서 바로 요청
+    last = max_pages
+    for page in range(1, max_pages + 1):
+        url = page_url(page)
+        try:
+            html, error = fetch(url), None
+        except Exception as e:
+            html, error = None, e
+        if not on_page(page, url, html, error):
+            last = page
+            break
+    metrics.incr("pages_skipped", max(0, max_pages - last))
+    return last
+
+
+_page_executor = None
+_page_executor_lock = threading.Lock()
+
+
+def get_page_executor():
+    """
+    스레드 엔진에서 키워드들이 공유하는 페이지 요청용 스레드 풀 (키워드마다 풀을 만들지 않음)
+    """
+    global _page_executor
+    with _page_executor_lock:
+        if _page_executor is None:
+            _page_executor = ThreadPoolExecutor(max_workers=rate_control.MAX_CONCURRENCY, thread_name_prefix="page")
+        return _page_executor
+
+
+def fetch_pages_threaded(page_url, on_page, fetch, max_pages=MAX_PAGES, window=PAGE_WINDOW, executor=None):
+    """
+    fetch_pages_async의 스레드 버전 (fetch(url)로 HTML을 가져오는 동기 함수 사용)
+    - 동시에 요청할 페이지가 하나뿐이면(max_pages 또는 window가 1) 호출한 스레드에서 순서대로 요청
+    - 아니면 executor(기본: get_page_executor의 공유 풀)에 페이지 요청을 넣음
+    """
+    if min(window, max_pages) <= 1:
+        return _fetch_pages_inline(page_url, on_page, fetch, max_pages)
+    executor = executor or get_page_executor()
+    last = max_pages
+    next_page = 1
+    next_deliver = 1
+    pending = {}
+    ready = {}
+    try:
+        while next_deliver <= last:
+            while next_page <= last and len(pending) < window:
+                url = page_url(next_page)
+                pending[executor.submit(fetch, url)] = (next_page, url)
+                next_page += 1
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                page, url = pending.pop(future)
+                error = future.exception()
+                ready[page] = (url, None if error else future.result(), error)
+
+            while next_deliver in ready and next_deliver <= last:
+                url, html, error = ready.pop(next_deliver)
+                if not on_page(next_deliver, url, html, error):
+                    last = next_deliver
+                next_deliver += 1
+    finally:
+        # 이미 시작된 요청은 끝까지 진행되지만 결과는 버림
+        for future in pending:
+            future.cancel()
+        if pending:
+            metrics.incr("pages_cancelled", len(pending))
+    metrics.incr("pages_skipped", max(0, max_pages - last))
+    return last
+
+
+def fetch_pages(page_url, on_page, engine="async", fetch=None, max_pages=MAX_PAGES, window=PAGE_WINDOW, **fetch_kwargs):
+    """
+    동기 코드에서 호출하는 진입점 (engine: "async" 또는 "thread")
+    """
+    if engine != "async":
+        return fetch_pages_threaded(page_url, on_page, fetch, max_pages, window)
+
+    async def _run():
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=rate_control.MAX_CONCURRENCY)) as session:
+            return await fetch_pages_async(session, page_url, on_page, max_pages, window, **fetch_kwargs)
+
+    return asyncio.run(_run())
+
+
+def fetch_pages_for_keys(keys, page_url, on_page, on_done, max_pages=MAX_PAGES, window=PAGE_WINDOW,
+                         concurrency=rate_control.MAX_CONCURRENCY, **fetch_kwargs):
+    """
+    asyncio 엔진으로 여러 키에 대해 fetch_pages_async를 동시에 실행
+    - page_url(key, page), on_page(key, page, url, html, error) -> 다음 페이지 필요 여부
+    - 키의 모든 페이지가 끝나면 on_done(key, error) 호출 (on_page 예외도 error로 전달)
+    - keys는 이터레이터여도 됨 - 동시에 진행하는 키는 streaming.STREAM_WINDOW개까지만 꺼냄
+    """
+
+    async def _run():
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+
+            async def _one(key):
+                try:
+                    await fetch_pages_async(
+                        session,
+                        lambda page: page_url(key, page),
+                        lambda page, url, html, error: on_page(key, page, url, html, error),
+                        max_pages, window, **fetch_kwargs,
+                    )
+                    error = None
+                except Exception as e:
+                    error = e
+                try:
+                    on_done(key, error)
+                except Exception as e:
+                    log.error("작업 실행 중 예외 발생: %s", e)
+
+            await streaming.run_bounded_async(keys, _one)
+
+    asyncio.run(_run())
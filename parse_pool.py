@@ -0,0 +1,172 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import metrics
+from log_setup import get_logger
+
+log = get_logger("parser")
+
+# 파싱 전용 프로세스 풀: "on"이면 HTML 파싱을 별도 프로세스에서 실행 (I/O 스레드/이벤트 루프는 GIL을 잡지 않음)
+# "off"(기본)면 기존처럼 HTML을 받은 스레드/코루틴에서 바로 파싱
+PARSE_POOL = os.getenv("COUPANG_PARSE_POOL", "off")
+# 파싱 프로세스 수 (0이면 CPU 수)
+PARSE_WORKERS = int(os.getenv("COUPANG_PARSE_WORKERS", "0")) or os.cpu_count() or 1
+# 대기 + 진행 중 파싱 작업 상한 (0이면 프로세스 수 x 4) - 가득 차면 I/O 쪽이 기다림 (backpressure)
+PARSE_QUEUE = int(os.getenv("COUPANG_PARSE_QUEUE", "0")) or PARSE_WORKERS * 4
+# 워커 시작 방식: forkserver(지원하는 플랫폼) 또는 플랫폼 기본값 - fork는 부모의 스레드/aiohttp/sqlite 핸들을
+# 그대로 복제하므로 쓰지 않음 (macOS에서는 fork 자체가 안전하지 않음)
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else None
+
+
+def _init_worker():
+    # Ctrl+C는 부모 프로세스만 처리 (부모가 기록/journal을 정리한 뒤 풀을 종료)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _timed(func, args, kwargs):
+    # 워커에서 잰 파싱 시간을 결과와 함께 돌려줌 (워커의 metrics는 부모에 합쳐지지 않으므로)
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+class ParsePool:
+    """
+    I/O 단계(요청 스레드/코루틴)와 파싱 단계를 분리하는 프로세스 풀
+    - 대기 작업이 max_pending개면 자리가 날 때까지 기다림 (I/O 단계가 파싱보다 앞서 나가지 않음)
+      스레드는 submit()/run(), 코루틴은 submit_async()/run_async() - 코루틴은 이벤트 루프를 막지 않고 기다림
+    - 파싱 함수와 인자/결과는 pickle 가능해야 함 (search_parser/pdp_parser의 모듈 수준 함수)
+    - 워커는 START_METHOD(forkserver 또는 플랫폼 기본값)로 생성 시 모두 띄움
+    """
+
+    def __init__(self, workers=PARSE_WORKERS, max_pending=PARSE_QUEUE):
+        self.workers = workers
+        self.max_pending = max(1, max_pending)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD), initializer=_init_worker,
+        )
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        # 이벤트 루프별 자리 (asyncio.Semaphore는 만든 루프에서만 쓸 수 있으므로 루프마다 하나)
+        self._async_slots = weakref.WeakKeyDictionary()
+        self._idle = threading.Condition()
+        self._pending = 0
+        # 첫 submit에서 워커를 띄우므로 여기서 미리 띄움 (첫 페이지 파싱이 워커 시작을 기다리지 않도록)
+        self._executor.submit(int).result()
+
+    def submit(self, stage, func, *args, **kwargs):
+        """
+        func(*args, **kwargs)를 워커에서 실행하는 Future 반환 (stage: 파싱 시간을 기록할 metrics 단계 이름)
+        자리가 없으면 호출한 스레드가 기다림 - 이벤트 루프에서는 submit_async 사용
+        Future의 완료 콜백은 풀의 결과 처리 스레드에서 실행됨
+        """
+        wait_start = time.perf_counter()
+        self._slots.acquire()
+        metrics.observe("parse_queue_wait", time.perf_counter() - wait_start)
+        return self._submit(stage, func, args, kwargs, self._slots.release)
+
+    async def submit_async(self, stage, func, *args, **kwargs):
+        """
+        submit의 코루틴 버전 - 자리가 날 때까지 이벤트 루프를 막지 않고 기다린 뒤 Future 반환
+        """
+        loop = asyncio.get_running_loop()
+        slots = self._async_slots.get(loop)
+        if slots is None:
+            slots = self._async_slots[loop] = asyncio.Semaphore(self.max_pending)
+        wait_start = time.perf_counter()
+        await slots.acquire()
+        metrics.observe("parse_queue_wait", time.perf_counter() - wait_start)
+
+        def _release():
+            # 결과 처리 스레드에서 호출되므로 루프 스레드로 넘겨 반납 (루프가 이미 끝났으면 반납할 곳이 없음)
+            try:
+                loop.call_soon_threadsafe(slots.release)
+            except RuntimeError:
+                pass
+
+        return self._submit(stage, func, args, kwargs, _release)
+
+    def _submit(self, stage, func, args, kwargs, release):
+        with self._idle:
+            self._pending += 1
+        outer = Future()
+
+        def _done(inner):
+            try:
+                result, seconds = inner.result()
+            except BaseException as e:
+                outer.set_exception(e)
+            else:
+                metrics.observe(stage, seconds)
+                outer.set_result(result)
+            finally:
+                # outer의 완료 콜백(행 기록 요청 등)까지 끝난 뒤 자리 반납
+                release()
+                with self._idle:
+                    self._pending -= 1
+                    self._idle.notify_all()
+
+        self._executor.submit(_timed, func, args, kwargs).add_done_callback(_done)
+        return outer
+
+    def run(self, stage, func, *args, **kwargs):
+        """
+        submit 후 결과를 기다림 (스레드에서 호출 - 기다리는 동안 GIL을 잡지 않음)
+        """
+        return self.submit(stage, func, *args, **kwargs).result()
+
+    async def run_async(self, stage, func, *args, **kwargs):
+        """
+        코루틴에서 결과를 기다림 (자리를 기다리는 동안과 파싱하는 동안 이벤트 루프는 다른 요청을 계속 처리)
+        """
+        return await asyncio.wrap_future(await self.submit_async(stage, func, *args, **kwargs))
+
+    def wait(self):
+        """
+        제출한 파싱 작업과 그 완료 콜백이 모두 끝날 때까지 대기 (쓰기 스레드를 닫기 전에 호출)
+        """
+        with self._idle:
+            self._idle.wait_for(lambda: self._pending == 0)
+
+    def close(self):
+        self.wait()
+        self._executor.shutdown(wait=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    PARSE_POOL이 "on"이면 공용 ParsePool (처음 호출 시 생성), 아니면 None
+    """
+    global _pool
+    if PARSE_POOL != "on":
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ParsePool()
+            log.info("파싱 프로세스 풀 시작: %s개 (대기 상한 %s개)", _pool.workers, PARSE_QUEUE)
+        return _pool
+
+
+def wait():
+    """
+    공용 풀이 있으면 진행 중인 파싱이 모두 끝날 때까지 대기
+    """
+    if _pool is not None:
+        _pool.wait()
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,127 @@
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from log_setup import get_logger
+from search_parser import get_backend
+
+log = get_logger("pdp")
+
+# 상세페이지 CSV 컬럼 (extract_pdp_row 반환 순서와 동일)
+PDP_HEADER = ["브랜드", "제품명", "현재 판매가", "회원 할인가", "판매자", "다른 판매자", "옵션", "상세정보", "URL"]
+
+_OTHER_SELLER_RE = re.compile(r"새\s*상품\s*\((\d+)\)")
+
+# 상품 정보 영역 / 상세정보 영역 - 추출에 필요한 하위 트리는 이 두 곳뿐
+_ATF_CLASS = "prod-atf-contents"
+_DESCRIPTION_CLASS = "product-description"
+
+
+# bs4: 두 영역 밖의 태그는 트리로 만들지 않음 (메뉴/스크립트 등 페이지 대부분을 건너뜀)
+_PDP_STRAINER = SoupStrainer(class_=[_ATF_CLASS, _DESCRIPTION_CLASS])
+
+
+def _parse_once(be, html):
+    """
+    상세페이지를 한 번만 파싱해 (루트, 상품 정보 영역) 반환
+    - bs4: 상품 정보 영역이 있으면 SoupStrainer로 두 영역만 트리로 만듦
+    - selectolax: C 파서라 전체를 파싱해도 빠르므로 그대로
+    상품 정보 영역이 없는 페이지는 전체 트리에서 찾음 (기존과 같은 폴백)
+    """
+    if be.name == "bs4" and _ATF_CLASS in html:
+        root = BeautifulSoup(html, "html.parser", parse_only=_PDP_STRAINER)
+        atf = be.select_one(root, "." + _ATF_CLASS)
+        if atf is not None:
+            return root, atf
+        # 클래스 이름이 스크립트 등에만 있었던 경우 - 드물게 전체를 다시 파싱
+        log.debug(".prod-atf-contents 요소 없음 - 전체 HTML 파싱")
+    root = be.parse(html)
+    return root, be.select_one(root, "." + _ATF_CLASS)
+
+
+def _other_seller_count(be, scope):
+    """
+    '새 상품 (N)'의 N - 영역 전체 텍스트에서 찾음 (기존과 같은 기준)
+    "<span>새</span><span>상품</span> <span>(7)</span>"처럼 문구와 숫자가 여러 요소에 나뉘어 있어도 찾도록
+    요소/텍스트 노드 단위로 미리 거르지 않음
+    """
+    m = _OTHER_SELLER_RE.search(be.text(scope, " ", strip=True))
+    return m.group(1) if m else ""
+
+
+def extract_pdp_row(html, url="", backend=None):
+    """
+    상세페이지 HTML에서 CSV 한 행 추출 (PDP_HEADER 순서, 브랜드는 빈 문자열 유지)
+    네트워크/CSV와 분리되어 있어 저장된 HTML로 오프라인 재파싱·벤치마크 가능
+    파서 백엔드는 search_parser와 같음 (COUPANG_PARSER), 페이지당 한 번만 파싱
+    """
+    be = backend or get_backend()
+    root, atf = _parse_once(be, html)
+    if atf is None:
+        log.debug(".prod-atf-contents를 찾지 못했습니다. 전체 HTML 사용")
+    scope = root if atf is None else atf
+
+    # 제목: h1.product-title span 기준
+    title_node = be.select_one(scope, "h1.product-title span") or be.select_one(scope, ".product-title, h1")
+    title = "" if not title_node else be.text(title_node, strip=True)
+    log.debug("제목: %s", title)
+
+    # 가격: 최종 가격 .final-price-amount
+    sale_node = be.select_one(scope, ".final-price-amount")
+    sale_price_text = "" if not sale_node else be.text(sale_node, strip=True)
+    log.debug("가격: %s", sale_price_text)
+
+    # 회원 할인가(없을 수 있음) -> 빈 문자열 유지
+    coupon_price_text = ""
+
+    # 판매자: .seller-info a 텍스트
+    seller_node = be.select_one(scope, ".seller-info a")
+    seller = "" if not seller_node else be.text(seller_node, strip=True)
+    log.debug("판매자: %s", seller)
+
+    # 다른 판매자 수: '새 상품 (N)' 패턴 추출
+    prod_other_seller_count = ""
+    try:
+        prod_other_seller_count = _other_seller_count(be, scope)
+        log.debug("다른 판매자 수: %s", prod_other_seller_count)
+    except Exception as e:
+        log.debug("다른 판매자 수 추출 실패: %s", e)
+
+    # 옵션: .option-picker-container 내부 첫 두 span (이름:값)
+    prod_option_item = ""
+    option_container = be.select_one(scope, ".option-picker-container")
+    if option_container:
+        spans = be.select(option_container, "span")
+        if len(spans) >= 2:
+            key = be.text(spans[0], strip=True).rstrip(":")
+            val = be.text(spans[1], strip=True)
+            log.debug("옵션 키: '%s', 값: '%s'", key, val)
+            if key and val:
+                prod_option_item = f"{key}: {val}"
+
+    # 상세정보: .product-description li 리스트 합치기
+    # 상품 정보 영역 안에 없으면 페이지의 다른 위치에서 검색 (bs4는 두 영역만 트리에 있음)
+    prod_description = ""
+    li_nodes = be.select(scope, ".product-description li")
+    if not li_nodes and atf is not None:
+        li_nodes = be.select(root, ".product-description li")
+    log.debug("상세정보 li 개수: %s", len(li_nodes))
+    if li_nodes:
+        prod_description = ", ".join([be.text(li, strip=True) for li in li_nodes])
+        log.debug("상세정보: %.100s%s", prod_description, "..." if len(prod_description) > 100 else "")
+
+    log.debug("최종 데이터: title=%s, price=%s, seller=%s, options=%s, description_len=%s", title, sale_price_text, seller, prod_option_item, len(prod_description))
+    # 행을 만든 뒤 바로 트리 해제 (동시에 처리 중인 페이지 수만큼만 트리가 메모리에 있도록)
+    be.release(root)
+
+    return [
+        "",
+        title or "",
+        sale_price_text or "",
+        coupon_price_text or "",
+        seller or "",
+        prod_other_seller_count or "",
+        prod_option_item or "",
+        prod_description or "",
+        url,
+    ]
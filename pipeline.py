@@ -0,0 +1,148 @@
+import asyncio
+import inspect
+import queue
+import threading
+
+import aiohttp
+
+import metrics
+import paging
+import rate_control
+from async_fetch import fetch_html_async
+from log_setup import get_logger
+
+log = get_logger("fetch")
+
+# 1단계(검색) → 2단계(상세페이지) 사이 대기열 크기: 가득 차면 검색 단계가 기다림 (backpressure)
+DEFAULT_QUEUE_SIZE = 256
+
+# 대기열 종료 표시
+_DONE = object()
+
+
+def _safe_call(callback, *args):
+    try:
+        return callback(*args)
+    except Exception as e:
+        log.error("작업 실행 중 예외 발생: %s", e)
+        return None
+
+
+async def _safe_call_async(callback, *args):
+    # 콜백이 코루틴을 돌려주면(파싱 프로세스 풀 대기 등) 이벤트 루프를 막지 않고 await
+    try:
+        result = callback(*args)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+    except Exception as e:
+        log.error("작업 실행 중 예외 발생: %s", e)
+        return None
+
+
+async def run_pipeline_async(page_url, on_page, on_item, max_pages=paging.MAX_PAGES, window=paging.PAGE_WINDOW,
+                             queue_size=DEFAULT_QUEUE_SIZE, workers=rate_control.MAX_CONCURRENCY, **fetch_kwargs):
+    """
+    검색 페이지(page_url(page), 1..max_pages)를 window개씩 가져와 on_page(page, url, html, error)가 돌려준
+    (URL 목록, 다음 페이지 필요 여부) 중 URL들을 곧바로 대기열에 넣고,
+    workers개 소비자가 꺼내 가져온 뒤 on_item(index, url, html, error) 호출 (두 콜백 모두 코루틴을 돌려주면 await)
+    - 검색과 상세페이지 요청이 겹쳐서 진행됨 (전체 링크 수집을 기다리지 않음)
+    - 짧은/빈 페이지가 나오면 그 뒤 검색 페이지는 요청하지 않음 (paging.fetch_pages_async)
+    - 실제 동시 요청 수/초당 요청 수는 두 단계 합쳐서 rate_control이 제한
+    """
+    items = asyncio.Queue(maxsize=queue_size)
+    counter = {"items": 0}
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=workers)) as session:
+
+        async def _on_page(page, url, html, error):
+            next_urls, more = await _safe_call_async(on_page, page, url, html, error) or ((), False)
+            for next_url in next_urls:
+                await items.put(next_url)
+                metrics.observe_value("queue_depth", items.qsize())
+            return more
+
+        async def _consume():
+            while True:
+                url = await items.get()
+                if url is _DONE:
+                    return
+                counter["items"] += 1
+                index = counter["items"]
+                try:
+                    html, error = await fetch_html_async(session, url, **fetch_kwargs), None
+                except Exception as e:
+                    html, error = None, e
+                await _safe_call_async(on_item, index, url, html, error)
+
+        consumers = [asyncio.ensure_future(_consume()) for _ in range(workers)]
+        try:
+            await paging.fetch_pages_async(session, page_url, _on_page, max_pages, window, **fetch_kwargs)
+            for _ in consumers:
+                await items.put(_DONE)
+            await asyncio.gather(*consumers)
+        finally:
+            for task in consumers:
+                task.cancel()
+    return counter["items"]
+
+
+def run_pipeline_threaded(page_url, on_page, on_item, fetch, max_pages=paging.MAX_PAGES, window=paging.PAGE_WINDOW,
+                          queue_size=DEFAULT_QUEUE_SIZE, workers=rate_control.MAX_CONCURRENCY):
+    """
+    run_pipeline_async의 스레드 버전 (fetch(url)로 HTML을 가져오는 동기 함수 사용)
+    검색 페이지는 생산자 스레드 하나가 window개씩 가져오고, 상세페이지는 workers개 소비자 스레드
+    """
+    items = queue.Queue(maxsize=queue_size)
+    counter_lock = threading.Lock()
+    counter = {"items": 0}
+
+    def _on_page(page, url, html, error):
+        next_urls, more = _safe_call(on_page, page, url, html, error) or ((), False)
+        for next_url in next_urls:
+            items.put(next_url)
+            metrics.observe_value("queue_depth", items.qsize())
+        return more
+
+    def _produce():
+        try:
+            paging.fetch_pages_threaded(page_url, _on_page, fetch, max_pages, window)
+        except Exception as e:
+            log.error("작업 실행 중 예외 발생: %s", e)
+
+    def _consume():
+        while True:
+            url = items.get()
+            if url is _DONE:
+                return
+            with counter_lock:
+                counter["items"] += 1
+                index = counter["items"]
+            try:
+                html, error = fetch(url), None
+            except Exception as e:
+                html, error = None, e
+            _safe_call(on_item, index, url, html, error)
+
+    consumers = [threading.Thread(target=_consume, daemon=True) for _ in range(workers)]
+    producer = threading.Thread(target=_produce, daemon=True)
+    for t in consumers + [producer]:
+        t.start()
+    producer.join()
+    for _ in consumers:
+        items.put(_DONE)
+    for t in consumers:
+        t.join()
+    return counter["items"]
+
+
+def run_pipeline(page_url, on_page, on_item, engine="async", fetch=None, max_pages=paging.MAX_PAGES,
+                 window=paging.PAGE_WINDOW, queue_size=DEFAULT_QUEUE_SIZE, workers=rate_control.MAX_CONCURRENCY,
+                 **fetch_kwargs):
+    """
+    동기 코드에서 호출하는 진입점 (engine: "async" 또는 "thread")
+    """
+    if engine == "async":
+        return asyncio.run(run_pipeline_async(page_url, on_page, on_item, max_pages, window, queue_size, workers,
+                                              **fetch_kwargs))
+    return run_pipeline_threaded(page_url, on_page, on_item, fetch, max_pages, window, queue_size, workers)
@@ -0,0 +1,200 @@
+import asyncio
+import collections
+import os
+import threading
+import time
+
+import metrics
+from log_setup import get_logger
+
+log = get_logger("fetch")
+
+# 동시 요청 수 상한/하한/시작값 (AIMD로 이 범위 안에서 자동 조정)
+MAX_CONCURRENCY = int(os.getenv("COUPANG_CONCURRENCY", "64"))
+MIN_CONCURRENCY = int(os.getenv("COUPANG_MIN_CONCURRENCY", "2"))
+INITIAL_CONCURRENCY = int(os.getenv("COUPANG_INITIAL_CONCURRENCY", "8"))
+# "on"(기본, 지연/오류에 따라 조정) 또는 "off"(항상 MAX_CONCURRENCY 고정)
+ADAPTIVE = os.getenv("COUPANG_ADAPTIVE", "on")
+# 응답이 이 시간(초)보다 느리면 과부하로 보고 동시 요청 수를 줄임
+TARGET_LATENCY = float(os.getenv("COUPANG_TARGET_LATENCY", "15"))
+# 전체 초당 요청 수 상한 (0이면 제한 없음), 버스트 허용량
+MAX_RPS = float(os.getenv("COUPANG_RPS", "10"))
+RPS_BURST = float(os.getenv("COUPANG_RPS_BURST", "0")) or None
+
+# 재시도 대상 HTTP 상태 (속도 제한/일시적인 게이트웨이 오류) - 동시 요청 수 감소 신호로도 사용
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    초당 rate개, 최대 burst개까지 허용하는 토큰 버킷 (스레드/코루틴 공용)
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        토큰 하나를 예약하고 실제 요청까지 기다려야 할 시간(초) 반환 (토큰은 음수가 될 수 있음 = 대기열)
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            metrics.observe("rate_wait", wait)
+        return wait
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+
+class AimdLimiter:
+    """
+    AIMD 방식 동시 요청 수 제한기 (TCP 혼잡 제어와 같은 원리)
+    - 첫 과부하 신호 전(slow start): 성공마다 한도 +1 (왕복마다 약 2배)
+    - 목표 지연 이내 성공: 한도 += 1/한도 (한도만큼 성공하면 +1, 가산 증가)
+    - 타임아웃/429/5xx/목표 지연 초과: 한도 *= decrease (승산 감소)
+      단, 마지막 감소 이전에 시작된 요청의 실패는 같은 혼잡으로 보고 무시 (연쇄 감소 방지)
+    스레드(acquire)와 asyncio(acquire_async) 양쪽에서 사용 가능
+    """
+
+    def __init__(self, initial=INITIAL_CONCURRENCY, minimum=MIN_CONCURRENCY, maximum=MAX_CONCURRENCY,
+                 target_latency=TARGET_LATENCY, decrease=0.5, adaptive=True):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum)) if adaptive else float(self.maximum)
+        self.target_latency = target_latency
+        self.decrease = decrease
+        self.adaptive = adaptive
+        self._inflight = 0
+        self._last_decrease = 0.0
+        self._slow_start = True
+        self._cond = threading.Condition()
+        self._async_waiters = collections.deque()
+
+    @property
+    def inflight(self):
+        return self._inflight
+
+    def _has_slot(self):
+        return self._inflight < int(self.limit)
+
+    def acquire(self):
+        with self._cond:
+            while not self._has_slot():
+                self._cond.wait()
+            self._inflight += 1
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._has_slot():
+                    self._inflight += 1
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter
+
+    def release(self):
+        with self._cond:
+            self._inflight -= 1
+            self._wake()
+
+    def _wake(self):
+        # 빈 자리 수만큼만 깨움 (대기 중인 코루틴이 수천 개여도 한 번에 전부 깨우지 않음)
+        self._cond.notify(max(0, int(self.limit) - self._inflight))
+        free = int(self.limit) - self._inflight
+        while free > 0 and self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            if waiter.done():
+                continue
+            loop.call_soon_threadsafe(_set_waiter, waiter)
+            free -= 1
+
+    def on_success(self, latency, started):
+        if not self.adaptive:
+            return
+        if latency > self.target_latency:
+            self.on_congestion(started, "지연 %.1fs" % latency)
+            return
+        with self._cond:
+            if self.limit < self.maximum:
+                step = 1.0 if self._slow_start else 1.0 / self.limit
+                self.limit = min(self.maximum, self.limit + step)
+                self._wake()
+
+    def on_congestion(self, started, reason):
+        """
+        과부하 신호 (started: 실패한 요청의 시작 시각, time.monotonic 기준)
+        """
+        if not self.adaptive:
+            return
+        with self._cond:
+            if started < self._last_decrease:
+                return
+            old = self.limit
+            self.limit = max(float(self.minimum), self.limit * self.decrease)
+            self._last_decrease = time.monotonic()
+            self._slow_start = False
+        metrics.incr("concurrency_decreases")
+        log.info("동시 요청 수 감소 %d → %d (%s)", old, self.limit, reason)
+
+
+def _set_waiter(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def retry_after(headers, default):
+    """
+    Retry-After 헤더(초)가 있으면 그 값, 없으면 default
+    """
+    value = (headers or {}).get("Retry-After")
+    try:
+        return max(float(value), 0.0) if value is not None else default
+    except ValueError:
+        return default
+
+
+_limiter = None
+_bucket = None
+_init_lock = threading.Lock()
+
+
+def get_limiter():
+    """
+    프로세스 전체에서 공유하는 동시 요청 수 제한기
+    """
+    global _limiter
+    with _init_lock:
+        if _limiter is None:
+            _limiter = AimdLimiter(adaptive=ADAPTIVE != "off")
+        return _limiter
+
+
+def get_bucket():
+    """
+    프로세스 전체에서 공유하는 초당 요청 수 제한 (COUPANG_RPS)
+    """
+    global _bucket
+    with _init_lock:
+        if _bucket is None:
+            _bucket = TokenBucket(MAX_RPS, RPS_BURST)
+        return _bucket
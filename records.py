@@ -0,0 +1,191 @@
+import re
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from rocket_badge import RocketBadge
+
+# 파싱 시점 정규화용 정규식 (값마다 다시 컴파일하지 않도록 모듈 로드 시 한 번만)
+_NON_DIGIT_RE = re.compile(r"[^\d]")
+_MONTH_DAY_RE = re.compile(r"(\d{1,2})/(\d{1,2})")
+_WEEKDAY_RE = re.compile(r"([월화수목금토일])(?:요일|\))")
+_PRODUCT_ID_RE = re.compile(r"/vp/products/(\d+)")
+_ITEM_ID_RE = re.compile(r"[?&]itemId=(\d+)")
+_VENDOR_ITEM_ID_RE = re.compile(r"[?&]vendorItemId=(\d+)")
+# search_parser가 "N원 적립"을 찾았을 때 남기는 포인트 값 형태 ("2,000원") - 그 밖의 문구는 숫자로 보지 않음
+_POINTS_WON_RE = re.compile(r"[0-9][0-9,\.]*원")
+
+# 상대 날짜 표현 → 수집일로부터 며칠 뒤
+_RELATIVE_DAYS = (("오늘", 0), ("내일", 1), ("모레", 2))
+_WEEKDAYS = "월화수목금토일"
+
+# 검색 결과 항목 한 개 (두 크롤러 공용)
+# - 가격/포인트는 원 단위 int, 리뷰수는 int, 값이 없으면 None
+# - badge는 RocketBadge, arrival은 페이지 표시 문구, arrival_date는 수집일 기준으로 계산한 date
+# - *_text는 가격/포인트 표시 문구 원문 ("최대 5원 적립" 등) - CSV에는 원문, 집계/저장에는 int 값
+SEARCH_ITEM_FIELDS = (
+    "rank", "name", "original_price", "final_price", "badge", "arrival", "arrival_date",
+    "free_shipping", "review_count", "points", "stock_status", "link", "img_url",
+    "original_price_text", "final_price_text", "points_text",
+)
+
+_SearchItemBase = namedtuple(
+    "_SearchItemBase", SEARCH_ITEM_FIELDS,
+    defaults=(None, "", None, None, RocketBadge.NONE, "", None, False, None, None, "", "", "", "", "", ""),
+)
+
+
+class SearchItem(_SearchItemBase):
+    """
+    정규화된 검색 결과 항목 (namedtuple이므로 가볍고 값 비교/정렬 가능)
+    """
+
+    __slots__ = ()
+
+    def csv_row(self):
+        """
+        결과 CSV 12개 컬럼 (순위 ~ 이미지URL, 가격/포인트는 페이지 표시 문구 그대로)
+        """
+        return [
+            "" if self.rank is None else str(self.rank),
+            self.name,
+            self.original_price_text,
+            self.final_price_text,
+            self.badge.value,
+            self.arrival,
+            "Y" if self.free_shipping else "N",
+            "" if self.review_count is None else str(self.review_count),
+            self.points_text,
+            self.stock_status,
+            self.link,
+            self.img_url,
+        ]
+
+
+def parse_int(text):
+    """
+    "16,206" / "(1234)" / "8,900원" → int (숫자가 없으면 None)
+    """
+    if not text:
+        return None
+    digits = _NON_DIGIT_RE.sub("", text)
+    return int(digits) if digits else None
+
+
+def parse_won(text):
+    """
+    "8,900원" → 8900 (소수점 아래는 버림, 값이 없으면 None)
+    """
+    if not text:
+        return None
+    return parse_int(text.split(".", 1)[0])
+
+
+def format_won(value):
+    """
+    8900 → "8,900원" (None → "")
+    """
+    return "" if value is None else f"{value:,}원"
+
+
+def resolve_arrival(text, crawled_on=None):
+    """
+    도착 문구를 수집일(crawled_on) 기준 날짜로 변환 (알 수 없으면 None)
+    - "오늘(수)/내일(목)/모레(금) 도착 ..." → 수집일 + 0/1/2일
+    - "11/14 도착 예정" → 수집 연도의 11/14 (수집일보다 한참 이전이면 다음 해)
+    - "금요일 도착" 등 요일만 있으면 수집일 이후 가장 가까운 그 요일
+    """
+    if not text:
+        return None
+    crawled_on = crawled_on or date.today()
+    if isinstance(crawled_on, datetime):
+        crawled_on = crawled_on.date()
+    for word, days in _RELATIVE_DAYS:
+        if word in text:
+            return crawled_on + timedelta(days=days)
+    m = _MONTH_DAY_RE.search(text)
+    if m:
+        month, day = int(m.group(1)), int(m.group(2))
+        try:
+            resolved = date(crawled_on.year, month, day)
+            # 12월 말에 수집한 "1/3 도착" 등 연도가 넘어가는 경우
+            if resolved < crawled_on - timedelta(days=180):
+                resolved = date(crawled_on.year + 1, month, day)
+        except ValueError:
+            return None
+        return resolved
+    m = _WEEKDAY_RE.search(text)
+    if m:
+        days = (_WEEKDAYS.index(m.group(1)) - crawled_on.weekday()) % 7
+        return crawled_on + timedelta(days=days)
+    return None
+
+
+def search_item_from_row(row, crawled_on=None):
+    """
+    search_parser가 추출한 12개 문자열 필드를 SearchItem으로 정규화
+    """
+    rank, name, original_price, final_price, badge, arrival, free_shipping, review_count, points, stock_status, link, img_url = row
+    return SearchItem(
+        rank=parse_int(rank),
+        name=name,
+        original_price=parse_won(original_price),
+        final_price=parse_won(final_price),
+        badge=RocketBadge(badge),
+        arrival=arrival,
+        arrival_date=resolve_arrival(arrival, crawled_on),
+        free_shipping=free_shipping == "Y",
+        review_count=parse_int(review_count),
+        # "N원 적립"을 못 찾았으면 배지 문구 그대로("카드 5% 최대 2,000원" 등)이므로 None (CSV에는 points_text 원문)
+        points=parse_won(points) if _POINTS_WON_RE.fullmatch(points) else None,
+        stock_status=stock_status,
+        link=link,
+        img_url=img_url,
+        original_price_text=original_price,
+        final_price_text=final_price,
+        points_text=points,
+    )
+
+
+def listing_item(name, price, link, img_url):
+    """
+    main.py 검색 목록(이름, 가격, 링크, 이미지)을 SearchItem으로 정규화
+    """
+    return SearchItem(name=name, final_price=parse_won(price), link=link, img_url=img_url, final_price_text=price or "")
+
+
+def product_ids(url):
+    """
+    상품 링크(/vp/products/{productId}?itemId=..&vendorItemId=..)에서 (productId, itemId, vendorItemId) 추출
+    productId가 없으면 None, 나머지가 없으면 해당 값만 None
+    """
+    m = _PRODUCT_ID_RE.search(url or "")
+    if not m:
+        return None
+    item = _ITEM_ID_RE.search(url)
+    vendor_item = _VENDOR_ITEM_ID_RE.search(url)
+    return (
+        int(m.group(1)),
+        int(item.group(1)) if item else None,
+        int(vendor_item.group(1)) if vendor_item else None,
+    )
+
+
+def product_key(url):
+    """
+    상품 중복 판단 키 (productId, itemId, vendorItemId) - 상품 링크가 아니면 URL 그대로
+    clickEventId/searchId/korePlacement 등 요청마다 달라지는 파라미터는 무시됨
+    """
+    return product_ids(url) or url
+
+
+def canonical_product_url(url):
+    """
+    상품 링크를 추적 파라미터 없는 표준 URL로 변환 (상품 링크가 아니면 그대로)
+    예: /vp/products/8528523115?itemId=..&vendorItemId=..&q=..&clickEventId=.. → /vp/products/8528523115?itemId=..&vendorItemId=..
+    """
+    ids = product_ids(url)
+    if ids is None:
+        return url
+    product_id, item_id, vendor_item_id = ids
+    params = [f"{name}={value}" for name, value in (("itemId", item_id), ("vendorItemId", vendor_item_id)) if value]
+    return f"https://www.coupang.com/vp/products/{product_id}" + ("?" + "&".join(params) if params else "")
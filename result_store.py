@@ -0,0 +1,299 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import metrics
+from log_setup import get_logger
+from records import parse_int, parse_won, product_ids
+from row_writer import DURABILITY
+
+log = get_logger("store")
+
+# SQLite 결과 저장소: "on"이면 CSV와 함께 상품 ID 기준으로 저장 (실행을 거듭해도 한 파일에 누적)
+STORE = os.getenv("COUPANG_STORE", "off")
+STORE_PATH = os.getenv("COUPANG_STORE_PATH", "coupang_results.sqlite3")
+# 증분 수집: "on"이면 검색 목록을 저장소의 이전 스냅샷과 비교해 새 상품/바뀐 상품만 PDP 요청 (저장소도 자동으로 켜짐)
+INCREMENTAL = os.getenv("COUPANG_INCREMENTAL", "off")
+# 바뀌지 않은 상품이라도 마지막 PDP 수집 후 이 시간(시간 단위)이 지나면 다시 요청
+PDP_MAX_AGE_HOURS = float(os.getenv("COUPANG_PDP_MAX_AGE_HOURS", "168"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    product_id INTEGER NOT NULL,
+    vendor_item_id INTEGER NOT NULL,
+    item_id INTEGER,
+    name TEXT,
+    last_price INTEGER,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (product_id, vendor_item_id)
+);
+CREATE TABLE IF NOT EXISTS search_results (
+    keyword TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    vendor_item_id INTEGER NOT NULL,
+    run_started REAL NOT NULL,
+    crawled_at REAL NOT NULL,
+    entry TEXT NOT NULL,
+    item_id INTEGER,
+    rank INTEGER,
+    name TEXT,
+    original_price INTEGER,
+    final_price INTEGER,
+    badge TEXT,
+    arrival TEXT,
+    arrival_date TEXT,
+    free_shipping INTEGER,
+    review_count INTEGER,
+    points INTEGER,
+    stock_status TEXT,
+    link TEXT,
+    PRIMARY KEY (keyword, product_id, vendor_item_id, run_started)
+);
+CREATE INDEX IF NOT EXISTS idx_search_product ON search_results(product_id, vendor_item_id);
+CREATE INDEX IF NOT EXISTS idx_search_crawled_at ON search_results(crawled_at);
+CREATE TABLE IF NOT EXISTS pdp_results (
+    product_id INTEGER NOT NULL,
+    vendor_item_id INTEGER NOT NULL,
+    run_started REAL NOT NULL,
+    crawled_at REAL NOT NULL,
+    keyword TEXT,
+    item_id INTEGER,
+    brand TEXT,
+    title TEXT,
+    sale_price INTEGER,
+    coupon_price INTEGER,
+    seller TEXT,
+    other_sellers INTEGER,
+    option_text TEXT,
+    description TEXT,
+    url TEXT,
+    PRIMARY KEY (product_id, vendor_item_id, run_started)
+);
+CREATE INDEX IF NOT EXISTS idx_pdp_keyword ON pdp_results(keyword);
+CREATE INDEX IF NOT EXISTS idx_pdp_crawled_at ON pdp_results(crawled_at);
+"""
+
+# 같은 실행에서 같은 상품이 다시 나오면(광고/일반 중복, 재시도) 최신 값으로 갱신
+_UPSERT_PRODUCT = """
+INSERT INTO products (product_id, vendor_item_id, item_id, name, last_price, first_seen, last_seen)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (product_id, vendor_item_id) DO UPDATE SET
+    item_id = COALESCE(excluded.item_id, item_id),
+    name = COALESCE(NULLIF(excluded.name, ''), name),
+    last_price = COALESCE(excluded.last_price, last_price),
+    last_seen = excluded.last_seen
+"""
+
+_UPSERT_SEARCH = """
+INSERT INTO search_results (keyword, product_id, vendor_item_id, run_started, crawled_at, entry, item_id, rank, name,
+    original_price, final_price, badge, arrival, arrival_date, free_shipping, review_count, points, stock_status, link)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (keyword, product_id, vendor_item_id, run_started) DO UPDATE SET
+    crawled_at = excluded.crawled_at, item_id = excluded.item_id, rank = COALESCE(rank, excluded.rank),
+    name = excluded.name, original_price = excluded.original_price, final_price = excluded.final_price,
+    badge = excluded.badge, arrival = excluded.arrival, arrival_date = excluded.arrival_date,
+    free_shipping = excluded.free_shipping, review_count = excluded.review_count, points = excluded.points,
+    stock_status = excluded.stock_status, link = excluded.link
+"""
+
+_UPSERT_PDP = """
+INSERT INTO pdp_results (product_id, vendor_item_id, run_started, crawled_at, keyword, item_id, brand, title,
+    sale_price, coupon_price, seller, other_sellers, option_text, description, url)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (product_id, vendor_item_id, run_started) DO UPDATE SET
+    crawled_at = excluded.crawled_at, keyword = excluded.keyword, item_id = excluded.item_id,
+    brand = excluded.brand, title = excluded.title, sale_price = excluded.sale_price,
+    coupon_price = excluded.coupon_price, seller = excluded.seller, other_sellers = excluded.other_sellers,
+    option_text = excluded.option_text, description = excluded.description, url = excluded.url
+"""
+
+
+def connect(path=STORE_PATH):
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # DURABILITY=fsync면 커밋마다 fsync (journal 기록 전에 저장소도 디스크에 반영)
+    conn.execute("PRAGMA synchronous=%s" % ("FULL" if DURABILITY == "fsync" else "NORMAL"))
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+class ResultStore:
+    """
+    RowWriter용 SQLite 출력 - 쓰기 스레드가 배치마다 한 트랜잭션으로 upsert (commit은 RowWriter가 호출)
+    - kind "search": write_rows에 (키워드, SearchItem), kind "pdp": (키워드, PDP 행 9개 필드)
+    - 키: 링크의 productId/vendorItemId (+ 실행 시작 시각 run_started로 실행별 이력 보관)
+    - 출력마다 연결을 따로 열고 WAL 모드라 여러 쓰기 스레드가 같은 파일을 써도 됨
+    """
+
+    def __init__(self, kind, entry, run_started=None, path=STORE_PATH):
+        if kind not in ("search", "pdp"):
+            raise ValueError(f"알 수 없는 저장 종류: {kind}")
+        self.kind = kind
+        self.entry = entry
+        self.run_started = run_started or time.time()
+        self.path = path
+        self._conn = connect(path)
+
+    def write_rows(self, rows):
+        now = time.time()
+        products = []
+        values = []
+        for kw, record in rows:
+            if self.kind == "search":
+                ids = product_ids(record.link)
+                if ids is None:
+                    metrics.incr("store_skipped")
+                    continue
+                product_id, item_id, vendor_item_id = ids
+                vendor_item_id = vendor_item_id or 0
+                products.append((product_id, vendor_item_id, item_id, record.name, record.final_price, now, now))
+                values.append((
+                    kw, product_id, vendor_item_id, self.run_started, now, self.entry, item_id, record.rank,
+                    record.name, record.original_price, record.final_price, record.badge.value, record.arrival,
+                    record.arrival_date.isoformat() if record.arrival_date else None, int(record.free_shipping),
+                    record.review_count, record.points, record.stock_status, record.link,
+                ))
+            else:
+                brand, title, sale_price, coupon_price, seller, other_sellers, option, description, url = record
+                ids = product_ids(url)
+                if ids is None:
+                    metrics.incr("store_skipped")
+                    continue
+                product_id, item_id, vendor_item_id = ids
+                vendor_item_id = vendor_item_id or 0
+                price = parse_won(sale_price)
+                products.append((product_id, vendor_item_id, item_id, title, price, now, now))
+                values.append((
+                    product_id, vendor_item_id, self.run_started, now, kw, item_id, brand, title, price,
+                    parse_won(coupon_price), seller, parse_int(other_sellers), option, description, url,
+                ))
+        # 트랜잭션은 commit()까지 열려 있음 (배치 단위)
+        self._conn.executemany(_UPSERT_PRODUCT, products)
+        self._conn.executemany(_UPSERT_SEARCH if self.kind == "search" else _UPSERT_PDP, values)
+        metrics.incr("store_rows", len(values))
+
+    def commit(self):
+        with metrics.timer("store_commit"):
+            self._conn.commit()
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+        log.info("SQLite 저장: %s (%s)", self.path, self.kind)
+
+
+def open_store(kind, entry, run_started=None):
+    """
+    STORE 또는 INCREMENTAL이 "on"이면 ResultStore를 열어 반환, 아니면 None
+    (증분 수집은 이번 실행의 스냅샷이 다음 실행의 비교 기준이므로 저장소가 필요)
+    """
+    if STORE != "on" and INCREMENTAL != "on":
+        return None
+    return ResultStore(kind, entry, run_started)
+
+
+class SnapshotIndex:
+    """
+    증분 수집용 이전 실행 스냅샷 조회 (스레드/코루틴 공용, 읽기 전용 연결 하나)
+    - 비교 필드: 최종가격, 로켓배지, 리뷰수, 재고현황 - 하나라도 다르면 PDP를 다시 요청
+    - run_started 이전 실행의 스냅샷만 비교 (이번 실행의 쓰기 스레드가 먼저 저장해도 영향 없음)
+    - 같으면 마지막 PDP 수집 시각이 max_age_hours보다 오래됐을 때만 다시 요청
+    """
+
+    _LAST_SEARCH = (
+        "SELECT final_price, badge, review_count, stock_status FROM search_results "
+        "WHERE product_id = ? AND vendor_item_id = ? AND run_started < ? ORDER BY crawled_at DESC LIMIT 1"
+    )
+    _LAST_PDP = "SELECT MAX(crawled_at) FROM pdp_results WHERE product_id = ? AND vendor_item_id = ?"
+
+    def __init__(self, run_started, path=STORE_PATH, max_age_hours=PDP_MAX_AGE_HOURS):
+        self.run_started = run_started
+        self.max_age = max_age_hours * 3600
+        self._conn = connect(path)
+        self._lock = threading.Lock()
+        self.counts = {"new": 0, "changed": 0, "stale": 0, "unchanged": 0}
+
+    def check(self, item, now=None):
+        """
+        SearchItem의 PDP 요청 사유: "new"(처음 본 상품), "changed"(목록 값 변경), "stale"(PDP가 오래됨/없음)
+        다시 요청할 필요가 없으면 "unchanged"
+        """
+        ids = product_ids(item.link)
+        if ids is None:
+            reason = "new"
+        else:
+            product_id, _, vendor_item_id = ids
+            key = (product_id, vendor_item_id or 0)
+            with self._lock:
+                last = self._conn.execute(self._LAST_SEARCH, key + (self.run_started,)).fetchone()
+                last_pdp = self._conn.execute(self._LAST_PDP, key).fetchone()[0]
+            current = (item.final_price, item.badge.value, item.review_count, item.stock_status)
+            if last is None:
+                reason = "new"
+            elif tuple(last) != current:
+                reason = "changed"
+            elif last_pdp is None or (now or time.time()) - last_pdp > self.max_age:
+                reason = "stale"
+            else:
+                reason = "unchanged"
+        with self._lock:
+            self.counts[reason] += 1
+        metrics.incr(f"incremental_{reason}")
+        return reason
+
+    def needs_pdp(self, item, now=None):
+        return self.check(item, now) != "unchanged"
+
+    def close(self):
+        self._conn.close()
+
+
+def open_snapshots(run_started):
+    """
+    INCREMENTAL이 "on"이면 SnapshotIndex를 열어 반환, 아니면 None
+    """
+    if INCREMENTAL != "on":
+        return None
+    return SnapshotIndex(run_started)
+
+
+def product_keywords(conn, product_id):
+    """
+    상품이 검색 결과에 나온 키워드별 (키워드, 횟수, 최고 순위, 마지막 수집 시각) - product_id 인덱스 사용
+    """
+    return conn.execute(
+        "SELECT keyword, COUNT(*), MIN(rank), MAX(crawled_at) FROM search_results "
+        "WHERE product_id = ? GROUP BY keyword ORDER BY MIN(rank)",
+        (product_id,),
+    ).fetchall()
+
+
+def price_history(conn, product_id):
+    """
+    상품의 실행별 가격 이력 [(수집 시각, vendorItemId, 출처, 가격)] - 검색 결과와 상세페이지 모두
+    """
+    return conn.execute(
+        "SELECT crawled_at, vendor_item_id, 'search', final_price FROM search_results WHERE product_id = ? "
+        "UNION ALL "
+        "SELECT crawled_at, vendor_item_id, 'pdp', sale_price FROM pdp_results WHERE product_id = ? "
+        "ORDER BY 1",
+        (product_id, product_id),
+    ).fetchall()
+
+
+if __name__ == "__main__":
+    # 조회 예: python result_store.py 8528523115 [저장소 경로]
+    if len(sys.argv) < 2:
+        print("사용법: python result_store.py <productId> [저장소 경로]")
+        sys.exit(1)
+    conn = connect(sys.argv[2] if len(sys.argv) > 2 else STORE_PATH)
+    pid = int(sys.argv[1])
+    print("키워드별 노출:")
+    for kw, count, best_rank, last in product_keywords(conn, pid):
+        print(f"  {kw:<20} {count:>4}회  최고 {best_rank}위  마지막 {time.strftime('%Y-%m-%d %H:%M', time.localtime(last))}")
+    print("가격 이력:")
+    for crawled_at, vendor_item_id, source, price in price_history(conn, pid):
+        print(f"  {time.strftime('%Y-%m-%d %H:%M', time.localtime(crawled_at))}  {vendor_item_id:<12} {source:<6} {price}")
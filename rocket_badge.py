@@ -0,0 +1,73 @@
+import re
+import sys
+from enum import Enum
+
+# 로켓 배지 시그니처 표 (우선순위 순: 판매자로켓 > 로켓프레시 > 로켓설치 > 로켓직구 > 로켓배송)
+# 이미지 예시는 rocket_category.html 참고
+BADGE_SIGNATURES = [
+    ("판매자로켓", ["logoRocketMerchant", "RocketMerchant", "badge_199559e56f7"]),
+    ("로켓프레시", ["rocket-fresh", "rocket_fresh"]),
+    ("로켓설치", ["rocket_install", "rocket-install"]),
+    ("로켓직구", ["logo_jikgu", "jikgu"]),
+    # badge_199559e56f7(판매자로켓)도 "badge_"를 포함하지만 우선순위가 높아 먼저 결정됨
+    ("로켓배송", ["logo_rocket", "delivery_badge_ext", "badge_"]),
+]
+
+BADGE_PRIORITY = {badge: rank for rank, (badge, _) in enumerate(BADGE_SIGNATURES)}
+
+
+class RocketBadge(Enum):
+    """
+    로켓 배지 종류 (값은 CSV에 쓰는 표시 문자열, 배지 없음은 "")
+    """
+
+    NONE = ""
+    SELLER = "판매자로켓"
+    FRESH = "로켓프레시"
+    INSTALL = "로켓설치"
+    JIKGU = "로켓직구"
+    ROCKET = "로켓배송"
+
+    @property
+    def is_rocket(self):
+        return self is not RocketBadge.NONE
+
+
+def _compile_matcher(table):
+    """
+    시그니처 표를 정규식 하나로 컴파일
+    전방탐색(?=...)으로 모든 위치를 검사하므로 겹치는 시그니처(예: logo_rocket_fresh)도 놓치지 않음
+    """
+    groups = []
+    for idx, (_, signatures) in enumerate(table):
+        # 같은 위치에서 긴 시그니처가 먼저 일치하도록 길이 역순 정렬
+        alternatives = "|".join(re.escape(s) for s in sorted(signatures, key=len, reverse=True))
+        groups.append(f"(?P<b{idx}>{alternatives})")
+    return re.compile("(?=" + "|".join(groups) + ")")
+
+
+_BADGE_MATCHER = _compile_matcher(BADGE_SIGNATURES)
+_GROUP_BADGES = {f"b{idx}": badge for idx, (badge, _) in enumerate(BADGE_SIGNATURES)}
+
+
+def classify_badge(srcs):
+    """
+    이미지 src 목록을 한 번 훑어 가장 우선순위가 높은 로켓 배지 반환 (없으면 "")
+    """
+    best = None
+    for m in _BADGE_MATCHER.finditer("\n".join(srcs)):
+        badge = _GROUP_BADGES[m.lastgroup]
+        if best is None or BADGE_PRIORITY[badge] < BADGE_PRIORITY[best]:
+            best = badge
+            if BADGE_PRIORITY[best] == 0:
+                break
+    return best or ""
+
+
+if __name__ == "__main__":
+    # 참고 파일의 각 배지 이미지를 분류해 확인: python rocket_badge.py [rocket_category.html]
+    path = sys.argv[1] if len(sys.argv) > 1 else "rocket_category.html"
+    with open(path, encoding="utf-8") as f:
+        reference = f.read()
+    for label, src in re.findall(r"<!--\s*(.*?)\s*-->\s*<img[^>]*?src=\"([^\"]+)\"", reference):
+        print(f"{label:<8} → {classify_badge([src]) or '(없음)'}  {src}")
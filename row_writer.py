@@ -0,0 +1,139 @@
+import csv
+import os
+import queue
+import threading
+import time
+
+import metrics
+from log_setup import get_logger
+
+log = get_logger("writer")
+
+# 한 번에 기록할 최대 행 수 / 첫 행이 대기열에 들어온 뒤 최대 대기 시간(초)
+BATCH_SIZE = int(os.getenv("COUPANG_WRITE_BATCH", "200"))
+FLUSH_INTERVAL = float(os.getenv("COUPANG_WRITE_INTERVAL", "1.0"))
+# 배치마다 디스크 반영 수준: "fsync"(기본, 전원 차단에도 안전) 또는 "flush"(프로세스 종료에만 안전, 더 빠름)
+DURABILITY = os.getenv("COUPANG_DURABILITY", "fsync")
+# 대기열 최대 크기 (쓰기가 한참 밀리면 작업 스레드가 기다림)
+QUEUE_SIZE = int(os.getenv("COUPANG_WRITE_QUEUE", "10000"))
+
+# 대기열 종료 표시
+_DONE = object()
+
+
+class RowWriter:
+    """
+    결과 CSV 전용 쓰기 스레드 - 작업 스레드/코루틴은 submit()으로 대기열에 넣기만 하고 파일 I/O는 기다리지 않음
+    - BATCH_SIZE행이 모이거나 FLUSH_INTERVAL초가 지나면 한 번에 기록 후 flush (DURABILITY=fsync면 fsync까지)
+    - journal이 주어지면 배치의 CSV를 디스크에 반영한 뒤 그 배치의 완료 기록을 한 번에 추가
+      (journal에 있는 항목은 CSV에도 반드시 있음)
+    - files가 여러 개면(결과 + 요약 CSV) submit(결과 행들, 요약 행들, ...) 순서로 전달
+    - files에는 CSV 파일 외에 write_rows(rows)가 있는 출력(columnar.ParquetSink, result_store.ResultStore)도
+      넣을 수 있음 - 같은 행을 여러 출력에 보내려면 튜플로 묶고, None은 건너뜀
+      (이런 출력은 fsync 대상이 아니고 commit()이 있으면 배치마다 journal 기록 전에 호출, 닫기는 호출한 쪽에서)
+    """
+
+    def __init__(self, *files, journal=None, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 durability=DURABILITY):
+        self.files = files
+        self.journal = journal
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.durability = durability
+        self.error = None
+        self._csv_files = []
+        self._sinks = []
+        # 위치(채널)별 행 기록 함수 목록
+        self._channels = [self._outputs(f) for f in files]
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name="row-writer", daemon=True)
+        self._thread.start()
+
+    def _outputs(self, f):
+        if f is None:
+            return []
+        if isinstance(f, (list, tuple)):
+            return [write for part in f for write in self._outputs(part)]
+        if hasattr(f, "write_rows"):
+            self._sinks.append(f)
+            return [f.write_rows]
+        self._csv_files.append(f)
+        return [csv.writer(f).writerows]
+
+    def submit(self, *rows_per_file, key=None, status="ok", **extra):
+        """
+        files 순서대로 행 목록을 대기열에 추가 (key가 있으면 기록 후 journal에 key 완료 기록)
+        """
+        if self.error is not None:
+            raise self.error
+        entry = (key, status, extra) if key is not None else None
+        self._queue.put((rows_per_file, entry))
+
+    def close(self):
+        """
+        남은 행을 모두 기록하고 쓰기 스레드 종료 (기록 중 오류가 있었으면 다시 발생)
+        """
+        self._queue.put(_DONE)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        batch = []
+        batch_rows = 0
+        deadline = 0.0
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _DONE:
+                self._commit(batch)
+                return
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+                batch_rows += sum(len(rows) for rows in item[0])
+            if batch and (item is None or batch_rows >= self.batch_size or time.monotonic() >= deadline):
+                self._commit(batch)
+                batch = []
+                batch_rows = 0
+
+    def _commit(self, batch):
+        if not batch or self.error is not None:
+            return
+        try:
+            with metrics.timer("csv_write"):
+                for rows_per_file, _ in batch:
+                    for outputs, rows in zip(self._channels, rows_per_file):
+                        if rows:
+                            for write_rows in outputs:
+                                write_rows(rows)
+                for f in self._csv_files:
+                    f.flush()
+            sync = self.durability == "fsync"
+            if sync:
+                with metrics.timer("fsync"):
+                    for f in self._csv_files:
+                        os.fsync(f.fileno())
+            for sink in self._sinks:
+                if hasattr(sink, "commit"):
+                    sink.commit()
+            entries = [entry for _, entry in batch if entry is not None]
+            if entries and self.journal is not None:
+                self.journal.mark_many(entries, sync=sync)
+        except Exception as e:
+            # 이후 행은 버리되 대기열은 계속 비워서 작업 스레드가 멈추지 않게 함
+            self.error = e
+            log.error("결과 CSV 기록 실패: %s", e)
+            return
+        metrics.incr("write_batches")
+        metrics.observe_value("write_batch_items", len(batch))
@@ -0,0 +1,577 @@
+import logging
+import os
+import re
+
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+
+from records import search_item_from_row
+from rocket_badge import classify_badge
+from log_setup import get_logger
+
+log = get_logger("parser")
+
+# iter_events가 내보내는 이벤트 종류
+EV_START, EV_TEXT, EV_END = 0, 1, 2
+
+# 파서 백엔드: "auto"(selectolax 설치 시 사용, 없으면 bs4), "bs4"(기존 html.parser), "selectolax"(C 기반 lexbor)
+PARSER_BACKEND = os.getenv("COUPANG_PARSER", "auto")
+
+# 검색 결과 목록 항목 선택자 (신 구조: <ul id="product-list"> 내의 li)
+LISTING_SELECTOR = "#product-list .ProductUnit_productUnit__Qd6sv"
+
+# bs4 get_text()가 포함하는 문자열 타입 (주석 등은 제외)
+_BS4_TEXT_TYPES = (NavigableString, CData)
+
+
+class Bs4Backend:
+    """
+    BeautifulSoup(html.parser) 기반 백엔드 - 기존 파싱 결과의 기준
+    """
+
+    name = "bs4"
+
+    def parse(self, html):
+        return BeautifulSoup(html, "html.parser")
+
+    def select(self, node, css):
+        return node.select(css)
+
+    def select_one(self, node, css):
+        return node.select_one(css)
+
+    def text(self, node, sep="", strip=False):
+        return node.get_text(sep, strip=strip)
+
+    def outer_html(self, node):
+        return str(node)
+
+    def release(self, root):
+        """
+        추출이 끝난 트리 해제 - bs4 트리는 부모/형제 참조가 순환하므로 GC를 기다리지 않고 바로 끊음
+        """
+        root.decompose()
+
+    def iter_events(self, node):
+        """
+        node 하위 트리를 한 번 순회하며 (EV_START, 요소, 태그명, 클래스 목록, 속성) / (EV_TEXT, 문자열) / (EV_END,) 생성
+        텍스트는 get_text()와 같은 기준(NavigableString, CData만, 주석 제외)으로 내보냄
+        """
+        stack = [iter(node.contents)]
+        while stack:
+            for child in stack[-1]:
+                if isinstance(child, Tag):
+                    attrs = child.attrs
+                    yield EV_START, child, child.name, attrs.get("class") or (), attrs
+                    stack.append(iter(child.contents))
+                    break
+                if type(child) in _BS4_TEXT_TYPES:
+                    yield EV_TEXT, child
+            else:
+                stack.pop()
+                if stack:
+                    yield (EV_END,)
+
+
+class SelectolaxBackend:
+    """
+    selectolax(lexbor, C 구현) 기반 백엔드 - bs4와 같은 값을 추출하도록 텍스트 규칙을 맞춤
+    """
+
+    name = "selectolax"
+
+    # 텍스트 노드 경계를 표시하는 구분자 (bs4의 get_text(strip=True)와 동일하게 빈 노드를 제외하기 위함)
+    _SEP = "\x1f"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser_cls = LexborHTMLParser
+
+    def parse(self, html):
+        return self._parser_cls(html)
+
+    def select(self, node, css):
+        return node.css(css)
+
+    def select_one(self, node, css):
+        return node.css_first(css)
+
+    def text(self, node, sep="", strip=False):
+        if not strip:
+            return node.text(deep=True, separator=sep)
+        raw = node.text(deep=True, separator=self._SEP)
+        return sep.join(part.strip() for part in raw.split(self._SEP) if part.strip())
+
+    def outer_html(self, node):
+        return node.html
+
+    def release(self, root):
+        # lexbor 트리는 참조가 없어지는 즉시 C 쪽에서 해제됨
+        pass
+
+    def iter_events(self, node):
+        stack = [node.iter(include_text=True)]
+        while stack:
+            for child in stack[-1]:
+                tag = child.tag
+                if tag == "-text":
+                    yield EV_TEXT, child.text_content
+                elif tag[0] != "-":
+                    attrs = child.attributes
+                    yield EV_START, child, tag, (attrs.get("class") or "").split(), attrs
+                    stack.append(child.iter(include_text=True))
+                    break
+            else:
+                stack.pop()
+                if stack:
+                    yield (EV_END,)
+
+
+BACKENDS = {
+    "bs4": Bs4Backend,
+    "selectolax": SelectolaxBackend,
+}
+
+_backend_cache = {}
+
+
+def get_backend(name=None):
+    """
+    이름으로 파서 백엔드 반환 (기본값: COUPANG_PARSER 환경변수)
+    """
+    name = name or PARSER_BACKEND
+    if name == "auto":
+        try:
+            import selectolax  # noqa: F401
+            name = "selectolax"
+        except ImportError:
+            name = "bs4"
+    if name not in _backend_cache:
+        if name not in BACKENDS:
+            raise ValueError(f"알 수 없는 파서 백엔드: {name} (사용 가능: {', '.join(BACKENDS)})")
+        _backend_cache[name] = BACKENDS[name]()
+    return _backend_cache[name]
+
+
+# 추출용 정규식 (루프 밖에서 한 번만 컴파일)
+_AMOUNT_RE = re.compile(r"([0-9][0-9,\.]+)\s*원?")
+_AMOUNTS_WON_RE = re.compile(r"([0-9][0-9,\.]+)\s*원")
+_DIGITS_RE = re.compile(r"\d+")
+_RANK_PARAM_RE = re.compile(r"[?&]rank=(\d+)")
+_ARRIVAL_STRING_RE = re.compile(r"(도착 예정|도착 보장)")
+_ARRIVAL_DATE_RE = re.compile(r"([0-9]{1,2}/[0-9]{1,2}|모레\([^)]+\)|내일\([^)]+\)|[가-힣]+\([^)]+\))\s*도착\s*(예정|보장)")
+_ARRIVAL_SIMPLE_RE = re.compile(r"(도착\s*예정|도착\s*보장)")
+_REVIEW_PAREN_RE = re.compile(r"\((\d+)\)")
+_REVIEW_HTML_RE = re.compile(r"\([^)]*?(\d+)[^)]*?\)")
+_POINTS_RE = re.compile(r"([0-9][0-9,\.]+)\s*원\s*적립")
+
+# 한 번의 순회에서 기록해 둘 클래스 → 키 (각 키는 문서 순서상 첫 요소만 보관, select_one과 동일)
+_WATCHED_CLASSES = {
+    "ProductUnit_productNameV2__cV9cw": "name",
+    "name": "name_old",
+    "PriceArea_priceArea__NntJz": "price_area",
+    "search-product-wrap-img": "thumb",
+    "ImageBadge_default__JWaYp": "badge_box",
+    "ProductRating_ratingCount__R0Vhz": "review",
+    "BenefitBadge_cash-benefit__SmkrN": "points",
+}
+
+
+class _ScanNode:
+    """
+    순회 중 기록한 요소: 원본 노드, 속성, 요소 순번 범위(포함 관계 판단용), 텍스트 조각 범위
+    """
+
+    __slots__ = ("node", "attrs", "pos", "end_pos", "t_start", "t_end")
+
+    def __init__(self, node, attrs, pos, t_start):
+        self.node = node
+        self.attrs = attrs
+        self.pos = pos
+        self.end_pos = pos
+        self.t_start = t_start
+        self.t_end = t_start
+
+    def get(self, name):
+        return self.attrs.get(name)
+
+
+class ItemScan:
+    """
+    상품 항목 하위 트리를 한 번 순회한 결과 (텍스트 조각, img, 관심 클래스 요소)
+    """
+
+    def __init__(self):
+        self.texts = []
+        self.parents = []       # 텍스트 조각별 부모 요소
+        self.first = {}         # _WATCHED_CLASSES 키 → 첫 요소
+        self.imgs = []
+        self.links = []
+        self.dels = []
+        self.price_values = []
+        self.arrival_boxes = []  # fw-leading-[15px] 클래스 요소들
+        self.rank_node = None    # [class*=RankMark_rank] 첫 요소
+        self.root = None
+
+    def text(self, rec, sep=" "):
+        """
+        rec 하위 텍스트 (bs4 get_text(sep, strip=True)와 동일)
+        """
+        if rec is None:
+            return ""
+        return sep.join(t.strip() for t in self.texts[rec.t_start:rec.t_end] if t.strip())
+
+    def raw_text(self, rec):
+        """
+        rec 하위 텍스트를 가공 없이 연결 (bs4 .text와 동일)
+        """
+        return "".join(self.texts[rec.t_start:rec.t_end])
+
+    @staticmethod
+    def first_within(recs, container):
+        """
+        recs 중 container 하위에 있는 첫 요소
+        """
+        for rec in recs:
+            if container.pos < rec.pos <= container.end_pos:
+                return rec
+        return None
+
+
+def scan_item(be, item):
+    """
+    상품 항목 하위 트리를 한 번만 순회해 텍스트/img/관심 요소를 수집
+    """
+    scan = ItemScan()
+    texts = scan.texts
+    parents = scan.parents
+    first = scan.first
+    root = _ScanNode(item, {}, -1, 0)
+    stack = [root]
+    pos = 0
+
+    for event in be.iter_events(item):
+        kind = event[0]
+        if kind == EV_TEXT:
+            texts.append(event[1])
+            parents.append(stack[-1])
+        elif kind == EV_START:
+            _, node, tag, classes, attrs = event
+            rec = _ScanNode(node, attrs, pos, len(texts))
+            pos += 1
+            stack.append(rec)
+            if tag == "img":
+                scan.imgs.append(rec)
+            elif tag == "a":
+                scan.links.append(rec)
+            elif tag == "del":
+                scan.dels.append(rec)
+            for cls in classes:
+                key = _WATCHED_CLASSES.get(cls)
+                if key is not None:
+                    first.setdefault(key, rec)
+                elif cls == "price-value":
+                    scan.price_values.append(rec)
+                if "fw-leading-[15px]" in cls:
+                    if not scan.arrival_boxes or scan.arrival_boxes[-1] is not rec:
+                        scan.arrival_boxes.append(rec)
+                if scan.rank_node is None and "RankMark_rank" in cls:
+                    scan.rank_node = rec
+        else:
+            rec = stack.pop()
+            rec.t_end = len(texts)
+            rec.end_pos = pos - 1
+
+    root.t_end = len(texts)
+    root.end_pos = pos - 1
+    scan.root = root
+    return scan
+
+
+def _select_items(be, soup):
+    # 신 구조 우선
+    items = be.select(soup, LISTING_SELECTOR)
+    if not items:
+        # 폴백 선택자
+        items = be.select(soup, "[class*=search-product], .baby-product, .search-product-wrap, li[class*=product]")
+    return items
+
+
+def parse_search_results(html, backend=None, stats=None):
+    """
+    Coupang 검색결과에서 최대 36개 항목을 확장 파싱
+    반환: [rank, name, original_price, final_price, rocket_badge, arrival, free_shipping, review_count, points, stock_status, link, img_url]
+    stats(dict)가 주어지면 stats["items"]에 페이지의 전체 항목 수(가격 없는 항목 포함) 기록 - 마지막 페이지 판단용
+    """
+    be = backend or get_backend()
+    soup = be.parse(html)
+
+    items = _select_items(be, soup)
+    if stats is not None:
+        stats["items"] = len(items)
+    results = []
+    for item in items:
+        row = search_row_from_scan(be, scan_item(be, item))
+        if row is None:
+            # 가격 전혀 없으면 스킵
+            continue
+        results.append(row)
+
+        if len(results) >= 36:
+            break
+
+    be.release(soup)
+    return results
+
+
+def parse_search_items(html, backend=None, stats=None, crawled_on=None):
+    """
+    parse_search_results와 같은 항목을 정규화된 SearchItem(records.py) 목록으로 반환
+    (가격/리뷰수/포인트는 int, 배지는 RocketBadge, 도착일은 crawled_on 기준 date)
+    """
+    return [search_item_from_row(row, crawled_on) for row in parse_search_results(html, backend, stats)]
+
+
+def search_page_items(html, crawled_on=None, backend=None):
+    """
+    parse_search_items + 페이지 전체 항목 수: (SearchItem 목록, 항목 수)
+    stats 대신 반환값으로 돌려주므로 파싱 프로세스(parse_pool.py)에서 실행 가능
+    """
+    stats = {}
+    items = parse_search_items(html, backend, stats, crawled_on)
+    return items, stats.get("items", 0)
+
+
+def parse_listing_entries(html, full=False, backend=None):
+    """
+    main.find_list용 페이지 추출: (페이지 전체 항목 수, [(목록 4개 필드, 12개 필드 행 또는 None), ...])
+    - 목록 필드는 extract_listing_item 기준, 가격이 없는 항목은 건너뜀
+    - full이면 같은 순회 결과로 12개 필드 행도 추출
+    파싱 프로세스(parse_pool.py)에서 실행할 수 있도록 결과는 문자열/튜플만 사용
+    """
+    be = backend or get_backend()
+    soup = be.parse(html)
+    # 신 구조: <ul id="product-list"> 내의 li.ProductUnit_productUnit__Qd6sv
+    items = be.select(soup, LISTING_SELECTOR)
+    entries = []
+    for idx, item in enumerate(items):
+        try:
+            scan = scan_item(be, item)
+            extracted = extract_listing_item(be, item, scan)
+            if extracted is None:
+                log.debug("항목 %s: 가격 정보 없음 (리퍼 제품일 수 있음) - 건너뜀", idx + 1)
+                continue
+            entries.append((extracted, search_row_from_scan(be, scan) if full else None))
+        except Exception as e:
+            log.debug("항목 %s 처리 중 오류: %s", idx + 1, e)
+    be.release(soup)
+    return len(items), entries
+
+
+def search_row_from_scan(be, scan):
+    """
+    한 번의 순회 결과(ItemScan)에서 검색 결과 12개 필드 추출 (가격이 전혀 없으면 None)
+    """
+    first = scan.first
+    # 이름
+    name_node = first.get("name") or first.get("name_old")
+
+    # 가격 영역
+    price_container = first.get("price_area")
+    original_price = ""
+    final_price = ""
+    if price_container:
+        # 원가 <del>
+        del_node = scan.first_within(scan.dels, price_container)
+        if del_node:
+            m = _AMOUNT_RE.search(scan.text(del_node))
+            if m:
+                original_price = m.group(1) + "원"
+        # 최종가: 컨테이너 전체 텍스트에서 금액 패턴들 추출 후 마지막 항목(보통 최종가)을 사용
+        amounts = _AMOUNTS_WON_RE.findall(scan.text(price_container))
+        if amounts:
+            final_price = amounts[-1] + "원"
+        # 구 구조 폴백
+        if not final_price:
+            price_node = scan.first_within(scan.price_values, price_container)
+            if price_node:
+                m = _AMOUNT_RE.search(scan.text(price_node))
+                if m:
+                    final_price = m.group(1) + "원"
+    else:
+        # 구 구조 폴백
+        price_node = scan.price_values[0] if scan.price_values else None
+        if price_node:
+            m = _AMOUNT_RE.search(scan.text(price_node))
+            if m:
+                final_price = m.group(1) + "원"
+    if not final_price and not original_price:
+        return None
+
+    # 링크
+    a_tag = scan.links[0] if scan.links else None
+    href = a_tag.get("href") if a_tag else None
+    link = f"https://www.coupang.com{href}" if href and href.startswith("/") else (href or "")
+
+    # 썸네일
+    img_url = _thumb_url(first.get("thumb"))
+
+    # 랭킹
+    rank = ""
+    if scan.rank_node:
+        r = _DIGITS_RE.search(scan.text(scan.rank_node))
+        if r:
+            rank = r.group(0)
+    if not rank:
+        # 링크의 rank 파라미터 폴백
+        if href:
+            r = _RANK_PARAM_RE.search(href)
+            if r:
+                rank = r.group(1)
+
+    # 로켓 배지 감지: 시그니처 표 기반 분류기로 img src를 한 번만 훑음 (rocket_badge.py)
+    name_text = scan.text(name_node, "")
+    srcs = [(img.get("src") or "") + (img.get("data-src") or "") for img in scan.imgs]
+    rocket_badge = classify_badge(srcs)
+
+    if log.isEnabledFor(logging.DEBUG):
+        if not rocket_badge:
+            log.debug("배지 없음 - 상품: %.30s... (전체 img src: %s)", name_text, [s for s in srcs if s][:3])
+        else:
+            log.debug("최종 배지: %s - 상품: %.30s...", rocket_badge, name_text)
+
+    # 도착일/도착보장
+    arrival = ""
+    # .fw-leading-[15px] 클래스를 가진 요소에서 도착 정보 추출
+    for container in scan.arrival_boxes:
+        container_text = scan.text(container)
+        # "도착 예정" 또는 "도착 보장"이 포함된 경우
+        if "도착 예정" in container_text or "도착 보장" in container_text:
+            arrival = container_text
+            break
+
+    # 위 방법으로 못 찾으면 기존 방법 시도: 도착 문구가 있는 텍스트 노드의 부모 요소 전체 텍스트 (날짜 포함)
+    if not arrival:
+        for idx, t in enumerate(scan.texts):
+            if _ARRIVAL_STRING_RE.search(t):
+                arrival = scan.text(scan.parents[idx])
+                break
+
+    # 항목 전체 텍스트 (도착 패턴 검색, 재고 현황에 공통 사용)
+    item_text = scan.text(scan.root)
+
+    # 여전히 못 찾으면 전체 텍스트에서 패턴 검색
+    if not arrival:
+        # 다양한 패턴: "12/1 도착 예정", "모레(금) 도착 예정", "내일(목) 도착 보장" 등
+        m = _ARRIVAL_DATE_RE.search(item_text)
+        if m:
+            arrival = m.group(0)
+        else:
+            # 간단한 패턴
+            m = _ARRIVAL_SIMPLE_RE.search(item_text)
+            if m:
+                arrival = m.group(0)
+
+    # 무료배송
+    free_shipping = any("무료배송" in t for t in scan.texts)
+
+    # 리뷰수
+    review_count = ""
+    rc_node = first.get("review")
+    if rc_node:
+        # HTML 주석이 포함된 경우를 대비해 여러 방법 시도
+        # 방법 1: 텍스트로 추출
+        rc_text = scan.text(rc_node)
+        m = _REVIEW_PAREN_RE.search(rc_text)
+        if m:
+            review_count = m.group(1)
+        else:
+            # 방법 2: HTML 문자열에서 직접 추출 (주석 포함, 드문 경우에만 직렬화)
+            m = _REVIEW_HTML_RE.search(be.outer_html(rc_node.node))
+            if m:
+                review_count = m.group(1)
+            else:
+                # 방법 3: 모든 숫자 찾기
+                all_numbers = _DIGITS_RE.findall(rc_text)
+                if all_numbers:
+                    review_count = all_numbers[0]
+
+    # 포인트 적립
+    points = ""
+    points_node = first.get("points")
+    if points_node:
+        pts_txt = scan.text(points_node)
+        m = _POINTS_RE.search(pts_txt)
+        if m:
+            points = m.group(1) + "원"
+        else:
+            points = pts_txt
+
+    # 재고/품절 현황 (예: '품절임박', '일시품절', '일부 옵션 품절')
+    stock_status = ""
+    if "품절임박" in item_text:
+        stock_status = "품절임박"
+    elif "품절" in item_text:
+        stock_status = "품절"
+
+    return [
+        rank or "",
+        name_text,
+        original_price,
+        final_price,
+        rocket_badge,
+        arrival,
+        "Y" if free_shipping else "N",
+        review_count,
+        points,
+        stock_status,
+        link,
+        img_url,
+    ]
+
+
+def _thumb_url(thumb):
+    if thumb and thumb.get("data-img-src"):
+        img_url = f"https:{thumb.get('data-img-src')}"
+    elif thumb and thumb.get("src"):
+        img_url = f"https:{thumb.get('src')}"
+    else:
+        img_url = ""
+    return img_url.replace("230x230ex", "700x700ex")
+
+
+def extract_listing_item(be, item, scan=None):
+    """
+    main.find_list용 항목 추출: (name, price, link, img_url) 반환, 가격이 없으면 None
+    scan(ItemScan)이 주어지면 다시 순회하지 않음 (search_row_from_scan과 같은 순회 결과 공유)
+    """
+    scan = scan or scan_item(be, item)
+    first = scan.first
+    # 이름: 신 구조 클래스 우선, 없으면 구 구조 폴백
+    name = first.get("name") or first.get("name_old")
+    # 가격: 신 구조 영역 내 텍스트에서 가격 추출, 없으면 구 구조 폴백
+    price_container = first.get("price_area")
+    price = None
+    if price_container:
+        # 금액 패턴 추출 (숫자와 , 포함, '원' 포함 가능)
+        m = _AMOUNT_RE.search(scan.text(price_container))
+        if m:
+            price = m.group(1) + "원"
+    if not price:
+        price = scan.raw_text(scan.price_values[0]) if scan.price_values else None
+
+    if not price:
+        return None
+
+    a_tag = scan.links[0] if scan.links else None
+    href = a_tag.get("href") if a_tag else None
+    link = f"https://www.coupang.com{href}" if href and href.startswith("/") else (href or "")
+    name_text = "" if not name else scan.raw_text(name)
+    return name_text, price, link, _thumb_url(first.get("thumb"))
+
+
+def parse_listing(html, backend=None):
+    """
+    main.find_list와 같은 방식으로 검색 결과 페이지 전체 추출: [(name, price, link, img_url), ...]
+    """
+    return [extracted for extracted, _ in parse_listing_entries(html, backend=backend)[1]]
+
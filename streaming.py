@@ -0,0 +1,76 @@
+import asyncio
+import os
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import rate_control
+from log_setup import get_logger
+
+log = get_logger("main")
+
+# 스트리밍 모드: "on"이면 입력(키워드 CSV, 이어하기 때 재사용하는 링크 CSV)을 목록으로 만들지 않고 한 줄씩 읽으며
+# 실행 중 완료한 항목도 메모리에 쌓지 않음 (완료 기록은 journal 파일에만) - 입력이 수십만 줄이어도 메모리 일정
+STREAM = os.getenv("COUPANG_STREAM", "off")
+# 한 번에 제출해 둘 작업(키워드/URL) 수 상한 (0이면 동시 요청 상한 x 2)
+# 요청 슬롯을 채우기에는 충분하고, 대기 중인 작업/HTML은 이만큼만 메모리에 있음 (스트리밍 모드와 관계없이 적용)
+STREAM_WINDOW = int(os.getenv("COUPANG_STREAM_WINDOW", "0")) or rate_control.MAX_CONCURRENCY * 2
+
+
+def enabled():
+    return STREAM == "on"
+
+
+class Counted:
+    """
+    이터러블을 한 번 지나가며 꺼낸 개수를 셈 (스트리밍 입력은 len()이 없으므로 리포트용)
+    """
+
+    def __init__(self, iterable):
+        self._it = iter(iterable)
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        value = next(self._it)
+        self.count += 1
+        return value
+
+
+def _log_errors(futures):
+    for future in futures:
+        try:
+            future.result()
+        except Exception as e:
+            log.error("작업 실행 중 예외 발생: %s", e)
+
+
+def submit_bounded(executor, func, args_iter, window=STREAM_WINDOW):
+    """
+    args_iter의 인자 튜플마다 executor.submit(func, *args) - 끝나지 않은 작업이 window개면 하나가 끝난 뒤 다음을 제출
+    (입력 전체의 Future를 미리 만들지 않음) 작업 예외는 기록만 하고 계속 진행, 제출한 작업 수 반환
+    """
+    pending = set()
+    submitted = 0
+    for args in args_iter:
+        if len(pending) >= window:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            _log_errors(done)
+        pending.add(executor.submit(func, *args))
+        submitted += 1
+    _log_errors(wait(pending).done)
+    return submitted
+
+
+async def run_bounded_async(items, handle, window=STREAM_WINDOW):
+    """
+    코루틴 window개가 items를 나눠 꺼내며 await handle(item) (입력 수만큼 코루틴을 미리 만들지 않음)
+    handle의 예외는 호출하는 쪽에서 처리
+    """
+    iterator = iter(items)
+
+    async def _worker():
+        for item in iterator:
+            await handle(item)
+
+    await asyncio.gather(*(_worker() for _ in range(max(1, window))))